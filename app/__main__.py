@@ -1,9 +1,11 @@
 """
 Main entry point for the application
+
+    python -m app [--profile-startup] [--check]
 """
+import argparse
 import asyncio
 import logging
-import threading
 import os
 import sys
 
@@ -17,55 +19,39 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def run_flask_app(app, port):
-    """Запуск Flask приложения"""
-    try:
-        logger.info(f"🚀 Запуск Flask сервера на порту {port}")
-        app.run(
-            host='0.0.0.0',
-            port=port,
-            debug=False,
-            use_reloader=False,
-            threaded=True
-        )
-    except Exception as e:
-        logger.error(f"❌ Ошибка запуска Flask: {e}")
+from app.utils.startup import StartupProfiler, run_bot  # noqa: E402
 
-async def main():
+
+async def main(profiler: StartupProfiler):
     """Основная асинхронная функция запуска"""
+    db = None
+    web = None
     try:
-        # 1. Инициализация базы данных
+        # 1. Инициализация базы данных (один экземпляр на процесс)
         logger.info("🔄 Инициализация базы данных...")
-        from app.models.database import Database
-        db = Database()
+        with profiler.phase("база данных"):
+            from app.models.database import get_database
+            db = get_database()
         logger.info("✅ База данных инициализирована")
         
         # 2. Инициализация Telegram бота
         logger.info("🔄 Инициализация Telegram бота...")
-        from app.bot.bot_handler import TelegramBot
         from app.config import BOT_TOKEN, ADMIN_IDS
         
         if not BOT_TOKEN:
             logger.error("❌ Токен бота не найден. Проверьте файл .env")
             return
         
-        telegram_bot = TelegramBot(db)
+        with profiler.phase("импорт и создание бота"):
+            from app.bot.bot_handler import TelegramBot
+            telegram_bot = TelegramBot(db)
         logger.info(f"✅ Бот инициализирован. Администраторы: {ADMIN_IDS}")
         
-        # 3. Создание и запуск Flask приложения в отдельном потоке
-        logger.info("🔄 Создание Flask приложения...")
-        from app.web.routes import create_app
-        app = create_app(db, telegram_bot)
-        
-        # Запуск Flask в отдельном потоке
+        # 3. Flask импортируется и слушает порт в своём потоке, пока бот подключается
+        from app.web.dev_server import DevServerThread
         port = int(os.environ.get('PORT', 5000))
-        flask_thread = threading.Thread(
-            target=run_flask_app,
-            args=(app, port),
-            daemon=True
-        )
-        flask_thread.start()
-        logger.info(f"✅ Flask сервер запущен на http://localhost:{port}")
+        web = DevServerThread(db, telegram_bot, port=port)
+        web.start()
         
         # 4. Запуск Telegram бота
         logger.info("🤖 Запуск Telegram бота...")
@@ -76,7 +62,7 @@ async def main():
         logger.info("⏰ Режим работы: 24/7")
         logger.info("=" * 50)
         
-        await telegram_bot.run()
+        await run_bot(telegram_bot, web, profiler)
         
     except ImportError as e:
         logger.error(f"❌ Ошибка импорта: {e}")
@@ -85,6 +71,11 @@ async def main():
         logger.info("👋 Приложение остановлено пользователем")
     except Exception as e:
         logger.error(f"❌ Критическая ошибка: {e}", exc_info=True)
+    finally:
+        if web is not None:
+            web.shutdown()
+        if db is not None:
+            db.close()
 
 def check_dependencies():
     """Проверка зависимостей и структуры проекта"""
@@ -125,10 +116,9 @@ def check_dependencies():
             else:
                 logger.warning(f"   ⚠️  {file_path} - не найден")
     
-    # Проверка переменных окружения
+    # Проверка переменных окружения (.env уже загружен app.config)
     logger.info("🔍 Проверка переменных окружения...")
-    from dotenv import load_dotenv
-    load_dotenv()
+    import app.config  # noqa: F401
     
     required_env_vars = ['BOT_TOKEN', 'ADMIN_IDS', 'FLASK_SECRET_KEY']
     for var in required_env_vars:
@@ -139,16 +129,25 @@ def check_dependencies():
             logger.error(f"   ❌ {var} - не установлена")
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(prog="python -m app")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="вывести время импортов и фаз запуска")
+    parser.add_argument("--check", action="store_true",
+                        help="проверить структуру проекта и переменные окружения перед запуском")
+    args = parser.parse_args()
+    profiler = StartupProfiler(enabled=args.profile_startup)
+    
     print("=" * 50)
     print("🚀 Запуск КаналТехСервис")
     print("=" * 50)
     
-    # Проверка зависимостей
-    check_dependencies()
+    # Проверка зависимостей — по запросу, обычный запуск её пропускает
+    if args.check:
+        check_dependencies()
     
     # Запуск основного приложения
     try:
-        asyncio.run(main())
+        asyncio.run(main(profiler))
     except KeyboardInterrupt:
         logger.info("👋 Приложение остановлено")
     except Exception as e:
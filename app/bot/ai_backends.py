@@ -0,0 +1,170 @@
+"""Подключаемые модели для ответов Аквы, когда база знаний не помогла.
+
+Модель (локальная CPU-модель через llama-cpp-python или HTTP-сервис
+в той же сети) работает в пуле потоков и не блокирует event loop бота.
+Одновременные вопросы собираются в микро-пакеты: запросы, пришедшие в
+течение batch_wait секунд, уходят в модель одним вызовом.
+
+Настройка (.env):
+    AI_BACKEND=http        # '' — отключено, http, llama_cpp
+    AI_BACKEND_URL=http://127.0.0.1:8081/generate
+    AI_MODEL_PATH=models/assistant.gguf
+"""
+import asyncio
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+AI_BACKEND = os.getenv("AI_BACKEND", "").strip().lower()
+AI_BACKEND_URL = os.getenv("AI_BACKEND_URL", "http://127.0.0.1:8081/generate")
+AI_MODEL_PATH = os.getenv("AI_MODEL_PATH", "")
+AI_MAX_TOKENS = int(os.getenv("AI_MAX_TOKENS", "200"))
+AI_BATCH_SIZE = int(os.getenv("AI_BATCH_SIZE", "8"))
+AI_BATCH_WAIT_MS = float(os.getenv("AI_BATCH_WAIT_MS", "20"))
+AI_WORKERS = int(os.getenv("AI_WORKERS", "1"))
+
+
+class AIBackend:
+    """Модель, отвечающая на пакет вопросов. Вызывается из рабочего потока."""
+
+    name = "base"
+
+    def generate_batch(self, prompts: List[str]) -> List[Optional[str]]:
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class HTTPBackend(AIBackend):
+    """Локальный HTTP-сервис: POST {"prompts": [...]} → {"responses": [...]}."""
+
+    name = "http"
+
+    def __init__(self, url: str = AI_BACKEND_URL, timeout: float = 10.0,
+                 max_tokens: int = AI_MAX_TOKENS):
+        import requests
+        self.url = url
+        self.timeout = timeout
+        self.max_tokens = max_tokens
+        self._session = requests.Session()
+
+    def generate_batch(self, prompts: List[str]) -> List[Optional[str]]:
+        response = self._session.post(
+            self.url,
+            json={"prompts": prompts, "max_tokens": self.max_tokens},
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+        responses = response.json().get("responses", [])
+        if len(responses) != len(prompts):
+            raise ValueError(f"Backend returned {len(responses)} responses for {len(prompts)} prompts")
+        return responses
+
+    def close(self):
+        self._session.close()
+
+
+class LlamaCppBackend(AIBackend):
+    """Небольшая GGUF-модель на CPU через llama-cpp-python (опционально)."""
+
+    name = "llama_cpp"
+
+    def __init__(self, model_path: str = AI_MODEL_PATH, n_ctx: int = 2048,
+                 n_threads: Optional[int] = None, max_tokens: int = AI_MAX_TOKENS):
+        try:
+            from llama_cpp import Llama
+        except ImportError as e:
+            raise ImportError("AI_BACKEND=llama_cpp requires 'pip install llama-cpp-python'") from e
+        if not model_path:
+            raise ValueError("AI_MODEL_PATH is not set")
+        self.max_tokens = max_tokens
+        self._model = Llama(model_path=model_path, n_ctx=n_ctx, n_threads=n_threads, verbose=False)
+
+    def generate_batch(self, prompts: List[str]) -> List[Optional[str]]:
+        # llama.cpp держит один контекст — вопросы пакета идут подряд,
+        # но за один переход в рабочий поток
+        results = []
+        for prompt in prompts:
+            output = self._model(prompt, max_tokens=self.max_tokens, stop=["\nКлиент:"])
+            results.append(output["choices"][0]["text"].strip() or None)
+        return results
+
+
+class MicroBatcher:
+    """Собирает одновременные вопросы в пакеты и выполняет их в пуле потоков."""
+
+    def __init__(self, backend: AIBackend, max_batch: int = AI_BATCH_SIZE,
+                 batch_wait: float = AI_BATCH_WAIT_MS / 1000, workers: int = AI_WORKERS):
+        self.backend = backend
+        self.max_batch = max_batch
+        self.batch_wait = batch_wait
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ai-backend")
+        # Пакет занимает поток только когда тот свободен: пока пакет ждёт,
+        # вопросы с истёкшим бюджетом из него выбрасываются
+        self._slots = asyncio.Semaphore(workers)
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self.batches = 0
+        self.prompts = 0
+
+    async def submit(self, prompt: str) -> Optional[str]:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((prompt, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.batch_wait, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        # Вопросы, чей бюджет уже истёк, в модель не отправляем
+        batch = [(prompt, future) for prompt, future in self._pending if not future.done()]
+        self._pending = []
+        if batch:
+            asyncio.get_running_loop().create_task(self._run(batch))
+
+    async def _run(self, batch: List[Tuple[str, asyncio.Future]]):
+        async with self._slots:
+            batch = [(prompt, future) for prompt, future in batch if not future.done()]
+            if not batch:
+                return
+            self.batches += 1
+            self.prompts += len(batch)
+            loop = asyncio.get_running_loop()
+            try:
+                results = await loop.run_in_executor(
+                    self._executor, self.backend.generate_batch, [prompt for prompt, _ in batch]
+                )
+            except Exception as e:
+                logger.warning(f"⚠️ Ошибка AI-модели ({self.backend.name}): {e}")
+                results = [None] * len(batch)
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self.backend.close()
+
+
+def create_backend(name: str = AI_BACKEND) -> Optional[AIBackend]:
+    """Модель по имени из AI_BACKEND; None — если не настроена или не загрузилась."""
+    if not name:
+        return None
+    try:
+        if name == "http":
+            return HTTPBackend()
+        if name == "llama_cpp":
+            return LlamaCppBackend()
+        logger.error(f"❌ Неизвестный AI_BACKEND: {name}")
+    except (ImportError, ValueError, OSError) as e:
+        logger.error(f"❌ AI-модель {name} не загружена: {e}")
+    return None
@@ -1,6 +1,17 @@
 """Аква 💧 - AI-помощница КаналТехСервис."""
+import asyncio
+import html
 import logging
+import math
+import os
 import random
+import re
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from app.utils.cache import TTLCache
+from .ai_backends import AIBackend, MicroBatcher
+from app.utils.stemmer import stem
 
 logger = logging.getLogger(__name__)
 
@@ -406,33 +417,323 @@ PROBLEM_CTAS = {
 }
 
 
+# Порядок выбора категории при равном счёте: побеждает та, что выше в списке
+CATEGORY_PRIORITY = (
+    "prices_septic",
+    "prices_cleaning",
+    "prices_diagnostics",
+    "canal_wash",
+    "sludge_suction",
+    "timing_urgent",
+    "timing_regular",
+    "area_yartsevo",
+    "area_region",
+    "payment_cash",
+    "payment_card",
+    "payment_receipt",
+    "services_all",
+    "septic_volume",
+    "septic_frequency",
+    "septic_smell",
+    "blockage_causes",
+    "blockage_prevention",
+    "guarantee",
+    "equipment",
+    "order_how",
+    "contact",
+    "working_hours",
+    "experience",
+    "private_house",
+    "business",
+    "winter",
+    "discount",
+    "review",
+    "complaint",
+    "hello",
+    "thanks",
+)
+
+# Слова, выбирающие призыв к заказу (в порядке приоритета)
+CTA_TRIGGERS = {
+    "urgent": ["срочн", "авари", "сейчас", "немедлен", "затоп"],
+    "price": ["цен", "стоим", "сколько", "дорого"],
+    "doubt": ["не знаю", "может", "наверн", "думаю"],
+}
+
+# Слова-триггеры призывов («сколько», «срочно», «может») говорят о настроении
+# клиента, а не об услуге, поэтому в счёте категории весят меньше
+GENERIC_TERM_WEIGHT = 0.5
+
+# Служебные слова не сопоставляются с одиночными ключевыми словами
+# (иначе «или» совпало бы с «ил»), но участвуют во фразах вроде «не уход»
+STOP_WORDS = frozenset(
+    "а без в во да для до его ее же за и из или к как ли мне мы на не но ну о об от по "
+    "при про с со то у уже что чтобы я".split()
+)
+
+MIN_STEM_LENGTH = 4
+MIN_PHRASE_STEM_LENGTH = 3
+
+_TOKEN_RE = re.compile(r"[а-яёa-z0-9]+")
+
+# Кэш разбора повторяющихся вопросов: нормализованный текст → (категория, призыв)
+AI_CACHE_SIZE = int(os.getenv("AI_CACHE_SIZE", "1024"))
+AI_CACHE_TTL = float(os.getenv("AI_CACHE_TTL", "3600"))
+# Сколько секунд ждать ответа модели, прежде чем ответить по базе знаний
+AI_LATENCY_BUDGET = float(os.getenv("AI_LATENCY_BUDGET", "3"))
+
+Tag = Tuple[str, str]
+# (номер тега, основа или кортеж основ фразы, вес)
+Posting = Tuple[int, Any, float]
+
+
+class Intent(NamedTuple):
+    category: str
+    score: float
+    confidence: float
+
+
+def _tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.casefold().replace("ё", "е"))
+
+
+def normalize_message(text: str) -> str:
+    """Текст без регистра, знаков препинания и лишних пробелов — ключ кэша."""
+    return " ".join(_tokenize(text))
+
+
+def _term(word: str, min_length: int) -> str:
+    """Основа ключевого слова; слишком короткую основу не берём («стоим» → «сто»)."""
+    stemmed = stem(word)
+    return stemmed if len(stemmed) >= min_length else word
+
+
+class IntentIndex:
+    """Инвертированный индекс «основа → категории» с весами TF-IDF.
+
+    Ключевые слова базы знаний приводятся к основам. Слово сообщения
+    совпадает с основой, если начинается с неё («прочистку» → «прочист»).
+    Ключевое слово с пробелом на конце («ил ») совпадает только с целым
+    словом той же основы, ключевые фразы («не уход») — с подряд идущими
+    словами. Вес основы — idf = 1 + ln(N / df), где df — число категорий,
+    в ключевых словах или тексте ответа которых есть эта основа; у фраз
+    вес умножается на число слов.
+
+    Порядок тегов в table задаёт приоритет при равном счёте.
+    """
+
+    def __init__(self, table: Dict[Tag, Iterable[str]], generic: Iterable[str] = (),
+                 documents: Optional[Dict[Tag, str]] = None):
+        self.tags: List[Tag] = list(table)
+        prefix_terms: Dict[str, Set[int]] = {}
+        exact_terms: Dict[str, Set[int]] = {}
+        phrases: Dict[Tuple[str, ...], Set[int]] = {}
+
+        for tag_id, keywords in enumerate(table.values()):
+            for keyword in keywords:
+                words = _tokenize(keyword)
+                if len(words) > 1:
+                    key = tuple(_term(word, MIN_PHRASE_STEM_LENGTH) for word in words)
+                    phrases.setdefault(key, set()).add(tag_id)
+                elif keyword.endswith(" "):
+                    exact_terms.setdefault(stem(words[0]), set()).add(tag_id)
+                else:
+                    prefix_terms.setdefault(_term(words[0], MIN_STEM_LENGTH), set()).add(tag_id)
+
+        categories = sum(1 for kind, _ in self.tags if kind == "category")
+        generic_terms = {_term(word, MIN_STEM_LENGTH) for word in generic}
+        documents = documents or {}
+        # Тексты ответов тоже считаются документами категории: основа, которая
+        # встречается во многих ответах («септик», «заявк»), весит меньше
+        document_words = {
+            self.tags.index(tag): set(_tokenize(text)) for tag, text in documents.items()
+        }
+
+        def postings(term, tag_ids: Set[int], size: int = 1) -> Tuple[Posting, ...]:
+            parts = term if isinstance(term, tuple) else (term,)
+            in_categories = {tag_id for tag_id in tag_ids if self.tags[tag_id][0] == "category"}
+            if in_categories:
+                in_categories.update(
+                    tag_id for tag_id, words in document_words.items()
+                    if all(any(word.startswith(part) for word in words) for part in parts)
+                )
+            df = len(in_categories)
+            weight = (1 + math.log(categories / df)) * size if df else 0.0
+            if term in generic_terms:
+                weight *= GENERIC_TERM_WEIGHT
+            return tuple((tag_id, term, weight) for tag_id in sorted(tag_ids))
+
+        self._prefix = {term: postings(term, ids) for term, ids in prefix_terms.items()}
+        self._exact = {term: postings(term, ids) for term, ids in exact_terms.items()}
+        # Фразы ищутся по первому слову: основа → [(остальные основы, постинги)]
+        self._phrases: Dict[str, List[Tuple[Tuple[str, ...], Tuple[Posting, ...]]]] = {}
+        for key, ids in phrases.items():
+            self._phrases.setdefault(key[0], []).append((key[1:], postings(key, ids, len(key))))
+
+        self._prefix_lengths = sorted({len(term) for term in self._prefix}, reverse=True)
+        self._word_hits = lru_cache(maxsize=20000)(self._hits)
+
+    def _hits(self, word: str) -> Tuple[Tuple[Posting, ...], Tuple]:
+        """Совпадения слова сообщения: постинги одиночных ключевых слов и
+        фразы, которые могут начинаться с этого слова."""
+        hits: List[Posting] = []
+        if word not in STOP_WORDS:
+            prefix = self._prefix
+            for length in self._prefix_lengths:
+                if length <= len(word):
+                    found = prefix.get(word[:length])
+                    if found:
+                        hits.extend(found)
+            found = self._exact.get(stem(word))
+            if found:
+                hits.extend(found)
+
+        phrases: List = []
+        for length in range(1, len(word) + 1):
+            phrases.extend(self._phrases.get(word[:length], ()))
+        return tuple(hits), tuple(phrases)
+
+    def score(self, text: str) -> Dict[int, float]:
+        """Счёт каждого тега, встретившегося в тексте (один проход по словам)."""
+        words = _tokenize(text)
+        # (тег, основа) -> [вес, сколько раз встретилась]: разные основы одной
+        # категории складываются, повторы одной основы — сублинейно
+        counts: Dict[Tuple[int, Any], List] = {}
+        for i, word in enumerate(words):
+            hits, phrases = self._word_hits(word)
+            for rest, phrase_hits in phrases:
+                following = words[i + 1:i + 1 + len(rest)]
+                if len(following) == len(rest) and all(
+                    next_word.startswith(part) for next_word, part in zip(following, rest)
+                ):
+                    hits += phrase_hits
+            for tag_id, term, weight in hits:
+                entry = counts.get((tag_id, term))
+                if entry is None:
+                    counts[(tag_id, term)] = [weight, 1]
+                else:
+                    entry[1] += 1
+
+        scores: Dict[int, float] = {}
+        for (tag_id, _), (weight, count) in counts.items():
+            scores[tag_id] = scores.get(tag_id, 0.0) + weight * (1 + math.log(count))
+        return scores
+
+    def rank(self, text: str, kind: str = "category", k: int = 3) -> List[Tuple[str, float, float]]:
+        """Top-k тегов вида kind: (имя, счёт, доля счёта среди всех совпавших)."""
+        tags = self.tags
+        scores = [(score, tag_id) for tag_id, score in self.score(text).items()
+                  if tags[tag_id][0] == kind]
+        total = sum(score for score, _ in scores)
+        scores.sort(key=lambda item: (-item[0], item[1]))
+        return [(tags[tag_id][1], score, score / total if total else 0.0)
+                for score, tag_id in scores[:k]]
+
+
+def _build_index() -> IntentIndex:
+    if set(CATEGORY_PRIORITY) != set(KNOWLEDGE_BASE) or len(CATEGORY_PRIORITY) != len(KNOWLEDGE_BASE):
+        raise ValueError("CATEGORY_PRIORITY must list every KNOWLEDGE_BASE category exactly once")
+    table: Dict[Tag, Iterable[str]] = {
+        ("category", category): KNOWLEDGE_BASE[category]["keywords"] for category in CATEGORY_PRIORITY
+    }
+    table.update({("cta", kind): words for kind, words in CTA_TRIGGERS.items()})
+    generic = [word for words in CTA_TRIGGERS.values() for word in words if " " not in word]
+    responses = {("category", category): data["response"] for category, data in KNOWLEDGE_BASE.items()}
+    return IntentIndex(table, generic, responses)
+
+
+_index = _build_index()
+
+
+def rank_intents(user_message: str, k: int = 3) -> List[Intent]:
+    """Top-k категорий базы знаний для сообщения с уверенностью 0..1."""
+    return [Intent(*item) for item in _index.rank(user_message, "category", k)]
+
+
+response_cache = TTLCache(AI_CACHE_SIZE, AI_CACHE_TTL)
+
+
+def _classify(message: str) -> Tuple[Optional[str], Optional[str]]:
+    """Лучшая категория и вид призыва для сообщения (None — не найдено)."""
+    scores = _index.score(message)
+    tags = _index.tags
+    best = None
+    cta_kind = None
+    for tag_id in sorted(scores):
+        kind, name = tags[tag_id]
+        if kind == "category":
+            if best is None or scores[tag_id] > scores[best]:
+                best = tag_id
+        elif cta_kind is None:
+            cta_kind = name
+    
+    if best is None:
+        return None, cta_kind
+    logger.info(f"AI matched category: {tags[best][1]} (score {scores[best]:.2f})")
+    return tags[best][1], cta_kind
+
+
+def _lookup(user_message: str) -> Tuple[Optional[str], Optional[str]]:
+    key = normalize_message(user_message)
+    classified = response_cache.get(key)
+    if classified is None:
+        classified = _classify(key)
+        response_cache.set(key, classified)
+    return classified
+
+
+def _with_cta(text: str, cta_kind: Optional[str]) -> str:
+    # Случайный призыв выбирается после кэша, чтобы повторный вопрос не получал один и тот же
+    return text + (PROBLEM_CTAS[cta_kind] if cta_kind else random.choice(FUNNEL_CTAS))
+
+
 def get_ai_response(user_message: str) -> str:
     """Получить ответ на вопрос пользователя с воронкой к заказу."""
-    message_lower = user_message.lower()
+    matched_category, cta_kind = _lookup(user_message)
     
-    matched_category = None
-    response = None
-    
-    for category, data in KNOWLEDGE_BASE.items():
-        for keyword in data["keywords"]:
-            if keyword in message_lower:
-                logger.info(f"AI matched category: {category}")
-                matched_category = category
-                response = data["response"]
-                break
-        if matched_category:
-            break
+    if not matched_category:
+        return DEFAULT_RESPONSE
     
-    if not response:
+    return _with_cta(KNOWLEDGE_BASE[matched_category]["response"], cta_kind)
+
+
+_batcher: Optional[MicroBatcher] = None
+
+
+def set_ai_backend(backend: Optional[AIBackend]):
+    """Подключить модель для вопросов вне базы знаний (None — отключить)."""
+    global _batcher
+    if _batcher is not None:
+        _batcher.close()
+    _batcher = MicroBatcher(backend) if backend is not None else None
+    if backend is not None:
+        logger.info(f"🧠 AI-модель подключена: {backend.name}")
+
+
+def build_prompt(user_message: str) -> str:
+    return (
+        f"Ты — {ASSISTANT_NAME}, помощница компании {COMPANY_INFO['name']} "
+        f"(ассенизаторские услуги, г. {COMPANY_INFO['city']}, телефон {COMPANY_INFO['phone']}, "
+        f"работаем {COMPANY_INFO['hours']}). Отвечай кратко и по-русски, не придумывай цены.\n"
+        f"Клиент: {user_message}\n"
+        f"{ASSISTANT_NAME}:"
+    )
+
+
+async def get_ai_response_async(user_message: str, budget: float = AI_LATENCY_BUDGET) -> str:
+    """Ответ по базе знаний, а если она не помогла — от модели в пределах budget секунд."""
+    matched_category, cta_kind = _lookup(user_message)
+    if matched_category:
+        return _with_cta(KNOWLEDGE_BASE[matched_category]["response"], cta_kind)
+    if _batcher is None:
         return DEFAULT_RESPONSE
     
-    if any(word in message_lower for word in ["срочн", "авари", "сейчас", "немедлен", "затоп"]):
-        cta = PROBLEM_CTAS["urgent"]
-    elif any(word in message_lower for word in ["цен", "стоим", "сколько", "дорого"]):
-        cta = PROBLEM_CTAS["price"]
-    elif any(word in message_lower for word in ["не знаю", "может", "наверн", "думаю"]):
-        cta = PROBLEM_CTAS["doubt"]
-    else:
-        cta = random.choice(FUNNEL_CTAS)
+    try:
+        answer = await asyncio.wait_for(_batcher.submit(build_prompt(user_message)), budget)
+    except asyncio.TimeoutError:
+        logger.info(f"⏳ AI-модель не ответила за {budget:.1f}s — ответ по умолчанию")
+        answer = None
     
-    return response + cta
+    if not answer:
+        return DEFAULT_RESPONSE
+    return _with_cta(html.escape(answer.strip()), cta_kind)
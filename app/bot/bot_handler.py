@@ -14,7 +14,7 @@ from telegram.ext import (
     filters
 )
 from telegram.constants import ParseMode
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Dict
 
 if TYPE_CHECKING:
     from app.models.database import Database
@@ -33,12 +33,38 @@ from .keyboards import (
     remove_keyboard,
     get_skip_comment_keyboard,
     get_cancel_order_keyboard,
-    get_confirm_order_keyboard
+    get_confirm_order_keyboard,
+    get_executor_take_keyboard,
+    get_order_action_keyboard,
+    get_settings_back_button,
+    get_settings_menu
 )
-from .ai_helper import get_ai_response
+from app.models.async_database import AsyncDatabase
+from app.utils.metrics import METRICS_ENABLED
+
+from .ai_backends import create_backend
+from .ai_helper import get_ai_response_async, set_ai_backend
+from .broadcast import BROADCAST_RATE, BroadcastEngine
+from .callback_router import CallbackRouter
+from .heartbeat import LoopHeartbeat
+from .http_server import BotHTTPServer, InternalAPIServer
+from .media import LOGO_WARMUP_CHAT_ID, CachedPhoto
+from .notifier import FAILED, Notifier
+from .outbox import OutboxDispatcher
+from .rate_limit import TelegramRateLimiter
+from .render import ADMIN_NEW_ORDER, EXECUTOR_ORDER, get_render_cache
+from .telegram_request import InstrumentedRequest
+from .update_processor import PerChatUpdateProcessor
 
 logger = logging.getLogger(__name__)
 
+# Маршруты inline-кнопок: обработчики регистрируются декоратором ниже
+callbacks = CallbackRouter()
+
+ALLOWED_UPDATES = ["message", "callback_query", "edited_message"]
+# Соединений к Bot API (как у ApplicationBuilder по умолчанию)
+TELEGRAM_CONNECTION_POOL_SIZE = 256
+
 
 class TelegramBot:
     """Telegram бот КаналТехСервис с адаптацией структуры ShveinyiHUB."""
@@ -46,26 +72,27 @@ class TelegramBot:
     def __init__(self, db: 'Database'):
         from app.config import BOT_TOKEN, ADMIN_IDS
         self.token = BOT_TOKEN
-        self.db = db
+        # Запросы к SQLite выполняются в потоках, не блокируя event loop
+        self.db = AsyncDatabase(db)
         self.admin_ids = ADMIN_IDS if ADMIN_IDS else []
         self.application = None
         self.loop = None
+        self.broadcasts = None
+        self.notifier = None
+        self.outbox = None
+        self._stopped = None
+        # Выставляется, когда бот принимает обновления
+        self.started = asyncio.Event()
+        self.heartbeat = LoopHeartbeat()
+        self.updates = None
+        # Зарегистрированные команды: только они становятся метками метрик
+        self.commands: frozenset = frozenset()
         self.logo_path = "assets/logo.jpg"
+        self.logo = CachedPhoto(self.db, self.logo_path)
         
-        # Словарь для преобразования ключей услуг в русские названия
-        self.service_names = {
-            "septic": "🚚 Откачка септика",
-            "cleaning": "🚽 Прочистка канализации",
-            "canal_wash": "💧 Каналопромывка",
-            "sludge": "🔧 Илосос",
-            "video": "🔍 Видеодиагностика",
-            "flushing": "🧹 Промывка канализации",
-            "other": "❓ Другое",
-            "plumbing": "🔧 Сантехнические работы",
-            "installation": "💧 Установка септика",
-            "diagnostics": "🔍 Видеодиагностика труб",
-            "repair": "🛠 Ремонт канализации"
-        }
+        # Тексты каталога (цены, FAQ, статусы) рендерятся один раз при запуске
+        self.render = get_render_cache()
+        self.service_names = self.render.service_names
 
     async def cmd_start(self, update: Update, context):
         """Команда /start с логотипом и меню ShveinyiHUB структуры."""
@@ -73,7 +100,7 @@ class TelegramBot:
         user_id = user.id
 
         # Регистрируем пользователя
-        self.db.add_user(
+        await self.db.add_user(
             user_id=user_id,
             username=user.username,
             first_name=user.first_name,
@@ -102,14 +129,14 @@ class TelegramBot:
 
         # Отправляем логотип если существует
         try:
-            if os.path.exists(self.logo_path):
-                with open(self.logo_path, 'rb') as photo:
-                    await update.message.reply_photo(
-                        photo=photo,
-                        caption=welcome_text,
-                        parse_mode=ParseMode.HTML,
-                        reply_markup=reply_markup
-                    )
+            if self.logo.exists():
+                # После первой загрузки логотип уходит по file_id, без чтения файла
+                await self.logo.send(
+                    update.message.reply_photo,
+                    caption=welcome_text,
+                    parse_mode=ParseMode.HTML,
+                    reply_markup=reply_markup
+                )
             else:
                 await update.message.reply_text(
                     welcome_text,
@@ -141,43 +168,6 @@ class TelegramBot:
             reply_markup=get_main_menu()
         )
 
-    def get_order_action_keyboard(self, order_id: int, status: str):
-        """Клавиатура действий с заявкой."""
-        from telegram import InlineKeyboardButton, InlineKeyboardMarkup
-        
-        buttons = []
-        if status == 'new':
-            buttons.append([
-                InlineKeyboardButton("🔄 В работу", callback_data=f"set_status_{order_id}_in_progress"),
-                InlineKeyboardButton("❌ Отменить", callback_data=f"set_status_{order_id}_cancelled")
-            ])
-            buttons.append([
-                InlineKeyboardButton("📤 Переслать исполнителю", callback_data=f"forward_order_{order_id}")
-            ])
-        elif status == 'in_progress':
-            buttons.append([
-                InlineKeyboardButton("✅ Выполнено", callback_data=f"set_status_{order_id}_completed"),
-                InlineKeyboardButton("❌ Отменить", callback_data=f"set_status_{order_id}_cancelled")
-            ])
-        elif status == 'completed':
-            buttons.append([
-                InlineKeyboardButton("🔄 Вернуть в работу", callback_data=f"set_status_{order_id}_in_progress")
-            ])
-        elif status == 'cancelled':
-            buttons.append([
-                InlineKeyboardButton("🔄 Восстановить", callback_data=f"set_status_{order_id}_new")
-            ])
-        
-        buttons.append([
-            InlineKeyboardButton("📞 Позвонить клиенту", callback_data=f"call_client_{order_id}"),
-            InlineKeyboardButton("📜 История", callback_data=f"client_history_{order_id}")
-        ])
-        buttons.append([
-            InlineKeyboardButton("🗑 Удалить", callback_data=f"delete_order_{order_id}")
-        ])
-        
-        return InlineKeyboardMarkup(buttons)
-
     async def handle_admin_text_buttons(self, update: Update, context):
         """Обработка текстовых кнопок админ-меню."""
         text = update.message.text
@@ -196,35 +186,23 @@ class TelegramBot:
         
         if text in status_map:
             status = status_map[text]
-            orders = self.db.get_all_orders() if status == "all" else self.db.get_orders_by_status(status)
+            orders = await (self.db.get_all_orders() if status == "all" else self.db.get_orders_by_status(status))
             
             if orders:
                 await update.message.reply_text(f"📋 <b>{text}:</b>", parse_mode=ParseMode.HTML)
                 for order in orders[:10]:
                     order_id = order.get('order_id', '?')
-                    service_key = order.get('service_type', 'Не указана')
-                    service_name = self.service_names.get(service_key, service_key)
-                    address = order.get('address', 'Не указан')
-                    phone = order.get('phone', 'Не указан')
-                    comment = order.get('comment', '')
                     order_status = order.get('status', 'new')
-                    status_emoji = {'new': '🆕', 'in_progress': '🔄', 'completed': '✅', 'cancelled': '❌'}.get(order_status, '❓')
-                    
-                    order_text = (
-                        f"{status_emoji} <b>Заявка #{order_id}</b>\n\n"
-                        f"📋 Услуга: {service_name}\n"
-                        f"📍 Адрес: {address}\n"
-                        f"📞 Телефон: {phone}\n"
-                        f"💬 Комментарий: {comment if comment else '—'}"
-                    )
+                    status_emoji = self.render.status_emoji.get(order_status, '❓')
+                    order_text = self.render.order_card(order, status_emoji)
                     
-                    keyboard = self.get_order_action_keyboard(order_id, order_status)
+                    keyboard = get_order_action_keyboard(order_id, order_status)
                     await update.message.reply_text(order_text, parse_mode=ParseMode.HTML, reply_markup=keyboard)
             else:
                 await update.message.reply_text(f"📋 <b>{text}:</b>\n\n<i>Заявок нет</i>", parse_mode=ParseMode.HTML)
         
         elif text == "📈 Статистика":
-            stats = self.db.get_stats()
+            stats = await self.db.get_stats()
             response = (
                 f"📊 <b>Статистика:</b>\n\n"
                 f"🆕 Новых: {stats.get('new', 0)}\n"
@@ -236,7 +214,7 @@ class TelegramBot:
             await update.message.reply_text(response, parse_mode=ParseMode.HTML)
         
         elif text == "👥 Пользователи":
-            users_count = self.db.get_users_count()
+            users_count = await self.db.get_users_count()
             await update.message.reply_text(
                 f"👥 <b>Пользователи:</b>\n\nВсего: {users_count}",
                 parse_mode=ParseMode.HTML
@@ -252,15 +230,10 @@ class TelegramBot:
             )
         
         elif text == "⚙️ Настройки":
-            from telegram import InlineKeyboardButton, InlineKeyboardMarkup
-            keyboard = InlineKeyboardMarkup([
-                [InlineKeyboardButton("👷 Исполнители", callback_data="settings_executors")],
-                [InlineKeyboardButton("💰 Редактировать цены", callback_data="settings_prices")],
-            ])
             await update.message.reply_text(
                 "⚙️ <b>Настройки бота:</b>",
                 parse_mode=ParseMode.HTML,
-                reply_markup=keyboard
+                reply_markup=get_settings_menu()
             )
         
         elif text == "◀️ Выйти":
@@ -276,7 +249,7 @@ class TelegramBot:
         user_id = update.effective_user.id
         step = context.user_data.get('step')
         
-        logger.info(f"Text input from {user_id}: '{text}', step: {step}")
+        logger.debug(f"Text input from {user_id}: '{text}', step: {step}")
         
         # Обработка рассылки
         if step == 'enter_broadcast':
@@ -285,28 +258,11 @@ class TelegramBot:
                 await update.message.reply_text("❌ Рассылка отменена", parse_mode=ParseMode.HTML)
                 return
             
-            users = self.db.get_all_users()
-            sent = 0
-            failed = 0
-            
-            await update.message.reply_text(f"📤 Начинаю рассылку {len(users)} пользователям...", parse_mode=ParseMode.HTML)
-            
-            for user in users:
-                try:
-                    await self.application.bot.send_message(
-                        chat_id=user['user_id'],
-                        text=f"📢 <b>Уведомление от КаналТехСервис:</b>\n\n{text}",
-                        parse_mode=ParseMode.HTML
-                    )
-                    sent += 1
-                except Exception:
-                    failed += 1
-            
+            broadcast_id = await self.broadcasts.start(text, update.effective_chat.id)
             context.user_data.clear()
             await update.message.reply_text(
-                f"✅ Рассылка завершена!\n\n"
-                f"📨 Отправлено: {sent}\n"
-                f"❌ Ошибок: {failed}",
+                f"📤 Рассылка #{broadcast_id} запущена в фоне.\n"
+                f"Прогресс будет обновляться в отдельном сообщении.",
                 parse_mode=ParseMode.HTML
             )
             return
@@ -316,31 +272,23 @@ class TelegramBot:
             try:
                 executor_id = int(text)
                 order_id = context.user_data.get('forward_order_id')
-                order = self.db.get_order_by_id(order_id)
+                order = await self.db.get_order_by_id(order_id)
                 
                 if order:
                     service_key = order.get('service_type', 'Не указана')
-                    service_name = self.service_names.get(service_key, service_key)
-                    
-                    order_text = (
-                        f"📋 <b>Новая заявка #{order_id}</b>\n\n"
-                        f"🔧 Услуга: {service_name}\n"
-                        f"📍 Адрес: {order.get('address', 'Не указан')}\n"
-                        f"📞 Телефон: {order.get('phone', 'Не указан')}\n"
-                        f"💬 Комментарий: {order.get('comment', '') or '—'}\n\n"
-                        f"Нажмите кнопку, когда возьмёте в работу:"
+                    order_text = EXECUTOR_ORDER(
+                        order_id=order_id,
+                        service=self.render.service_name(service_key),
+                        address=order.get('address', 'Не указан'),
+                        phone=order.get('phone', 'Не указан'),
+                        comment=order.get('comment', '') or '—'
                     )
                     
-                    from telegram import InlineKeyboardButton, InlineKeyboardMarkup
-                    keyboard = InlineKeyboardMarkup([
-                        [InlineKeyboardButton("🔄 Взять в работу", callback_data=f"executor_take_{order_id}")]
-                    ])
-                    
                     await self.application.bot.send_message(
                         chat_id=executor_id,
                         text=order_text,
                         parse_mode=ParseMode.HTML,
-                        reply_markup=keyboard
+                        reply_markup=get_executor_take_keyboard(order_id)
                     )
                     
                     await update.message.reply_text(
@@ -381,7 +329,7 @@ class TelegramBot:
             await self.show_order_confirmation(update.message, context)
         
         elif step == 'ai_chat':
-            response = get_ai_response(text)
+            response = await get_ai_response_async(text)
             await update.message.reply_text(
                 response,
                 parse_mode=ParseMode.HTML,
@@ -395,276 +343,271 @@ class TelegramBot:
             )
 
     async def handle_callback_query(self, update: Update, context):
-        """Обработка всех callback запросов."""
+        """Обработка всех callback запросов (маршрутизация через callbacks)."""
         query = update.callback_query
         data = query.data
         user_id = update.effective_user.id
         
-        logger.info(f"Callback received: {data} from user {user_id}")
+        logger.debug(f"Callback received: {data} from user {user_id}")
         
         try:
             await query.answer()
-            # Главное меню
-            if data == "back_menu":
-                await query.edit_message_text(
-                    "<b>🔽 Главное меню КаналТехСервис:</b>",
-                    parse_mode=ParseMode.HTML,
-                    reply_markup=get_main_menu()
-                )
+            if not await callbacks.dispatch(self, query, context):
+                logger.warning(f"Неизвестный callback: {data}")
 
-            # Услуги и цены
-            elif data == "services":
-                await query.edit_message_text(
-                    "📋 <b>Выберите категорию услуг:</b>",
-                    parse_mode=ParseMode.HTML,
-                    reply_markup=get_prices_menu()
-                )
+        except Exception as e:
+            logger.error(f"Ошибка обработки callback {data}: {e}", exc_info=True)
+            try:
+                await query.answer("Произошла ошибка", show_alert=True)
+            except:
+                pass
 
-            # Создать заявку
-            elif data == "new_order":
-                context.user_data['step'] = 'select_service'
-                await query.message.reply_text(
-                    "<b>Выберите нужную услугу:</b>",
-                    parse_mode=ParseMode.HTML,
-                    reply_markup=get_services_menu()
-                )
+    # Главное меню
+    @callbacks.route("back_menu")
+    async def on_back_menu(self, query, context):
+        await query.edit_message_text(
+            "<b>🔽 Главное меню КаналТехСервис:</b>",
+            parse_mode=ParseMode.HTML,
+            reply_markup=get_main_menu()
+        )
 
-            # Проверка статуса
-            elif data == "check_status":
-                orders = self.db.get_user_orders(user_id)
-                if orders:
-                    text = "<b>📊 Ваши заявки:</b>\n\n"
-                    for i, order in enumerate(orders[:5], 1):
-                        status_emoji = {
-                            'new': '🆕',
-                            'in_progress': '🔄',
-                            'completed': '✅',
-                            'cancelled': '❌'
-                        }.get(order.get('status', 'new'), '❓')
-                        text += f"{status_emoji} Заявка #{i:04d} - {order.get('status', 'неизвестно')}\n"
-                    await query.edit_message_text(
-                        text,
-                        parse_mode=ParseMode.HTML,
-                        reply_markup=get_back_button()
-                    )
-                else:
-                    await query.edit_message_text(
-                        "❌ У вас пока нет заявок.",
-                        reply_markup=get_back_button()
-                    )
+    # Услуги и цены
+    @callbacks.route("services")
+    async def on_services(self, query, context):
+        await query.edit_message_text(
+            "📋 <b>Выберите категорию услуг:</b>",
+            parse_mode=ParseMode.HTML,
+            reply_markup=get_prices_menu()
+        )
 
-            # FAQ
-            elif data == "faq":
-                await query.edit_message_text(
-                    "❓ <b>Часто задаваемые вопросы:</b>",
-                    parse_mode=ParseMode.HTML,
-                    reply_markup=get_faq_menu()
-                )
+    # Создать заявку
+    @callbacks.route("new_order")
+    async def on_new_order(self, query, context):
+        context.user_data['step'] = 'select_service'
+        await query.message.reply_text(
+            "<b>Выберите нужную услугу:</b>",
+            parse_mode=ParseMode.HTML,
+            reply_markup=get_services_menu()
+        )
 
-            # Контакты
-            elif data == "contacts" or data == "show_phone":
-                contacts_text = (
-                    "📍 <b>КаналТехСервис</b>\n\n"
-                    "📞 Телефон: <b>+7 (904) 363-36-36</b>\n"
-                    "📧 Email: info@kanalteh.ru\n\n"
-                    "⏰ Режим работы: <b>24/7</b>\n"
-                    "🏠 г. Ярцево, Смоленская область\n\n"
-                    "☎️ Звоните прямо сейчас — мы на связи!"
-                )
-                await query.message.reply_text(
-                    contacts_text,
-                    parse_mode=ParseMode.HTML,
-                    reply_markup=get_ai_chat_keyboard()
-                )
+    # Проверка статуса
+    @callbacks.route("check_status")
+    async def on_check_status(self, query, context):
+        orders = await self.db.get_user_orders(query.from_user.id)
+        if orders:
+            text = "<b>📊 Ваши заявки:</b>\n\n"
+            for i, order in enumerate(orders[:5], 1):
+                status_emoji = self.render.status_emoji.get(order.get('status', 'new'), '❓')
+                text += f"{status_emoji} Заявка #{i:04d} - {order.get('status', 'неизвестно')}\n"
+            await query.edit_message_text(
+                text,
+                parse_mode=ParseMode.HTML,
+                reply_markup=get_back_button()
+            )
+        else:
+            await query.edit_message_text(
+                "❌ У вас пока нет заявок.",
+                reply_markup=get_back_button()
+            )
 
-            # Обработка услуг для заказа
-            elif data.startswith("service_"):
-                service = data.replace("service_", "")
-                service_names = self.service_names
-                
-                if service == "other":
-                    context.user_data['step'] = 'ai_chat'
-                    await query.message.reply_text(
-                        "👋 Привет! Я <b>Аква 💧</b>.\n\n"
-                        "Расскажите о вашей задаче — помогу разобраться и организую решение! 😊\n\n"
-                        "💡 Отвечу на любые вопросы об услугах, ценах и сроках.",
-                        parse_mode=ParseMode.HTML,
-                        reply_markup=get_back_button()
-                    )
-                else:
-                    context.user_data['service_type'] = service
-                    context.user_data['service_name'] = service_names.get(service, service)
-                    
-                    await query.message.reply_text(
-                        f"👍 Отлично! Вы выбрали: <b>{service_names.get(service, service)}</b>\n\n"
-                        f"📍 Напишите адрес, куда приехать мастеру:",
-                        parse_mode=ParseMode.HTML,
-                        reply_markup=get_cancel_order_keyboard()
-                    )
-                    context.user_data['step'] = 'enter_address'
+    # FAQ
+    @callbacks.route("faq")
+    async def on_faq(self, query, context):
+        await query.edit_message_text(
+            "❓ <b>Часто задаваемые вопросы:</b>",
+            parse_mode=ParseMode.HTML,
+            reply_markup=get_faq_menu()
+        )
 
-            # Пропустить комментарий
-            elif data == "skip_comment":
-                context.user_data['comment'] = ''
-                await self.show_order_confirmation(query.message, context)
+    # Контакты
+    @callbacks.route("contacts")
+    @callbacks.route("show_phone")
+    async def on_contacts(self, query, context):
+        contacts_text = (
+            "📍 <b>КаналТехСервис</b>\n\n"
+            "📞 Телефон: <b>+7 (904) 363-36-36</b>\n"
+            "📧 Email: info@kanalteh.ru\n\n"
+            "⏰ Режим работы: <b>24/7</b>\n"
+            "🏠 г. Ярцево, Смоленская область\n\n"
+            "☎️ Звоните прямо сейчас — мы на связи!"
+        )
+        await query.message.reply_text(
+            contacts_text,
+            parse_mode=ParseMode.HTML,
+            reply_markup=get_ai_chat_keyboard()
+        )
 
-            # Отменить заявку
-            elif data == "cancel_order":
-                context.user_data.clear()
-                await query.message.reply_text(
-                    "❌ Заявка отменена.\n\nЕсли передумаете — я всегда на связи! 😊",
-                    parse_mode=ParseMode.HTML,
-                    reply_markup=get_main_menu()
-                )
+    # Обработка услуг для заказа
+    @callbacks.route("service", str)
+    async def on_service(self, query, context, service):
+        service_names = self.service_names
+        
+        if service == "other":
+            context.user_data['step'] = 'ai_chat'
+            await query.message.reply_text(
+                "👋 Привет! Я <b>Аква 💧</b>.\n\n"
+                "Расскажите о вашей задаче — помогу разобраться и организую решение! 😊\n\n"
+                "💡 Отвечу на любые вопросы об услугах, ценах и сроках.",
+                parse_mode=ParseMode.HTML,
+                reply_markup=get_back_button()
+            )
+        else:
+            context.user_data['service_type'] = service
+            context.user_data['service_name'] = service_names.get(service, service)
+            
+            await query.message.reply_text(
+                f"👍 Отлично! Вы выбрали: <b>{service_names.get(service, service)}</b>\n\n"
+                f"📍 Напишите адрес, куда приехать мастеру:",
+                parse_mode=ParseMode.HTML,
+                reply_markup=get_cancel_order_keyboard()
+            )
+            context.user_data['step'] = 'enter_address'
 
-            # Подтвердить заявку
-            elif data == "confirm_order":
-                await self.finalize_order(query, context)
+    # Пропустить комментарий
+    @callbacks.route("skip_comment")
+    async def on_skip_comment(self, query, context):
+        context.user_data['comment'] = ''
+        await self.show_order_confirmation(query.message, context)
 
-            # Изменить данные
-            elif data == "edit_order":
-                context.user_data['step'] = 'select_service'
-                await query.message.reply_text(
-                    "✏️ Давайте начнём заново!\n\n<b>Выберите нужную услугу:</b>",
-                    parse_mode=ParseMode.HTML,
-                    reply_markup=get_services_menu()
-                )
+    # Отменить заявку
+    @callbacks.route("cancel_order")
+    async def on_cancel_order(self, query, context):
+        context.user_data.clear()
+        await query.message.reply_text(
+            "❌ Заявка отменена.\n\nЕсли передумаете — я всегда на связи! 😊",
+            parse_mode=ParseMode.HTML,
+            reply_markup=get_main_menu()
+        )
 
-            # Показ цен по категориям
-            elif data.startswith("price_"):
-                await self.show_prices(query, data)
+    # Подтвердить заявку
+    @callbacks.route("confirm_order")
+    async def on_confirm_order(self, query, context):
+        await self.finalize_order(query, context)
 
-            # FAQ ответы
-            elif data.startswith("faq_"):
-                await self.show_faq_answer(query, data)
+    # Изменить данные
+    @callbacks.route("edit_order")
+    async def on_edit_order(self, query, context):
+        context.user_data['step'] = 'select_service'
+        await query.message.reply_text(
+            "✏️ Давайте начнём заново!\n\n<b>Выберите нужную услугу:</b>",
+            parse_mode=ParseMode.HTML,
+            reply_markup=get_services_menu()
+        )
 
-            # Смена статуса заявки
-            elif data.startswith("set_status_"):
-                await self.handle_set_status(query, data)
-            
-            # Переслать исполнителю
-            elif data.startswith("forward_order_"):
-                order_id = int(data.replace("forward_order_", ""))
-                context.user_data['forward_order_id'] = order_id
-                context.user_data['step'] = 'enter_executor_id'
-                await query.message.reply_text(
-                    "📤 <b>Пересылка заявки исполнителю</b>\n\n"
-                    "Введите Telegram ID исполнителя или перешлите сообщение от него:",
-                    parse_mode=ParseMode.HTML
-                )
-            
-            # Показать телефон клиента
-            elif data.startswith("call_client_"):
-                order_id = int(data.replace("call_client_", ""))
-                order = self.db.get_order_by_id(order_id)
-                if order:
-                    phone = order.get('phone', 'Не указан')
-                    await query.answer(f"📞 Телефон: {phone}", show_alert=True)
-                else:
-                    await query.answer("❌ Заявка не найдена", show_alert=True)
-            
-            # Исполнитель берёт заявку
-            elif data.startswith("executor_take_"):
-                order_id = int(data.replace("executor_take_", ""))
-                self.db.update_order_status(order_id, 'in_progress')
-                await query.edit_message_text(
-                    f"✅ <b>Заявка #{order_id} взята в работу!</b>\n\n"
-                    f"Когда выполните — сообщите администратору.",
-                    parse_mode=ParseMode.HTML
-                )
-                
-                for admin_id in self.admin_ids:
-                    try:
-                        await self.application.bot.send_message(
-                            chat_id=admin_id,
-                            text=f"🔄 Заявка #{order_id} взята исполнителем в работу",
-                            parse_mode=ParseMode.HTML
-                        )
-                    except:
-                        pass
-
-            # Удаление заявки
-            elif data.startswith("delete_order_"):
-                order_id = int(data.replace("delete_order_", ""))
-                self.db.delete_order(order_id)
-                await query.edit_message_text(
-                    f"🗑 <b>Заявка #{order_id} удалена</b>",
-                    parse_mode=ParseMode.HTML
-                )
-                await query.answer("Заявка удалена")
-            
-            # Настройки
-            elif data == "settings_executors":
-                from telegram import InlineKeyboardButton, InlineKeyboardMarkup
-                keyboard = InlineKeyboardMarkup([
-                    [InlineKeyboardButton("◀️ Назад", callback_data="settings_back")]
-                ])
-                await query.edit_message_text(
-                    "👷 <b>Исполнители</b>\n\n"
-                    "Для добавления исполнителя:\n"
-                    "1. Пусть он напишет боту /start\n"
-                    "2. При пересылке заявки введите его Telegram ID\n\n"
-                    "Узнать ID исполнителя можно через @userinfobot",
-                    parse_mode=ParseMode.HTML,
-                    reply_markup=keyboard
-                )
-            
-            elif data == "settings_prices":
-                from telegram import InlineKeyboardButton, InlineKeyboardMarkup
-                keyboard = InlineKeyboardMarkup([
-                    [InlineKeyboardButton("◀️ Назад", callback_data="settings_back")]
-                ])
-                await query.edit_message_text(
-                    "💰 <b>Редактирование цен</b>\n\n"
-                    "Цены настраиваются в файле app/config/__init__.py\n"
-                    "Свяжитесь с разработчиком для изменения.",
-                    parse_mode=ParseMode.HTML,
-                    reply_markup=keyboard
-                )
-            
-            elif data == "settings_back":
-                from telegram import InlineKeyboardButton, InlineKeyboardMarkup
-                keyboard = InlineKeyboardMarkup([
-                    [InlineKeyboardButton("👷 Исполнители", callback_data="settings_executors")],
-                    [InlineKeyboardButton("💰 Редактировать цены", callback_data="settings_prices")],
-                ])
-                await query.edit_message_text(
-                    "⚙️ <b>Настройки бота:</b>",
-                    parse_mode=ParseMode.HTML,
-                    reply_markup=keyboard
-                )
-            
-            # Просмотр истории клиента
-            elif data.startswith("client_history_"):
-                order_id = int(data.replace("client_history_", ""))
-                order = self.db.get_order_by_id(order_id)
-                if order:
-                    client_id = order.get('user_id')
-                    orders = self.db.get_user_orders(client_id)
-                    if orders:
-                        text = f"📋 <b>История заявок клиента:</b>\n\n"
-                        for o in orders[:5]:
-                            status_emoji = {'new': '🆕', 'in_progress': '🔄', 'completed': '✅', 'cancelled': '❌'}.get(o.get('status', ''), '❓')
-                            service_key = o.get('service_type', '?')
-                            service_name = self.service_names.get(service_key, service_key)
-                            text += f"{status_emoji} #{o.get('order_id')} - {service_name}\n"
-                        await query.answer()
-                        await query.message.reply_text(text, parse_mode=ParseMode.HTML)
-                    else:
-                        await query.answer("У клиента нет других заявок", show_alert=True)
-                else:
-                    await query.answer("Заявка не найдена", show_alert=True)
-
-            # Админ callbacks
-            elif data.startswith("admin_") or data.startswith("status_"):
-                await self.handle_admin_callbacks(query, context, data)
+    # Переслать исполнителю
+    @callbacks.route("forward_order", int)
+    async def on_forward_order(self, query, context, order_id):
+        context.user_data['forward_order_id'] = order_id
+        context.user_data['step'] = 'enter_executor_id'
+        await query.message.reply_text(
+            "📤 <b>Пересылка заявки исполнителю</b>\n\n"
+            "Введите Telegram ID исполнителя или перешлите сообщение от него:",
+            parse_mode=ParseMode.HTML
+        )
 
-        except Exception as e:
-            logger.error(f"Ошибка обработки callback {data}: {e}", exc_info=True)
-            try:
-                await query.answer("Произошла ошибка", show_alert=True)
-            except:
-                pass
+    # Показать телефон клиента
+    @callbacks.route("call_client", int)
+    async def on_call_client(self, query, context, order_id):
+        order = await self.db.get_order_by_id(order_id)
+        if order:
+            phone = order.get('phone', 'Не указан')
+            await query.answer(f"📞 Телефон: {phone}", show_alert=True)
+        else:
+            await query.answer("❌ Заявка не найдена", show_alert=True)
+
+    # Исполнитель берёт заявку
+    @callbacks.route("executor_take", int)
+    async def on_executor_take(self, query, context, order_id):
+        await self.db.update_order_status(order_id, 'in_progress')
+        await query.edit_message_text(
+            f"✅ <b>Заявка #{order_id} взята в работу!</b>\n\n"
+            f"Когда выполните — сообщите администратору.",
+            parse_mode=ParseMode.HTML
+        )
+        
+        self.notifier.submit(
+            self.admin_ids,
+            f"🔄 Заявка #{order_id} взята исполнителем в работу",
+            parse_mode=ParseMode.HTML
+        )
+
+    # Удаление заявки
+    @callbacks.route("delete_order", int)
+    async def on_delete_order(self, query, context, order_id):
+        await self.db.delete_order(order_id)
+        await query.edit_message_text(
+            f"🗑 <b>Заявка #{order_id} удалена</b>",
+            parse_mode=ParseMode.HTML
+        )
+        await query.answer("Заявка удалена")
+
+    # Настройки
+    @callbacks.route("settings_executors")
+    async def on_settings_executors(self, query, context):
+        await query.edit_message_text(
+            "👷 <b>Исполнители</b>\n\n"
+            "Для добавления исполнителя:\n"
+            "1. Пусть он напишет боту /start\n"
+            "2. При пересылке заявки введите его Telegram ID\n\n"
+            "Узнать ID исполнителя можно через @userinfobot",
+            parse_mode=ParseMode.HTML,
+            reply_markup=get_settings_back_button()
+        )
+
+    @callbacks.route("settings_prices")
+    async def on_settings_prices(self, query, context):
+        await query.edit_message_text(
+            "💰 <b>Редактирование цен</b>\n\n"
+            "Цены настраиваются в файле app/config/__init__.py\n"
+            "Свяжитесь с разработчиком для изменения.",
+            parse_mode=ParseMode.HTML,
+            reply_markup=get_settings_back_button()
+        )
+
+    @callbacks.route("settings_back")
+    async def on_settings_back(self, query, context):
+        await query.edit_message_text(
+            "⚙️ <b>Настройки бота:</b>",
+            parse_mode=ParseMode.HTML,
+            reply_markup=get_settings_menu()
+        )
+
+    # Просмотр истории клиента
+    @callbacks.route("client_history", int)
+    async def on_client_history(self, query, context, order_id):
+        order = await self.db.get_order_by_id(order_id)
+        if order:
+            client_id = order.get('user_id')
+            orders = await self.db.get_user_orders(client_id)
+            if orders:
+                text = f"📋 <b>История заявок клиента:</b>\n\n"
+                for o in orders[:5]:
+                    status_emoji = self.render.status_emoji.get(o.get('status', ''), '❓')
+                    service_name = self.render.service_name(o.get('service_type', '?'))
+                    text += f"{status_emoji} #{o.get('order_id')} - {service_name}\n"
+                await query.answer()
+                await query.message.reply_text(text, parse_mode=ParseMode.HTML)
+            else:
+                await query.answer("У клиента нет других заявок", show_alert=True)
+        else:
+            await query.answer("Заявка не найдена", show_alert=True)
+
+    # Остановка рассылки
+    @callbacks.route("broadcast_cancel", int)
+    async def on_broadcast_cancel(self, query, context, broadcast_id):
+        if query.from_user.id not in self.admin_ids:
+            await query.answer("❌ Доступ запрещен", show_alert=True)
+            return
+        if self.broadcasts and self.broadcasts.cancel(broadcast_id):
+            await query.answer("⏹ Останавливаю рассылку...")
+        else:
+            await query.answer("Рассылка уже завершена", show_alert=True)
+
+    # Админ callbacks
+    @callbacks.route("admin", str)
+    @callbacks.route("status", str)
+    async def on_admin_callback(self, query, context, action):
+        await self.handle_admin_callbacks(query, context, query.data)
 
     async def show_order_confirmation(self, message, context):
         """Показать подтверждение заявки перед отправкой."""
@@ -698,7 +641,7 @@ class TelegramBot:
         phone = context.user_data.get('phone', 'Не указан')
         comment = context.user_data.get('comment', '')
         
-        order_id = self.db.create_order(
+        order_id = await self.db.create_order(
             user_id=user_id,
             service_type=context.user_data.get('service_type', 'other'),
             address=address,
@@ -721,214 +664,48 @@ class TelegramBot:
             reply_markup=get_main_menu()
         )
         
-        await self.notify_admins_new_order(order_id, service_name, address, phone, comment)
+        # Доставка админам идёт в фоне — клиент не ждёт медленные чаты
+        self.notify_admins_new_order(order_id, service_name, address, phone, comment)
 
-    async def show_prices(self, query, category_data):
+    @callbacks.route("price", str)
+    async def show_prices(self, query, context, category):
         """Показать цены по категориям услуг."""
-        category = category_data.replace("price_", "")
-        
-        prices_data = {
-            "septic": (
-                "🚚 <b>Откачка септика:</b>\n\n"
-                "💰 Стоимость:\n"
-                "• До 5м³ - 2 500₽\n"
-                "• До 10м³ - 4 500₽\n"
-                "• Свыше 10м³ - от 6 000₽\n\n"
-                "⏰ Срок: 1-2 часа после вызова\n"
-                "✅ Гарантия: 6 месяцев"
-            ),
-            "cleaning": (
-                "🚽 <b>Прочистка канализации:</b>\n\n"
-                "💰 Стоимость:\n"
-                "• Механическая - от 1 500₽\n"
-                "• Гидродинамическая - от 3 000₽\n"
-                "• Устранение засора - от 1 000₽\n\n"
-                "⏰ Срок: в день вызова\n"
-                "✅ Гарантия: результат"
-            ),
-            "plumbing": (
-                "🔧 <b>Сантехнические работы:</b>\n\n"
-                "💰 Стоимость:\n"
-                "• Вызов мастера - 500₽\n"
-                "• Замена смесителя - от 800₽\n"
-                "• Установка унитаза - от 1 500₽\n"
-                "• Замена труб - от 2 000₽\n\n"
-                "⏰ Срок: 2-4 часа\n"
-                "✅ Гарантия: 6 месяцев"
-            ),
-            "installation": (
-                "💧 <b>Установка септика:</b>\n\n"
-                "💰 Стоимость:\n"
-                "• Консультация - бесплатно\n"
-                "• Установка под ключ - от 45 000₽\n"
-                "• Монтаж дренажа - от 15 000₽\n\n"
-                "⏰ Срок: 2-3 дня\n"
-                "✅ Гарантия: 1 год"
-            ),
-            "diagnostics": (
-                "🔍 <b>Видеодиагностика труб:</b>\n\n"
-                "💰 Стоимость:\n"
-                "• Видеоинспекция - от 3 000₽\n"
-                "• Составление акта - 500₽\n"
-                "• Выезд специалиста - 1 000₽\n\n"
-                "⏰ Срок: до 4 часов\n"
-                "✅ Результат: готовый отчет"
-            ),
-            "repair": (
-                "🛠 <b>Ремонт канализации:</b>\n\n"
-                "💰 Стоимость:\n"
-                "• Замена участка трубы - от 2 000₽\n"
-                "• Герметизация стыков - от 800₽\n"
-                "• Ремонт колодца - от 5 000₽\n\n"
-                "⏰ Срок: 3-5 часов\n"
-                "✅ Гарантия: 6 месяцев"
-            )
-        }
-
-        text = prices_data.get(category, "ℹ️ Информация временно недоступна")
-        text += "\n\n💡 <i>Точную стоимость уточняйте при заказе</i>"
-
         await query.edit_message_text(
-            text,
+            self.render.price(category),
             parse_mode=ParseMode.HTML,
             reply_markup=get_back_button()
         )
 
-    async def show_faq_answer(self, query, faq_data):
+    @callbacks.route("faq", str)
+    async def show_faq_answer(self, query, context, faq_type):
         """Показать ответ на FAQ вопрос."""
-        faq_type = faq_data.replace("faq_", "")
-        
-        faq_answers = {
-            "services": (
-                "📋 <b>Какие услуги мы предоставляем?</b>\n\n"
-                "✓ Откачка септиков и выгребных ям\n"
-                "✓ Прочистка канализации (все методы)\n"
-                "✓ Сантехнические работы\n"
-                "✓ Установка и замена септиков\n"
-                "✓ Видеодиагностика труб\n"
-                "✓ Ремонт канализации\n"
-                "✓ Промывка систем\n\n"
-                "💼 Профессиональная бригада с опытом 15+ лет"
-            ),
-            "prices": (
-                "💰 <b>Цены на услуги:</b>\n\n"
-                "Откачка септика - от 2 500₽\n"
-                "Прочистка канализации - от 1 500₽\n"
-                "Вызов сантехника - от 500₽\n"
-                "Установка септика - от 45 000₽\n"
-                "Видеодиагностика - от 3 000₽\n\n"
-                "📝 <i>Скидки на постоянных клиентов до 15%</i>"
-            ),
-            "timing": (
-                "⏰ <b>Сроки выполнения:</b>\n\n"
-                "🚨 Экстренный выезд - 1-2 часа\n"
-                "📅 Плановые работы - в день вызова\n"
-                "🏗 Установка септика - 2-3 дня\n"
-                "📋 Диагностика - до 4 часов\n\n"
-                "24/7 готовы помочь в любой момент!"
-            ),
-            "location": (
-                "📍 <b>Адрес и график:</b>\n\n"
-                "Режим работы: 24/7 (без выходных)\n"
-                "Город: Ярцево, Смоленская область\n\n"
-                "📞 Телефон: +7 (904) 363-36-36\n"
-                "📧 Email: info@kanalteh.ru\n\n"
-                "🚗 Выезжаем во все районы города и области"
-            ),
-            "payment": (
-                "💳 <b>Оплата и гарантия:</b>\n\n"
-                "Принимаем:\n"
-                "✓ Наличные\n"
-                "✓ Карты (все системы)\n"
-                "✓ Безналичный расчет\n"
-                "✓ Сбербанк\n\n"
-                "✅ Гарантия на работы: 6 месяцев\n"
-                "📜 Работаем по договору"
-            ),
-            "order": (
-                "📝 <b>Как оформить заявку?</b>\n\n"
-                "1️⃣ Нажмите кнопку 'Создать заявку'\n"
-                "2️⃣ Выберите нужную услугу\n"
-                "3️⃣ Укажите адрес выполнения работ\n"
-                "4️⃣ Оставьте номер телефона\n"
-                "5️⃣ Подтвердите заявку\n\n"
-                "☎️ Мы свяжемся с вами в течение 30 минут!"
-            ),
-            "zones": (
-                "🚗 <b>Зоны обслуживания:</b>\n\n"
-                "✓ г. Ярцево\n"
-                "✓ Ярцевский район\n"
-                "✓ Дачные поселки\n"
-                "✓ п. Солнечный\n"
-                "✓ Окрестные деревни\n\n"
-                "🌍 Выезд за город - по договоренности\n"
-                "💚 Кольцевая дорога - без доплаты"
-            ),
-            "other": (
-                "❓ <b>Не нашли ответ?</b>\n\n"
-                "☎️ Позвоните нам:\n"
-                "+7 (904) 363-36-36\n\n"
-                "📧 Напишите на email:\n"
-                "info@kanalteh.ru\n\n"
-                "💬 Или напишите в чат - ответим за 5 минут!"
-            )
-        }
-
-        text = faq_answers.get(faq_type, "ℹ️ Информация временно недоступна.")
         await query.edit_message_text(
-            text,
+            self.render.faq_answer(faq_type),
             parse_mode=ParseMode.HTML,
             reply_markup=get_back_button()
         )
 
-    async def handle_set_status(self, query, data):
+    @callbacks.route("set_status", int, str)
+    async def handle_set_status(self, query, context, order_id, new_status):
         """Изменить статус заявки."""
         user_id = query.from_user.id
         if user_id not in self.admin_ids:
             await query.answer("❌ Доступ запрещен", show_alert=True)
             return
         
-        parts = data.replace("set_status_", "").split("_", 1)
-        order_id = int(parts[0])
-        new_status = parts[1]
-        
-        self.db.update_order_status(order_id, new_status)
+        await self.db.update_order_status(order_id, new_status)
         
-        # Русские названия статусов
-        status_names = {
-            'new': '🆕 Новая',
-            'in_progress': '🔄 В работе',
-            'completed': '✅ Выполнена',
-            'cancelled': '❌ Отменена'
-        }
-        
-        status_names_ru = {
-            'new': 'Новая',
-            'in_progress': 'В работе',
-            'completed': 'Выполнена',
-            'cancelled': 'Отменена'
-        }
-        
-        order = self.db.get_order_by_id(order_id)
+        order = await self.db.get_order_by_id(order_id)
         if order:
-            keyboard = self.get_order_action_keyboard(order_id, new_status)
-            service_key = order.get('service_type', 'Не указана')
-            service_name = self.service_names.get(service_key, service_key)
-            
-            order_text = (
-                f"{status_names.get(new_status, new_status)} <b>Заявка #{order_id}</b>\n\n"
-                f"📋 Услуга: {service_name}\n"
-                f"📍 Адрес: {order.get('address', 'Не указан')}\n"
-                f"📞 Телефон: {order.get('phone', 'Не указан')}\n"
-                f"💬 Комментарий: {order.get('comment', '') or '—'}"
-            )
+            keyboard = get_order_action_keyboard(order_id, new_status)
+            order_text = self.render.order_card(order, self.render.status_labels.get(new_status, new_status))
             await query.edit_message_text(order_text, parse_mode=ParseMode.HTML, reply_markup=keyboard)
             
             client_id = order.get('user_id')
             if client_id:
                 await self.send_notification(client_id, order_id, new_status)
         
-        await query.answer(f"✅ Статус изменён: {status_names_ru.get(new_status, new_status)}")
+        await query.answer(f"✅ Статус изменён: {self.render.status_names.get(new_status, new_status)}")
 
     async def handle_admin_callbacks(self, query, context, data):
         """Обработка админ-функций."""
@@ -955,81 +732,72 @@ class TelegramBot:
     async def send_notification(self, user_id: int, order_id: int, new_status: str, comment: str = None):
         """Отправить уведомление об изменении статуса."""
         try:
-            status_emoji = {
-                'new': '🆕',
-                'in_progress': '🔄',
-                'completed': '✅',
-                'cancelled': '❌'
-            }.get(new_status, '❓')
-            
-            # Русские названия статусов
-            status_names_ru = {
-                'new': 'Новая',
-                'in_progress': 'В работе',
-                'completed': 'Выполнена',
-                'cancelled': 'Отменена'
-            }
-            
-            status_text = status_names_ru.get(new_status, new_status)
-
-            text = f"📌 <b>Обновление статуса заявки</b>\n\n{status_emoji} Новый статус: <b>{status_text}</b>"
-            if comment:
-                text += f"\n\n💬 Комментарий: {comment}"
+            text = self.render.status_update(new_status, comment)
 
-            if self.application:
-                await self.application.bot.send_message(
-                    chat_id=user_id,
-                    text=text,
-                    parse_mode=ParseMode.HTML
-                )
+            if self.notifier:
+                self.notifier.submit([user_id], text, parse_mode=ParseMode.HTML)
         except Exception as e:
             logger.error(f"Ошибка отправки уведомления: {e}")
 
-    async def send_status_notification(self, user_id: int, order_id: int, new_status: str):
-        """Отправить уведомление клиенту об изменении статуса (для вызова из routes.py)"""
+    async def send_status_notification(self, user_id: int, order_id: int, new_status: str) -> str:
+        """Отправить уведомление клиенту об изменении статуса в веб-панели.
+
+        Возвращает исход доставки Notifier.deliver: SENT, REJECTED или FAILED.
+        """
         try:
-            status_texts = {
-                'new': '🆕 Ваша заявка создана',
-                'in_progress': '🔄 Ваша заявка взята в работу',
-                'completed': '✅ Ваша заявка выполнена',
-                'cancelled': '❌ Ваша заявка отменена'
-            }
-            
-            text = f"{status_texts.get(new_status, '📌 Обновление статуса')}\n\n"
-            text += f"📋 Номер заявки: #{order_id}\n"
-            text += f"📞 Контакты: +7 (904) 363-36-36\n\n"
-            text += "Спасибо, что выбрали <b>КаналТехСервис</b>! 😊"
-
-            if self.application:
-                await self.application.bot.send_message(
-                    chat_id=user_id,
-                    text=text,
-                    parse_mode=ParseMode.HTML
-                )
+            text = self.render.client_status_update(order_id, new_status)
+
+            if self.notifier:
+                return await self.notifier.deliver(user_id, text, parse_mode=ParseMode.HTML)
         except Exception as e:
             logger.error(f"Ошибка отправки уведомления: {e}")
+        return FAILED
+
+    async def deliver_outbox_notification(self, row: Dict) -> str:
+        """Доставить запись notification_outbox (см. OutboxDispatcher)."""
+        return await self.send_status_notification(row['user_id'], row['order_id'], row['status'])
+
+    def wake_outbox(self) -> bool:
+        """Разобрать outbox сейчас — из другого потока (веб-панель в этом процессе).
+
+        False — если event loop бота не запущен; уведомление уйдёт после запуска.
+        """
+        if not (self.loop and self.loop.is_running() and self.outbox):
+            return False
+        self.loop.call_soon_threadsafe(self.outbox.wake)
+        return True
+
+    def health(self) -> Dict:
+        """Состояние бота для /health/ready; безопасно вызывать из других потоков."""
+        heartbeat = self.heartbeat.snapshot()
+        queue = {'received': 0, 'waiting': 0, 'in_flight': 0}
+        if self.application is not None:
+            queue['received'] = self.application.update_queue.qsize()
+        if self.updates is not None:
+            queue['waiting'] = self.updates.pending - self.updates.in_flight
+            queue['in_flight'] = self.updates.in_flight
+        return {
+            'running': self.started.is_set() and heartbeat['age'] is not None,
+            'heartbeat_age': heartbeat['age'],
+            'loop_lag': heartbeat['lag'],
+            'loop_lag_recent_max': heartbeat['recent_max_lag'],
+            'loop_lag_max': heartbeat['max_lag'],
+            'update_queue': queue,
+        }
 
-    async def notify_admins_new_order(self, order_id, service_name, address, phone, comment):
-        """Уведомление админов о новой заявке."""
+    def notify_admins_new_order(self, order_id, service_name, address, phone, comment):
+        """Уведомление админов о новой заявке (в фоне, без ожидания доставки)."""
         try:
-            text = (
-                f"🆕 <b>Новая заявка #{order_id}</b>\n\n"
-                f"📋 Услуга: {service_name}\n"
-                f"📍 Адрес: {address}\n"
-                f"📞 Телефон: {phone}\n"
-                f"💬 Комментарий: {comment if comment else 'нет'}"
+            text = ADMIN_NEW_ORDER(
+                order_id=order_id,
+                service=service_name,
+                address=address,
+                phone=phone,
+                comment=comment if comment else 'нет'
             )
             
-            if self.application:
-                for admin_id in self.admin_ids:
-                    try:
-                        await self.application.bot.send_message(
-                            chat_id=admin_id,
-                            text=text,
-                            parse_mode=ParseMode.HTML
-                        )
-                    except Exception as e:
-                        logger.error(f"Ошибка уведомления админа {admin_id}: {e}")
+            if self.notifier:
+                self.notifier.submit(self.admin_ids, text, parse_mode=ParseMode.HTML)
         except Exception as e:
             logger.error(f"Ошибка уведомления админов: {e}")
 
@@ -1061,15 +829,92 @@ class TelegramBot:
             MessageHandler(filters.TEXT & ~filters.COMMAND & ~filters.Regex("^☰ Меню$"), self.handle_text_input)
         )
         
+        self.commands = frozenset(
+            f"/{command}"
+            for handlers in self.application.handlers.values()
+            for handler in handlers if isinstance(handler, CommandHandler)
+            for command in handler.commands
+        )
         logger.info("✅ Обработчики зарегистрированы")
 
+    def handler_label(self, update: object) -> str:
+        """Метка обработчика для метрик: /команда, маршрут кнопки или text.
+
+        Значения ограничены: незарегистрированные команды идут под одной
+        меткой command_other, неизвестные кнопки — под unknown.
+        """
+        if isinstance(update, Update):
+            if update.callback_query is not None:
+                return callbacks.route_name(update.callback_query.data) or 'unknown'
+            message = update.message or update.edited_message
+            if message is not None and message.text:
+                if message.text.startswith('/'):
+                    command = message.text.split(maxsplit=1)[0].split('@', 1)[0].lower()
+                    return command if command in self.commands else 'command_other'
+                return 'text'
+        return 'other'
+
+    def build_application(self) -> Application:
+        """Application с настройками транспорта из конфигурации."""
+        from app.config import BOT_CONCURRENCY, TELEGRAM_API_BASE_URL
+        # Разные чаты — параллельно, один чат — строго по порядку
+        self.updates = PerChatUpdateProcessor(BOT_CONCURRENCY, handler_label=self.handler_label)
+        builder = Application.builder().token(self.token).concurrent_updates(self.updates)
+        if METRICS_ENABLED:
+            # Вызовы Bot API с метриками; размер пула — как у запроса по умолчанию
+            builder = builder.request(InstrumentedRequest(connection_pool_size=TELEGRAM_CONNECTION_POOL_SIZE))
+        if TELEGRAM_API_BASE_URL:
+            # Локальный Bot API сервер (или заглушка в тестах)
+            builder = builder.base_url(f"{TELEGRAM_API_BASE_URL}/bot").base_file_url(
+                f"{TELEGRAM_API_BASE_URL}/file/bot"
+            )
+        return builder.build()
+
+    async def start_webhook(self) -> BotHTTPServer:
+        """Поднять HTTP-сервер и зарегистрировать webhook в Telegram."""
+        import secrets
+        from app.config import (
+            WEBHOOK_LISTEN, WEBHOOK_MAX_CONNECTIONS, WEBHOOK_PATH, WEBHOOK_PORT,
+            WEBHOOK_SECRET, WEBHOOK_URL
+        )
+        if not WEBHOOK_URL:
+            raise RuntimeError("BOT_MODE=webhook requires WEBHOOK_URL")
+        # Без заданного секрета генерируем свой на каждый запуск
+        secret_token = WEBHOOK_SECRET or secrets.token_urlsafe(32)
+        server = BotHTTPServer(self.application, WEBHOOK_PATH, secret_token,
+                               listen=WEBHOOK_LISTEN, port=WEBHOOK_PORT)
+        await server.start()
+        await self.application.bot.set_webhook(
+            url=f"{WEBHOOK_URL}{WEBHOOK_PATH}",
+            secret_token=secret_token,
+            max_connections=WEBHOOK_MAX_CONNECTIONS,
+            allowed_updates=ALLOWED_UPDATES,
+            drop_pending_updates=True
+        )
+        return server
+
+    def stop(self):
+        """Остановить run() (из обработчика сигнала или другой задачи)."""
+        if self._stopped is not None:
+            self._stopped.set()
+
     async def run(self):
         """Запуск бота."""
-        self.application = Application.builder().token(self.token).build()
+        from app.config import BOT_INTERNAL_LISTEN, BOT_INTERNAL_PORT, BOT_INTERNAL_TOKEN, BOT_MODE
+        self.application = self.build_application()
         self.setup_handlers()
+        # Один лимитер на рассылки и уведомления — общий лимит Telegram на бота
+        limiter = TelegramRateLimiter(BROADCAST_RATE)
+        self.broadcasts = BroadcastEngine(self.application.bot, self.db, limiter)
+        self.notifier = Notifier(self.application.bot, limiter)
+        # Уведомления о статусах из веб-панели (любого процесса) идут через outbox в БД
+        self.outbox = OutboxDispatcher(self.db, self.deliver_outbox_notification)
+        # Загрузка локальной модели может занять секунды — не в event loop
+        set_ai_backend(await asyncio.get_running_loop().run_in_executor(None, create_backend))
         
         # Сохраняем event loop для использования из других потоков
         self.loop = asyncio.get_event_loop()
+        self._stopped = asyncio.Event()
         
         logger.info("Бот КаналТехСервис запущен")
         logger.info("Структура: ShveinyiHUB")
@@ -1079,16 +924,47 @@ class TelegramBot:
         
         async with self.application:
             await self.application.start()
-            await self.application.updater.start_polling(
-                allowed_updates=["message", "callback_query", "edited_message"]
-            )
+            self.heartbeat.start()
+            servers = []
+            if BOT_INTERNAL_TOKEN:
+                # Воркеры gunicorn будят разбор outbox через этот API
+                internal = InternalAPIServer(self, BOT_INTERNAL_TOKEN, BOT_INTERNAL_LISTEN, BOT_INTERNAL_PORT)
+                await internal.start()
+                servers.append(internal)
+            if BOT_MODE == "webhook":
+                servers.append(await self.start_webhook())
+                logger.info("📡 Получение обновлений: webhook")
+            else:
+                # start_polling сам снимает webhook и отбрасывает накопившиеся обновления
+                await self.application.updater.start_polling(
+                    allowed_updates=ALLOWED_UPDATES,
+                    drop_pending_updates=True
+                )
+                logger.info("📡 Получение обновлений: long polling")
+            await self.broadcasts.resume_pending()
+            self.outbox.start()
+            self.started.set()
+            if LOGO_WARMUP_CHAT_ID:
+                await self.logo.warm(self.application.bot, int(LOGO_WARMUP_CHAT_ID))
             
-            # Keep running until interrupted
+            # Работаем до stop() или отмены задачи
             try:
-                while True:
-                    await asyncio.sleep(1)
+                await self._stopped.wait()
             except asyncio.CancelledError:
                 pass
             finally:
-                await self.application.updater.stop()
+                self.started.clear()
+                await self.heartbeat.stop()
+                for server in servers:
+                    await server.stop()
+                await self.outbox.shutdown()
+                await self.broadcasts.shutdown()
+                set_ai_backend(None)
+                await self.notifier.shutdown()
+                logger.info(f"📊 Уведомления: {self.notifier.metrics()}")
+                logger.info(f"📊 Outbox: {self.outbox.metrics()}")
+                logger.info(f"📊 Очередь обновлений: {self.updates.metrics()}")
+                await asyncio.get_running_loop().run_in_executor(None, self.db.close)
+                if self.application.updater.running:
+                    await self.application.updater.stop()
                 await self.application.stop()
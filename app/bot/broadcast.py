@@ -0,0 +1,219 @@
+"""Фоновые рассылки администратора («📢 Рассылка»).
+
+Получатели читаются из базы порциями по user_id, сообщения отправляются
+параллельно под общим ограничением скорости Telegram. Прогресс (курсор,
+счётчики) сохраняется после каждой порции, поэтому после перезапуска
+рассылка продолжается с места остановки; повторно сообщение могут получить
+не более чем chunk_size пользователей последней незавершённой порции.
+"""
+import asyncio
+import logging
+import os
+import time
+from datetime import timedelta
+from typing import TYPE_CHECKING, Dict, Optional
+
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.constants import ParseMode
+from telegram.error import BadRequest, Forbidden, RetryAfter, TelegramError
+
+from app.utils.metrics import counter
+
+from .rate_limit import TelegramRateLimiter
+
+if TYPE_CHECKING:
+    from telegram import Bot
+    from app.models.async_database import AsyncDatabase
+
+logger = logging.getLogger(__name__)
+
+BROADCAST_RATE = float(os.getenv("BROADCAST_RATE", "25"))
+BROADCAST_CONCURRENCY = int(os.getenv("BROADCAST_CONCURRENCY", "10"))
+BROADCAST_CHUNK_SIZE = int(os.getenv("BROADCAST_CHUNK_SIZE", "100"))
+BROADCAST_MAX_ATTEMPTS = 3
+PROGRESS_INTERVAL = 5.0
+
+BROADCAST_MESSAGES = counter('broadcast_messages', 'Broadcast messages by result', ['result'])
+BROADCAST_SENT = BROADCAST_MESSAGES.labels('sent')
+BROADCAST_FAILED = BROADCAST_MESSAGES.labels('failed')
+
+BROADCAST_TEMPLATE = "📢 <b>Уведомление от КаналТехСервис:</b>\n\n{text}"
+
+
+def retry_after_seconds(error: RetryAfter) -> float:
+    """Пауза из RetryAfter в секундах (int или timedelta в разных версиях PTB)."""
+    value = error.retry_after
+    if isinstance(value, timedelta):
+        return value.total_seconds()
+    return float(value)
+
+
+class BroadcastJob:
+    """Состояние одной рассылки в памяти."""
+
+    def __init__(self, record: Dict):
+        self.broadcast_id = record['broadcast_id']
+        self.admin_chat_id = record['admin_chat_id']
+        self.text = record['text']
+        self.cursor = record['cursor_user_id'] or 0
+        self.sent = record['sent'] or 0
+        self.failed = record['failed'] or 0
+        self.total = record['total'] or 0
+        self.started_at = time.monotonic()
+        self.done_at_start = self.sent + self.failed
+        self.progress_message_id: Optional[int] = None
+        self.cancelled = False
+        self.task: Optional[asyncio.Task] = None
+
+
+class BroadcastEngine:
+    """Запуск, возобновление и отмена фоновых рассылок."""
+
+    def __init__(self, bot: 'Bot', db: 'AsyncDatabase', limiter: Optional[TelegramRateLimiter] = None,
+                 concurrency: int = BROADCAST_CONCURRENCY, chunk_size: int = BROADCAST_CHUNK_SIZE):
+        self.bot = bot
+        self.db = db
+        self.limiter = limiter or TelegramRateLimiter(BROADCAST_RATE)
+        self.concurrency = concurrency
+        self.chunk_size = chunk_size
+        self.jobs: Dict[int, BroadcastJob] = {}
+
+    async def start(self, text: str, admin_chat_id: int) -> int:
+        """Создать рассылку и запустить её в фоне; возвращает ID рассылки."""
+        total = await self.db.get_users_count()
+        broadcast_id = await self.db.create_broadcast(admin_chat_id, text, total)
+        self._spawn(await self.db.get_broadcast(broadcast_id))
+        logger.info(f"📢 Рассылка #{broadcast_id} запущена: {total} получателей")
+        return broadcast_id
+
+    async def resume_pending(self):
+        """Продолжить рассылки, прерванные перезапуском."""
+        for record in await self.db.get_running_broadcasts():
+            if record['broadcast_id'] not in self.jobs:
+                logger.info(f"🔄 Возобновление рассылки #{record['broadcast_id']} с user_id > {record['cursor_user_id']}")
+                self._spawn(record)
+
+    def cancel(self, broadcast_id: int) -> bool:
+        job = self.jobs.get(broadcast_id)
+        if job is None:
+            return False
+        job.cancelled = True
+        return True
+
+    async def shutdown(self):
+        """Остановить задачи; незавершённые рассылки остаются 'running' и возобновятся."""
+        tasks = [job.task for job in self.jobs.values() if job.task]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _spawn(self, record: Dict):
+        job = BroadcastJob(record)
+        self.jobs[job.broadcast_id] = job
+        job.task = asyncio.create_task(self._run(job))
+
+    async def _run(self, job: BroadcastJob):
+        semaphore = asyncio.Semaphore(self.concurrency)
+        last_report = 0.0
+        status = 'running'
+        try:
+            await self._report(job, final=False)
+            while True:
+                if job.cancelled:
+                    status = 'cancelled'
+                    break
+                user_ids = await self.db.get_user_ids_after(job.cursor, self.chunk_size)
+                if not user_ids:
+                    status = 'completed'
+                    break
+
+                results = await asyncio.gather(
+                    *(self._send_with_limit(semaphore, user_id, job.text) for user_id in user_ids)
+                )
+                sent = sum(results)
+                job.sent += sent
+                job.failed += len(results) - sent
+                BROADCAST_SENT.inc(sent)
+                BROADCAST_FAILED.inc(len(results) - sent)
+                job.cursor = user_ids[-1]
+                await self.db.update_broadcast(job.broadcast_id, job.cursor, job.sent, job.failed)
+
+                if time.monotonic() - last_report >= PROGRESS_INTERVAL:
+                    last_report = time.monotonic()
+                    await self._report(job, final=False)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            status = 'failed'
+            logger.error(f"❌ Рассылка #{job.broadcast_id} прервана: {e}", exc_info=True)
+        finally:
+            if status != 'running':
+                await self.db.update_broadcast(job.broadcast_id, job.cursor, job.sent, job.failed, status)
+                self.jobs.pop(job.broadcast_id, None)
+
+        await self._report(job, final=True, status=status)
+        logger.info(
+            f"📢 Рассылка #{job.broadcast_id} {status}: отправлено {job.sent}, ошибок {job.failed}"
+        )
+
+    async def _send_with_limit(self, semaphore: asyncio.Semaphore, chat_id: int, text: str) -> bool:
+        async with semaphore:
+            return await self._send(chat_id, BROADCAST_TEMPLATE.format(text=text))
+
+    async def _send(self, chat_id: int, text: str) -> bool:
+        for attempt in range(1, BROADCAST_MAX_ATTEMPTS + 1):
+            await self.limiter.acquire(chat_id)
+            try:
+                await self.bot.send_message(chat_id=chat_id, text=text, parse_mode=ParseMode.HTML)
+                return True
+            except RetryAfter as e:
+                delay = retry_after_seconds(e)
+                logger.warning(f"⏳ Flood control: пауза {delay:.0f}s")
+                self.limiter.pause(delay)
+            except (Forbidden, BadRequest):
+                # Бот заблокирован или чат не существует — повтор не поможет
+                return False
+            except TelegramError as e:
+                if attempt == BROADCAST_MAX_ATTEMPTS:
+                    logger.warning(f"Рассылка: не удалось отправить {chat_id}: {e}")
+                    return False
+                await asyncio.sleep(0.5 * 2 ** attempt)
+        return False
+
+    async def _report(self, job: BroadcastJob, final: bool, status: str = 'running'):
+        """Отправить или обновить сообщение о прогрессе у администратора."""
+        done = job.sent + job.failed
+        elapsed = max(time.monotonic() - job.started_at, 0.001)
+        if final:
+            title = {
+                'completed': "✅ Рассылка завершена!",
+                'cancelled': "⏹ Рассылка остановлена",
+                'failed': "❌ Рассылка прервана из-за ошибки",
+            }.get(status, "⏸ Рассылка приостановлена")
+        else:
+            title = "📤 Рассылка идёт..."
+        text = (
+            f"{title}\n\n"
+            f"📨 Отправлено: {job.sent}\n"
+            f"❌ Ошибок: {job.failed}\n"
+            f"📊 Прогресс: {done}/{job.total}\n"
+            f"⚡ Скорость: {(done - job.done_at_start) / elapsed:.1f} сообщ./с"
+        )
+        reply_markup = None if final else InlineKeyboardMarkup([
+            [InlineKeyboardButton("⏹ Остановить", callback_data=f"broadcast_cancel_{job.broadcast_id}")]
+        ])
+        try:
+            await self.limiter.acquire(job.admin_chat_id)
+            if job.progress_message_id is None:
+                message = await self.bot.send_message(
+                    chat_id=job.admin_chat_id, text=text, parse_mode=ParseMode.HTML,
+                    reply_markup=reply_markup
+                )
+                job.progress_message_id = message.message_id
+            else:
+                await self.bot.edit_message_text(
+                    chat_id=job.admin_chat_id, message_id=job.progress_message_id, text=text,
+                    parse_mode=ParseMode.HTML, reply_markup=reply_markup
+                )
+        except TelegramError as e:
+            logger.warning(f"Не удалось обновить прогресс рассылки #{job.broadcast_id}: {e}")
@@ -0,0 +1,111 @@
+"""Маршрутизация callback-запросов inline-кнопок.
+
+callback_data разбивается по «_» на токены и ищется в префиксном дереве
+зарегистрированных маршрутов: побеждает самый длинный префикс, остаток
+токенов превращается в аргументы обработчика. Результат разбора кэшируется —
+набор кнопок у бота конечный, поэтому повторные нажатия не разбираются заново.
+
+    callbacks = CallbackRouter()
+
+    @callbacks.route("set_status", int, str)
+    async def on_set_status(self, query, context, order_id, new_status): ...
+
+Для "set_status_15_in_progress" обработчик получит (15, "in_progress"):
+последний конвертер забирает весь остаток строки вместе с «_».
+"""
+import logging
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PARSE_CACHE_SIZE = 4096
+
+
+class _Route:
+    __slots__ = ('name', 'handler', 'converters')
+
+    def __init__(self, name: str, handler: Callable, converters: Tuple[Callable[[str], Any], ...]):
+        self.name = name
+        self.handler = handler
+        self.converters = converters
+
+
+class _Node:
+    __slots__ = ('children', 'exact', 'prefix')
+
+    def __init__(self):
+        self.children: Dict[str, '_Node'] = {}
+        # exact — маршрут без аргументов, prefix — маршрут с аргументами
+        self.exact: Optional[_Route] = None
+        self.prefix: Optional[_Route] = None
+
+
+class CallbackRouter:
+    """Префиксное дерево маршрутов callback_data."""
+
+    def __init__(self):
+        self._root = _Node()
+        self.parse = lru_cache(maxsize=PARSE_CACHE_SIZE)(self._parse)
+
+    def route(self, name: str, *converters: Callable[[str], Any]):
+        """Декоратор: зарегистрировать обработчик для callback_data `name[_arg...]`."""
+        def decorator(handler: Callable) -> Callable:
+            self.add(name, handler, *converters)
+            return handler
+        return decorator
+
+    def add(self, name: str, handler: Callable, *converters: Callable[[str], Any]):
+        node = self._root
+        for token in name.split('_'):
+            node = node.children.setdefault(token, _Node())
+        slot = 'prefix' if converters else 'exact'
+        if getattr(node, slot) is not None:
+            raise ValueError(f"Callback route '{name}' is already registered")
+        setattr(node, slot, _Route(name, handler, converters))
+        self.parse.cache_clear()
+
+    def _parse(self, data: str) -> Optional[Tuple[Callable, Tuple[Any, ...], str]]:
+        """Найти обработчик, аргументы и имя маршрута для callback_data; None — маршрута нет."""
+        tokens = data.split('_')
+        count = len(tokens)
+        node = self._root
+        best: Optional[Tuple[_Route, int]] = None
+        for i, token in enumerate(tokens, 1):
+            node = node.children.get(token)
+            if node is None:
+                break
+            if i == count:
+                if node.exact is not None:
+                    best = (node.exact, i)
+            elif node.prefix is not None and count - i >= len(node.prefix.converters):
+                best = (node.prefix, i)
+
+        if best is None:
+            return None
+        route, consumed = best
+        rest = tokens[consumed:]
+        converters = route.converters
+        if not converters:
+            return route.handler, (), route.name
+        last = len(converters) - 1
+        raw = rest[:last] + ['_'.join(rest[last:])]
+        try:
+            args = tuple(convert(value) for convert, value in zip(converters, raw))
+        except (TypeError, ValueError):
+            return None
+        return route.handler, args, route.name
+
+    def route_name(self, data: str) -> Optional[str]:
+        """Имя маршрута для callback_data (метка метрик); None — маршрута нет."""
+        parsed = self.parse(data or '')
+        return parsed[2] if parsed is not None else None
+
+    async def dispatch(self, owner: Any, query, context) -> bool:
+        """Вызвать обработчик для query.data; False — если маршрут не найден."""
+        parsed = self.parse(query.data or '')
+        if parsed is None:
+            return False
+        handler, args, _ = parsed
+        await handler(owner, query, context, *args)
+        return True
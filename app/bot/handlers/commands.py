@@ -2,7 +2,7 @@
 from telegram import Update
 from telegram.ext import ContextTypes
 from app.bot.keyboards import get_main_menu, get_back_button
-from app.models.database import Database
+from app.models.database import get_database
 import os
 import logging
 
@@ -18,7 +18,6 @@ COMPANY_INFO = {
 
 LOGO_PATH = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'assets', 'logo.jpg')
 
-db = Database()
 
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Обработчик команды /start."""
@@ -26,6 +25,7 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = user.id
     
     # Регистрируем пользователя
+    db = get_database()
     db.add_user(user_id, user.username, user.first_name, user.last_name)
     db.update_user_activity(user_id)
     
@@ -96,7 +96,7 @@ async def faq_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def status_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Обработчик команды /status."""
     user_id = update.effective_user.id
-    orders = db.get_user_orders(user_id)
+    orders = get_database().get_user_orders(user_id)
     
     if not orders:
         text = "🔍 У вас нет заявок.\n\nОформите первую заявку через /order"
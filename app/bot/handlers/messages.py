@@ -8,10 +8,10 @@ logger = logging.getLogger(__name__)
 
 async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Обработка обычных текстовых сообщений."""
-    from app.models.database import Database
+    from app.models.database import get_database
     
     # Обновляем активность пользователя
-    db = Database()
+    db = get_database()
     db.update_user_activity(update.effective_user.id)
     
     text = update.message.text
@@ -1,7 +1,7 @@
 """Обработчики для создания и управления заказами."""
 from telegram import Update, InlineKeyboardMarkup, InlineKeyboardButton
 from telegram.ext import ContextTypes, ConversationHandler
-from app.models.database import Database
+from app.models.database import get_database
 from app.bot.keyboards import get_services_menu, get_back_button
 import logging
 from datetime import datetime
@@ -11,7 +11,6 @@ logger = logging.getLogger(__name__)
 # States для ConversationHandler
 SELECT_SERVICE, SEND_PHOTO, ENTER_DESCRIPTION, ENTER_NAME, ENTER_PHONE, CONFIRM_ORDER = range(6)
 
-db = Database()
 
 def format_order_id(order_id: int, created_at) -> str:
     """Форматирование ID заказа с датой."""
@@ -265,6 +264,7 @@ async def confirm_order(update: Update, context: ContextTypes.DEFAULT_TYPE):
     phone = context.user_data.get('client_phone')
     
     # Создаем заказ в БД
+    db = get_database()
     order_id = db.create_order(
         user_id=user_id,
         service_type=service,
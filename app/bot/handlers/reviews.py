@@ -80,13 +80,13 @@ async def receive_rating(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 async def receive_comment(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Получение комментария."""
-    from app.models.database import Database
+    from app.models.database import get_database
     
     comment = update.message.text if update.message.text != "/skip" else None
     rating = context.user_data.get('review_rating', 5)
     
     # Сохраняем отзыв в БД
-    db = Database()
+    db = get_database()
     db.add_review(
         user_id=update.effective_user.id,
         rating=rating,
@@ -106,12 +106,12 @@ async def receive_comment(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 async def skip_comment(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Пропуск комментария."""
-    from app.models.database import Database
+    from app.models.database import get_database
     
     rating = context.user_data.get('review_rating', 5)
     
     # Сохраняем отзыв без комментария
-    db = Database()
+    db = get_database()
     db.add_review(
         user_id=update.effective_user.id,
         rating=rating,
@@ -0,0 +1,69 @@
+"""Пульс event loop бота для проверки готовности (/health/ready).
+
+Фоновая задача просыпается каждые interval секунд и запоминает время
+тика и опоздание — насколько позже заказанного event loop её разбудил.
+Давний последний тик значит, что loop остановлен или завис; большое
+опоздание — что его блокирует синхронный код. Снимок читается из любого
+потока без блокировок.
+"""
+import asyncio
+import os
+import time
+from typing import Dict, Optional
+
+BOT_HEARTBEAT_INTERVAL = float(os.getenv("BOT_HEARTBEAT_INTERVAL", "0.5"))
+# Окно, за которое сообщается наибольшее опоздание (сек)
+LAG_WINDOW = 10.0
+
+
+class LoopHeartbeat:
+    """Тики event loop: время последнего и опоздание."""
+
+    def __init__(self, interval: float = BOT_HEARTBEAT_INTERVAL, window: float = LAG_WINDOW):
+        self.interval = interval
+        self.window = window
+        self.last_tick: Optional[float] = None
+        self.lag = 0.0
+        self.max_lag = 0.0
+        # Наибольшее опоздание в текущем и предыдущем окне: одиночная
+        # заминка видна в снимке ещё window секунд
+        self._window_started = 0.0
+        self._window_lag = 0.0
+        self._previous_window_lag = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self.last_tick = self._window_started = time.monotonic()
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self.lag = max(0.0, now - expected)
+            self.max_lag = max(self.max_lag, self.lag)
+            if now - self._window_started > self.window:
+                self._previous_window_lag = self._window_lag
+                self._window_lag = 0.0
+                self._window_started = now
+            self._window_lag = max(self._window_lag, self.lag)
+            self.last_tick = now
+
+    def snapshot(self) -> Dict:
+        """Возраст последнего тика и опоздание loop (секунды)."""
+        age = None if self.last_tick is None else time.monotonic() - self.last_tick
+        return {
+            'age': age,
+            'lag': self.lag,
+            'recent_max_lag': max(self._window_lag, self._previous_window_lag),
+            'max_lag': self.max_lag,
+            'interval': self.interval,
+        }
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        self.last_tick = None
@@ -0,0 +1,138 @@
+"""HTTP-серверы бота (aiohttp, в том же event loop, что и бот).
+
+BotHTTPServer принимает обновления Telegram по webhook: каждое приходит
+POST-запросом на WEBHOOK_PATH с заголовком X-Telegram-Bot-Api-Secret-Token.
+Запрос с неверным секретом отклоняется, остальные кладутся в очередь
+Application и сразу получают ответ 200 — обработка идёт параллельно,
+Telegram не ждёт её окончания.
+
+InternalAPIServer — локальный API для веб-панели, работающей в других
+процессах (gunicorn): через него воркеры будят разбор outbox уведомлений,
+чтобы клиент получил сообщение сразу, а не при следующем опросе, и
+запрашивают состояние бота для /health/ready и его метрики для /metrics.
+"""
+import hmac
+import logging
+from typing import TYPE_CHECKING, Optional
+
+from aiohttp import web
+from telegram import Update
+
+from app.utils.metrics import REGISTRY
+
+if TYPE_CHECKING:
+    from telegram.ext import Application
+    from .bot_handler import TelegramBot
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+INTERNAL_TOKEN_HEADER = "X-Bot-Internal-Token"
+
+
+def token_matches(given: str, expected: str) -> bool:
+    return hmac.compare_digest(given.encode(), expected.encode())
+
+
+class HTTPServerBase:
+    """Запуск и остановка aiohttp-приложения на listen:port."""
+
+    name = "HTTP"
+
+    def __init__(self, listen: str, port: int):
+        self.listen = listen
+        self.port = port
+        self._runner: Optional[web.AppRunner] = None
+
+    def make_app(self) -> web.Application:
+        raise NotImplementedError
+
+    async def start(self):
+        self._runner = web.AppRunner(self.make_app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.listen, self.port)
+        await site.start()
+        # При port=0 порт выбирает ОС — запоминаем фактический
+        self.port = self._runner.addresses[0][1]
+        logger.info(f"🌐 {self.name} слушает {self.listen}:{self.port}")
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+class BotHTTPServer(HTTPServerBase):
+    """HTTP-сервер, передающий обновления из webhook в Application."""
+
+    name = "Webhook"
+
+    def __init__(self, application: 'Application', path: str, secret_token: str,
+                 listen: str = "0.0.0.0", port: int = 8443):
+        super().__init__(listen, port)
+        self.application = application
+        self.path = path
+        self.secret_token = secret_token
+        self.received = 0
+        self.rejected = 0
+
+    def make_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post(self.path, self.handle_update)
+        return app
+
+    async def handle_update(self, request: web.Request) -> web.Response:
+        token = request.headers.get(SECRET_HEADER, "")
+        if not token_matches(token, self.secret_token):
+            self.rejected += 1
+            logger.warning(f"⚠️ Webhook: неверный секрет от {request.remote}")
+            return web.Response(status=403)
+
+        try:
+            data = await request.json()
+            update = Update.de_json(data, self.application.bot)
+        except (ValueError, TypeError, KeyError) as e:
+            logger.warning(f"⚠️ Webhook: некорректное обновление: {e}")
+            return web.Response(status=400)
+        if update is None:
+            return web.Response(status=400)
+
+        self.received += 1
+        await self.application.update_queue.put(update)
+        return web.Response()
+
+
+class InternalAPIServer(HTTPServerBase):
+    """Локальный API бота: POST /internal/outbox/wake, GET /internal/health и /internal/metrics."""
+
+    name = "Внутренний API бота"
+
+    def __init__(self, bot: 'TelegramBot', token: str, listen: str = "127.0.0.1", port: int = 8444):
+        super().__init__(listen, port)
+        self.bot = bot
+        self.token = token
+
+    def make_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post('/internal/outbox/wake', self.handle_outbox_wake)
+        app.router.add_get('/internal/health', self.handle_health)
+        app.router.add_get('/internal/metrics', self.handle_metrics)
+        return app
+
+    async def handle_outbox_wake(self, request: web.Request) -> web.Response:
+        if not token_matches(request.headers.get(INTERNAL_TOKEN_HEADER, ""), self.token):
+            return web.Response(status=403)
+        # Само уведомление уже в outbox — здесь только сигнал разобрать его сейчас
+        if self.bot.outbox is not None:
+            self.bot.outbox.wake()
+        return web.json_response({"woken": True}, status=202)
+
+    async def handle_health(self, request: web.Request) -> web.Response:
+        if not token_matches(request.headers.get(INTERNAL_TOKEN_HEADER, ""), self.token):
+            return web.Response(status=403)
+        return web.json_response(self.bot.health())
+
+    async def handle_metrics(self, request: web.Request) -> web.Response:
+        if not token_matches(request.headers.get(INTERNAL_TOKEN_HEADER, ""), self.token):
+            return web.Response(status=403)
+        return web.json_response(REGISTRY.collect())
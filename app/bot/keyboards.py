@@ -1,20 +1,28 @@
 """Клавиатуры для КаналТехСервис бота (по структуре ShveinyiHUB).
 Кнопки, меню, услуги и цены для ассенизаторских и сантехнических услуг.
+
+Разметка клавиатур неизменяема, поэтому каждая строится один раз и
+дальше отдаётся из кэша; клавиатуры заявок — из шаблонов кнопок.
 """
+from functools import lru_cache
+
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, ReplyKeyboardMarkup, KeyboardButton, ReplyKeyboardRemove
 
 
+@lru_cache(maxsize=None)
 def get_persistent_menu() -> ReplyKeyboardMarkup:
     """Одна кнопка меню внизу экрана."""
     keyboard = [[KeyboardButton("☰ Меню")]]
     return ReplyKeyboardMarkup(keyboard, resize_keyboard=True, one_time_keyboard=False)
 
 
+@lru_cache(maxsize=None)
 def remove_keyboard() -> ReplyKeyboardRemove:
     """Убрать клавиатуру."""
     return ReplyKeyboardRemove()
 
 
+@lru_cache(maxsize=None)
 def get_main_menu() -> InlineKeyboardMarkup:
     """Главное меню бота."""
     buttons = [
@@ -27,6 +35,7 @@ def get_main_menu() -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(buttons)
 
 
+@lru_cache(maxsize=None)
 def get_prices_menu() -> InlineKeyboardMarkup:
     """Меню выбора категории цен."""
     buttons = [
@@ -38,6 +47,7 @@ def get_prices_menu() -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(buttons)
 
 
+@lru_cache(maxsize=None)
 def get_services_menu() -> InlineKeyboardMarkup:
     """Меню услуг для заявки."""
     buttons = [
@@ -53,6 +63,7 @@ def get_services_menu() -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(buttons)
 
 
+@lru_cache(maxsize=None)
 def get_faq_menu() -> InlineKeyboardMarkup:
     """Меню FAQ."""
     buttons = [
@@ -69,12 +80,14 @@ def get_faq_menu() -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(buttons)
 
 
+@lru_cache(maxsize=None)
 def get_back_button() -> InlineKeyboardMarkup:
     """Кнопка назад в меню."""
     buttons = [[InlineKeyboardButton("◀️  Главное меню               ", callback_data="back_menu")]]
     return InlineKeyboardMarkup(buttons)
 
 
+@lru_cache(maxsize=None)
 def get_ai_chat_keyboard() -> InlineKeyboardMarkup:
     """Клавиатура для AI-чата с кнопкой заказа."""
     buttons = [
@@ -85,6 +98,7 @@ def get_ai_chat_keyboard() -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(buttons)
 
 
+@lru_cache(maxsize=None)
 def get_skip_comment_keyboard() -> InlineKeyboardMarkup:
     """Кнопка пропустить комментарий."""
     buttons = [
@@ -94,6 +108,7 @@ def get_skip_comment_keyboard() -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(buttons)
 
 
+@lru_cache(maxsize=None)
 def get_cancel_order_keyboard() -> InlineKeyboardMarkup:
     """Кнопка отмены заказа."""
     buttons = [
@@ -102,6 +117,7 @@ def get_cancel_order_keyboard() -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(buttons)
 
 
+@lru_cache(maxsize=None)
 def get_confirm_order_keyboard() -> InlineKeyboardMarkup:
     """Кнопки подтверждения заказа."""
     buttons = [
@@ -112,6 +128,7 @@ def get_confirm_order_keyboard() -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(buttons)
 
 
+@lru_cache(maxsize=None)
 def get_admin_main_menu() -> ReplyKeyboardMarkup:
     """Главное меню админа."""
     keyboard = [
@@ -124,6 +141,7 @@ def get_admin_main_menu() -> ReplyKeyboardMarkup:
     return ReplyKeyboardMarkup(keyboard, resize_keyboard=True)
 
 
+@lru_cache(maxsize=None)
 def get_admin_orders_submenu() -> InlineKeyboardMarkup:
     """Подменю управления заявками."""
     buttons = [
@@ -136,6 +154,7 @@ def get_admin_orders_submenu() -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(buttons)
 
 
+@lru_cache(maxsize=1024)
 def get_admin_order_detail_keyboard(order_id: int, order_status: str) -> InlineKeyboardMarkup:
     """Клавиатура для деталей заявки."""
     buttons = []
@@ -174,3 +193,61 @@ def get_admin_order_detail_keyboard(order_id: int, order_status: str) -> InlineK
     buttons.append([InlineKeyboardButton("◀️ Назад к списку", callback_data=back_data)])
 
     return InlineKeyboardMarkup(buttons)
+
+
+# Кнопки действий с заявкой по статусу: (текст, callback_data-шаблон)
+ORDER_STATUS_ACTIONS = {
+    'new': (
+        (("🔄 В работу", "set_status_{order_id}_in_progress"), ("❌ Отменить", "set_status_{order_id}_cancelled")),
+        (("📤 Переслать исполнителю", "forward_order_{order_id}"),),
+    ),
+    'in_progress': (
+        (("✅ Выполнено", "set_status_{order_id}_completed"), ("❌ Отменить", "set_status_{order_id}_cancelled")),
+    ),
+    'completed': (
+        (("🔄 Вернуть в работу", "set_status_{order_id}_in_progress"),),
+    ),
+    'cancelled': (
+        (("🔄 Восстановить", "set_status_{order_id}_new"),),
+    ),
+}
+
+ORDER_COMMON_ACTIONS = (
+    (("📞 Позвонить клиенту", "call_client_{order_id}"), ("📜 История", "client_history_{order_id}")),
+    (("🗑 Удалить", "delete_order_{order_id}"),),
+)
+
+
+@lru_cache(maxsize=1024)
+def get_order_action_keyboard(order_id: int, status: str) -> InlineKeyboardMarkup:
+    """Клавиатура действий с заявкой."""
+    rows = ORDER_STATUS_ACTIONS.get(status, ()) + ORDER_COMMON_ACTIONS
+    return InlineKeyboardMarkup([
+        [InlineKeyboardButton(text, callback_data=data.format(order_id=order_id)) for text, data in row]
+        for row in rows
+    ])
+
+
+@lru_cache(maxsize=1024)
+def get_executor_take_keyboard(order_id: int) -> InlineKeyboardMarkup:
+    """Кнопка исполнителя «Взять в работу»."""
+    return InlineKeyboardMarkup([
+        [InlineKeyboardButton("🔄 Взять в работу", callback_data=f"executor_take_{order_id}")]
+    ])
+
+
+@lru_cache(maxsize=None)
+def get_settings_menu() -> InlineKeyboardMarkup:
+    """Меню настроек бота."""
+    buttons = [
+        [InlineKeyboardButton("👷 Исполнители", callback_data="settings_executors")],
+        [InlineKeyboardButton("💰 Редактировать цены", callback_data="settings_prices")],
+    ]
+    return InlineKeyboardMarkup(buttons)
+
+
+@lru_cache(maxsize=None)
+def get_settings_back_button() -> InlineKeyboardMarkup:
+    """Кнопка назад в настройки."""
+    buttons = [[InlineKeyboardButton("◀️ Назад", callback_data="settings_back")]]
+    return InlineKeyboardMarkup(buttons)
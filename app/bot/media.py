@@ -0,0 +1,125 @@
+"""Повторная отправка картинок по file_id (логотип в /start).
+
+После первой загрузки Telegram возвращает file_id, и дальше фото
+отправляется по нему — без чтения файла с диска и без загрузки байтов.
+file_id хранится в таблице bot_state вместе с отпечатком файла (размер,
+mtime, sha256): если файл заменили, фото загружается заново. Если
+Telegram отклонил file_id, запись сбрасывается и фото тоже загружается
+заново.
+"""
+import hashlib
+import json
+import logging
+import os
+from typing import TYPE_CHECKING, Awaitable, Callable, Dict, Optional
+
+from telegram.error import BadRequest, TelegramError
+
+if TYPE_CHECKING:
+    from telegram import Bot, Message
+    from app.models.async_database import AsyncDatabase
+
+logger = logging.getLogger(__name__)
+
+# Чат, куда при запуске загрузить логотип, если file_id ещё нет ('' — не прогревать)
+LOGO_WARMUP_CHAT_ID = os.getenv("LOGO_WARMUP_CHAT_ID", "")
+
+SendPhoto = Callable[..., Awaitable['Message']]
+
+
+class CachedPhoto:
+    """Фото с диска, отправляемое по сохранённому file_id."""
+
+    def __init__(self, db: 'AsyncDatabase', path: str, key: Optional[str] = None):
+        self.db = db
+        self.path = path
+        self.key = key or f"file_id:{path}"
+        self._state: Optional[Dict] = None
+        self._loaded = False
+        self.uploads = 0
+        self.cached_sends = 0
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    async def _load(self) -> Optional[Dict]:
+        if not self._loaded:
+            raw = await self.db.get_state(self.key)
+            try:
+                self._state = json.loads(raw) if raw else None
+            except ValueError:
+                self._state = None
+            self._loaded = True
+        return self._state
+
+    async def _save(self, state: Optional[Dict]):
+        self._state = state
+        self._loaded = True
+        if state is None:
+            await self.db.delete_state(self.key)
+        else:
+            await self.db.set_state(self.key, json.dumps(state))
+
+    async def invalidate(self):
+        await self._save(None)
+
+    async def file_id(self) -> Optional[str]:
+        """Сохранённый file_id, если файл с тех пор не менялся."""
+        state = await self._load()
+        if not state:
+            return None
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        if stat.st_size == state['size'] and stat.st_mtime_ns == state['mtime_ns']:
+            return state['file_id']
+        # mtime меняется и без правки файла (деплой, копирование) — сверяем содержимое
+        if stat.st_size == state['size']:
+            with open(self.path, 'rb') as f:
+                same = hashlib.sha256(f.read()).hexdigest() == state['sha256']
+            if same:
+                await self._save(dict(state, mtime_ns=stat.st_mtime_ns))
+                return state['file_id']
+        logger.info(f"🖼 {self.path} изменился — фото будет загружено заново")
+        await self.invalidate()
+        return None
+
+    async def send(self, send_photo: SendPhoto, **kwargs) -> 'Message':
+        """Отправить фото через send_photo (reply_photo, bot.send_photo)."""
+        file_id = await self.file_id()
+        if file_id:
+            try:
+                message = await send_photo(photo=file_id, **kwargs)
+                self.cached_sends += 1
+                return message
+            except BadRequest as e:
+                logger.warning(f"⚠️ Telegram отклонил file_id для {self.path}: {e}")
+                await self.invalidate()
+        return await self._upload(send_photo, **kwargs)
+
+    async def _upload(self, send_photo: SendPhoto, **kwargs) -> 'Message':
+        stat = os.stat(self.path)
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        message = await send_photo(photo=data, filename=os.path.basename(self.path), **kwargs)
+        self.uploads += 1
+        if message and message.photo:
+            await self._save({
+                'file_id': message.photo[-1].file_id,
+                'size': stat.st_size,
+                'mtime_ns': stat.st_mtime_ns,
+                'sha256': hashlib.sha256(data).hexdigest(),
+            })
+        return message
+
+    async def warm(self, bot: 'Bot', chat_id: int):
+        """Получить file_id заранее: загрузить фото в служебный чат и удалить сообщение."""
+        if not self.exists() or await self.file_id():
+            return
+        try:
+            message = await self._upload(bot.send_photo, chat_id=chat_id, disable_notification=True)
+            await bot.delete_message(chat_id=chat_id, message_id=message.message_id)
+            logger.info(f"🖼 {self.path} загружен, file_id сохранён")
+        except TelegramError as e:
+            logger.warning(f"⚠️ Не удалось прогреть {self.path}: {e}")
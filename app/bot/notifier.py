@@ -0,0 +1,130 @@
+"""Рассылка служебных уведомлений (админам, исполнителям, клиентам).
+
+Отправляет сообщение всем получателям параллельно с ограничением числа
+одновременных отправок, таймаутом на каждую попытку и повторами с
+экспоненциальной паузой. `submit` запускает доставку в фоне, чтобы
+обработчик клиента не ждал медленный или заблокированный чат.
+"""
+import asyncio
+import logging
+import os
+import time
+from typing import TYPE_CHECKING, Dict, Iterable, Optional, Set
+
+from telegram.error import BadRequest, Forbidden, RetryAfter, TelegramError
+
+from .broadcast import retry_after_seconds
+from .rate_limit import TelegramRateLimiter
+
+if TYPE_CHECKING:
+    from telegram import Bot
+
+logger = logging.getLogger(__name__)
+
+NOTIFY_CONCURRENCY = int(os.getenv("NOTIFY_CONCURRENCY", "5"))
+NOTIFY_TIMEOUT = float(os.getenv("NOTIFY_TIMEOUT", "10"))
+NOTIFY_MAX_ATTEMPTS = int(os.getenv("NOTIFY_MAX_ATTEMPTS", "3"))
+NOTIFY_BACKOFF = 0.5
+
+# Исход доставки (Notifier.deliver)
+SENT = 'sent'
+# Бот заблокирован, чата нет или запрос отвергнут — повтор не поможет
+REJECTED = 'rejected'
+# Таймауты, сетевые ошибки и RetryAfter: попытки кончились, позже может получиться
+FAILED = 'failed'
+
+
+class Notifier:
+    """Параллельная доставка уведомлений с таймаутами, повторами и метриками."""
+
+    def __init__(self, bot: 'Bot', limiter: Optional[TelegramRateLimiter] = None,
+                 concurrency: int = NOTIFY_CONCURRENCY, timeout: float = NOTIFY_TIMEOUT,
+                 max_attempts: int = NOTIFY_MAX_ATTEMPTS, backoff: float = NOTIFY_BACKOFF):
+        self.bot = bot
+        self.limiter = limiter
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._tasks: Set[asyncio.Task] = set()
+        self.stats = {
+            'sent': 0,
+            'failed': 0,
+            'retries': 0,
+            'timeouts': 0,
+            'latency_total': 0.0,
+            'latency_max': 0.0,
+        }
+
+    def metrics(self) -> Dict:
+        """Снимок счётчиков доставки."""
+        snapshot = dict(self.stats)
+        snapshot['pending_tasks'] = len(self._tasks)
+        delivered = snapshot['sent']
+        snapshot['latency_avg'] = snapshot['latency_total'] / delivered if delivered else 0.0
+        return snapshot
+
+    def submit(self, chat_ids: Iterable[int], text: str, **kwargs) -> asyncio.Task:
+        """Запустить доставку в фоне и сразу вернуть управление."""
+        task = asyncio.create_task(self.send_many(chat_ids, text, **kwargs))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def send_many(self, chat_ids: Iterable[int], text: str, **kwargs) -> Dict[int, bool]:
+        """Отправить всем получателям параллельно; возвращает {chat_id: доставлено}."""
+        chat_ids = list(dict.fromkeys(chat_ids))
+        results = await asyncio.gather(*(self.send(chat_id, text, **kwargs) for chat_id in chat_ids))
+        return dict(zip(chat_ids, results))
+
+    async def send(self, chat_id: int, text: str, **kwargs) -> bool:
+        """Отправить одному получателю с повторами; ошибки не пробрасываются."""
+        return await self.deliver(chat_id, text, **kwargs) == SENT
+
+    async def deliver(self, chat_id: int, text: str, **kwargs) -> str:
+        """Как send, но возвращает исход: SENT, REJECTED или FAILED."""
+        async with self._semaphore:
+            started = time.monotonic()
+            for attempt in range(1, self.max_attempts + 1):
+                if attempt > 1:
+                    self.stats['retries'] += 1
+                try:
+                    if self.limiter is not None:
+                        await self.limiter.acquire(chat_id)
+                    await asyncio.wait_for(
+                        self.bot.send_message(chat_id=chat_id, text=text, **kwargs),
+                        timeout=self.timeout
+                    )
+                    latency = time.monotonic() - started
+                    self.stats['sent'] += 1
+                    self.stats['latency_total'] += latency
+                    self.stats['latency_max'] = max(self.stats['latency_max'], latency)
+                    return SENT
+                except RetryAfter as e:
+                    delay = retry_after_seconds(e)
+                    if self.limiter is not None:
+                        self.limiter.pause(delay)
+                    else:
+                        await asyncio.sleep(delay)
+                    continue
+                except (Forbidden, BadRequest) as e:
+                    # Бот заблокирован или чат не существует — повтор не поможет
+                    self.stats['failed'] += 1
+                    logger.warning(f"Уведомление {chat_id} не доставлено: {e}")
+                    return REJECTED
+                except asyncio.TimeoutError:
+                    self.stats['timeouts'] += 1
+                    logger.warning(f"⏳ Таймаут уведомления {chat_id} (попытка {attempt})")
+                except TelegramError as e:
+                    logger.warning(f"Ошибка уведомления {chat_id} (попытка {attempt}): {e}")
+                if attempt < self.max_attempts:
+                    await asyncio.sleep(self.backoff * 2 ** (attempt - 1))
+
+            self.stats['failed'] += 1
+            logger.error(f"❌ Уведомление {chat_id} не доставлено после {self.max_attempts} попыток")
+            return FAILED
+
+    async def shutdown(self, timeout: float = 5.0):
+        """Дождаться фоновых доставок (не дольше timeout)."""
+        if self._tasks:
+            await asyncio.wait(set(self._tasks), timeout=timeout)
@@ -0,0 +1,137 @@
+"""Доставка уведомлений из таблицы notification_outbox.
+
+Веб-панель (в любом процессе) ставит уведомление о смене статуса в outbox
+той же транзакцией, что и сам статус. OutboxDispatcher в event loop бота
+забирает готовые к отправке записи порциями, отправляет их параллельно и
+удаляет доставленные. Временные сбои (таймауты, сеть, RetryAfter)
+откладываются с экспоненциальной паузой, после OUTBOX_MAX_ATTEMPTS попыток
+запись помечается как 'dead'. Отказ Telegram (бот заблокирован, чат не
+найден) сразу помечает запись как 'failed' — повтор не поможет.
+
+Доставка «хотя бы один раз»: если бот упадёт между отправкой и отметкой,
+после перезапуска сообщение уйдёт повторно.
+"""
+import asyncio
+import logging
+import os
+import time
+from typing import TYPE_CHECKING, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from .notifier import FAILED, REJECTED, SENT
+
+if TYPE_CHECKING:
+    from app.models.async_database import AsyncDatabase
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "50"))
+OUTBOX_POLL_SECONDS = float(os.getenv("OUTBOX_POLL_SECONDS", "2"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "5"))
+OUTBOX_BACKOFF = float(os.getenv("OUTBOX_BACKOFF", "30"))
+OUTBOX_MAX_BACKOFF = 3600.0
+
+
+class OutboxDispatcher:
+    """Фоновая задача, разбирающая outbox уведомлений."""
+
+    def __init__(self, db: 'AsyncDatabase', send: Callable[[Dict], Awaitable[str]],
+                 batch_size: int = OUTBOX_BATCH_SIZE, poll_interval: float = OUTBOX_POLL_SECONDS,
+                 max_attempts: int = OUTBOX_MAX_ATTEMPTS, backoff: float = OUTBOX_BACKOFF):
+        self.db = db
+        self.send = send
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        # send(row) возвращает исход доставки: SENT, REJECTED или FAILED
+        self.stats = {'sent': 0, 'retried': 0, 'dead': 0, 'failed': 0, 'batches': 0}
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    def wake(self):
+        """Проверить outbox сейчас, не дожидаясь опроса (вызывать из event loop)."""
+        self._wakeup.set()
+
+    def metrics(self) -> Dict:
+        return dict(self.stats)
+
+    def retry_delay(self, attempts: int) -> float:
+        """Пауза перед следующей попыткой после attempts неудачных."""
+        return min(self.backoff * 2 ** (attempts - 1), OUTBOX_MAX_BACKOFF)
+
+    async def drain_once(self) -> int:
+        """Отправить одну порцию готовых уведомлений; возвращает её размер."""
+        rows = await self.db.get_due_notifications(self.batch_size)
+        if not rows:
+            return 0
+        results = await asyncio.gather(*(self._send(row) for row in rows))
+
+        sent: List[int] = []
+        rejected: List[int] = []
+        retries: List[Tuple[int, Optional[float]]] = []
+        now = time.time()
+        for row, outcome in zip(rows, results):
+            if outcome == SENT:
+                sent.append(row['outbox_id'])
+                continue
+            if outcome == REJECTED:
+                rejected.append(row['outbox_id'])
+                logger.warning(f"Уведомление по заявке {row['order_id']} отвергнуто Telegram, без повторов")
+                continue
+            attempts = row['attempts'] + 1
+            if attempts >= self.max_attempts:
+                retries.append((row['outbox_id'], None))
+                self.stats['dead'] += 1
+                logger.error(f"❌ Уведомление по заявке {row['order_id']} отброшено после {attempts} попыток")
+            else:
+                retries.append((row['outbox_id'], now + self.retry_delay(attempts)))
+                self.stats['retried'] += 1
+
+        await self.db.mark_notifications_sent(sent)
+        await self.db.fail_notifications(rejected)
+        await self.db.reschedule_notifications(retries)
+        self.stats['sent'] += len(sent)
+        self.stats['failed'] += len(rejected)
+        self.stats['batches'] += 1
+        return len(rows)
+
+    async def _send(self, row: Dict) -> str:
+        try:
+            return await self.send(row)
+        except Exception as e:
+            logger.error(f"Ошибка отправки уведомления из outbox #{row['outbox_id']}: {e}")
+            return FAILED
+
+    async def _next_wait(self) -> float:
+        """Сколько ждать до опроса: до ближайшей отложенной попытки, но не дольше poll_interval."""
+        next_at = await self.db.get_next_notification_at()
+        if next_at is None:
+            return self.poll_interval
+        return max(0.0, min(self.poll_interval, next_at - time.time()))
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            try:
+                if await self.drain_once() >= self.batch_size:
+                    continue
+                timeout = await self._next_wait()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Ошибка разбора outbox уведомлений: {e}")
+                timeout = self.poll_interval
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def shutdown(self):
+        """Остановить разбор; неотправленное останется в outbox до запуска."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
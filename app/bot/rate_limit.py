@@ -0,0 +1,71 @@
+"""Ограничение скорости отправки сообщений под лимиты Telegram Bot API.
+
+Telegram допускает около 30 сообщений в секунду на бота в целом и
+не больше одного сообщения в секунду в один чат. При превышении API
+отвечает RetryAfter — тогда отправка приостанавливается для всех.
+"""
+import asyncio
+import time
+from typing import Dict
+
+
+class TokenBucket:
+    """Асинхронное «ведро токенов»: rate токенов в секунду, запас до capacity."""
+
+    def __init__(self, rate: float, capacity: float = None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def pause(self, seconds: float):
+        """Остановить выдачу токенов (например, после RetryAfter)."""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self._tokens = 0.0
+
+    async def acquire(self):
+        # Проверка и списание идут без await между ними, поэтому внутри
+        # одного event loop блокировка не нужна
+        while True:
+            now = time.monotonic()
+            if now < self._paused_until:
+                await asyncio.sleep(self._paused_until - now)
+                continue
+            self._refill(now)
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class TelegramRateLimiter:
+    """Общий лимит бота плюс интервал между сообщениями в один чат."""
+
+    def __init__(self, global_rate: float = 25.0, per_chat_interval: float = 1.0):
+        self.global_bucket = TokenBucket(global_rate)
+        self.per_chat_interval = per_chat_interval
+        self._chat_next: Dict[int, float] = {}
+
+    def pause(self, seconds: float):
+        self.global_bucket.pause(seconds)
+
+    async def acquire(self, chat_id: int):
+        now = time.monotonic()
+        next_allowed = self._chat_next.get(chat_id, 0.0)
+        self._chat_next[chat_id] = max(now, next_allowed) + self.per_chat_interval
+        if next_allowed > now:
+            await asyncio.sleep(next_allowed - now)
+        await self.global_bucket.acquire()
+
+        if len(self._chat_next) > 10000:
+            now = time.monotonic()
+            self._chat_next = {
+                chat: moment for chat, moment in self._chat_next.items() if moment > now
+            }
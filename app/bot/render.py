@@ -0,0 +1,132 @@
+"""Готовые тексты бота, собранные один раз из каталога.
+
+Цены, ответы FAQ, названия услуг и статусов рендерятся при запуске из
+app/config/catalog.json — обработчики берут готовую строку из словаря.
+Данные конкретной заявки подставляются в заранее подготовленные шаблоны.
+"""
+from functools import lru_cache
+from typing import Dict, Optional
+
+from app.utils.prices import CATALOG_PATH, load_prices_from_json
+
+UNAVAILABLE = "ℹ️ Информация временно недоступна"
+UNKNOWN_STATUS_EMOJI = "❓"
+
+# Шаблоны с данными заявки (str.format разбирает их один раз, при импорте)
+ORDER_CARD = (
+    "{status} <b>Заявка #{order_id}</b>\n\n"
+    "📋 Услуга: {service}\n"
+    "📍 Адрес: {address}\n"
+    "📞 Телефон: {phone}\n"
+    "💬 Комментарий: {comment}"
+).format
+
+EXECUTOR_ORDER = (
+    "📋 <b>Новая заявка #{order_id}</b>\n\n"
+    "🔧 Услуга: {service}\n"
+    "📍 Адрес: {address}\n"
+    "📞 Телефон: {phone}\n"
+    "💬 Комментарий: {comment}\n\n"
+    "Нажмите кнопку, когда возьмёте в работу:"
+).format
+
+ADMIN_NEW_ORDER = (
+    "🆕 <b>Новая заявка #{order_id}</b>\n\n"
+    "📋 Услуга: {service}\n"
+    "📍 Адрес: {address}\n"
+    "📞 Телефон: {phone}\n"
+    "💬 Комментарий: {comment}"
+).format
+
+STATUS_UPDATE = "📌 <b>Обновление статуса заявки</b>\n\n{emoji} Новый статус: <b>{name}</b>".format
+STATUS_COMMENT = "\n\n💬 Комментарий: {comment}".format
+
+CLIENT_STATUS = (
+    "{headline}\n\n"
+    "📋 Номер заявки: #{order_id}\n"
+    "📞 Контакты: +7 (904) 363-36-36\n\n"
+    "Спасибо, что выбрали <b>КаналТехСервис</b>! 😊"
+).format
+
+
+class RenderCache:
+    """Неизменяемые тексты каталога, отрендеренные заранее."""
+
+    def __init__(self, catalog: dict):
+        services = catalog['services']
+        self.service_names: Dict[str, str] = {
+            key: f"{service['emoji']} {service['name']}" for key, service in services.items()
+        }
+
+        note = catalog['price_note']
+        self.prices: Dict[str, str] = {
+            key: self._render_price(services[key], entry, note)
+            for key, entry in catalog['prices'].items()
+        }
+        self.price_unavailable = f"{UNAVAILABLE}\n\n{note}"
+
+        self.faq: Dict[str, str] = {key: "\n".join(lines) for key, lines in catalog['faq'].items()}
+        self.faq_unavailable = f"{UNAVAILABLE}."
+
+        statuses = catalog['statuses']
+        self.status_emoji: Dict[str, str] = {key: s['emoji'] for key, s in statuses.items()}
+        self.status_names: Dict[str, str] = {key: s['name'] for key, s in statuses.items()}
+        self.status_labels: Dict[str, str] = {
+            key: f"{s['emoji']} {s['name']}" for key, s in statuses.items()
+        }
+        self.client_headlines: Dict[str, str] = {
+            key: f"{s['emoji']} {s['client']}" for key, s in statuses.items()
+        }
+        self.status_updates: Dict[str, str] = {
+            key: STATUS_UPDATE(emoji=s['emoji'], name=s['name']) for key, s in statuses.items()
+        }
+
+    @staticmethod
+    def _render_price(service: dict, entry: dict, note: str) -> str:
+        items = "\n".join(f"• {name} - {price}" for name, price in entry['items'])
+        terms = "\n".join(entry['terms'])
+        return (
+            f"{service['emoji']} <b>{service['name']}:</b>\n\n"
+            f"💰 Стоимость:\n{items}\n\n{terms}\n\n{note}"
+        )
+
+    def price(self, category: str) -> str:
+        return self.prices.get(category, self.price_unavailable)
+
+    def faq_answer(self, key: str) -> str:
+        return self.faq.get(key, self.faq_unavailable)
+
+    def service_name(self, key: str) -> str:
+        return self.service_names.get(key, key)
+
+    def status_update(self, status: str, comment: Optional[str] = None) -> str:
+        """Уведомление клиенту о новом статусе (из админ-панели бота)."""
+        text = self.status_updates.get(status)
+        if text is None:
+            text = STATUS_UPDATE(emoji=UNKNOWN_STATUS_EMOJI, name=status)
+        if comment:
+            text += STATUS_COMMENT(comment=comment)
+        return text
+
+    def client_status_update(self, order_id: int, status: str) -> str:
+        """Уведомление клиенту о новом статусе (из веб-панели)."""
+        headline = self.client_headlines.get(status, "📌 Обновление статуса")
+        return CLIENT_STATUS(headline=headline, order_id=order_id)
+
+    def order_card(self, order: dict, status_label: str) -> str:
+        """Карточка заявки для админа."""
+        service_key = order.get('service_type', 'Не указана')
+        return ORDER_CARD(
+            status=status_label,
+            order_id=order.get('order_id', '?'),
+            service=self.service_name(service_key),
+            address=order.get('address', 'Не указан'),
+            phone=order.get('phone', 'Не указан'),
+            comment=order.get('comment', '') or '—',
+        )
+
+
+@lru_cache(maxsize=None)
+def get_render_cache(path: str = CATALOG_PATH) -> RenderCache:
+    """Общий на процесс кэш текстов; строится при первом обращении."""
+    return RenderCache(load_prices_from_json(path))
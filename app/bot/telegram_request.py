@@ -0,0 +1,34 @@
+"""Запросы к Bot API с метриками задержки и ошибок.
+
+InstrumentedRequest — HTTPXRequest, который замеряет каждый вызов метода
+Bot API (sendMessage, answerCallbackQuery, ...) и считает ошибки по типу:
+RetryAfter, Forbidden, BadRequest, TimedOut, NetworkError...
+Долгий опрос getUpdates идёт через отдельный запрос и сюда не попадает.
+"""
+import time
+
+from telegram.request import HTTPXRequest
+
+from app.utils.metrics import counter, histogram
+
+TELEGRAM_API_SECONDS = histogram(
+    'telegram_api_seconds', 'Telegram Bot API call latency by method', ['method']
+)
+TELEGRAM_API_ERRORS = counter(
+    'telegram_api_errors', 'Failed Telegram Bot API calls by method and error', ['method', 'error']
+)
+
+
+class InstrumentedRequest(HTTPXRequest):
+    """HTTPXRequest с замером вызовов Bot API."""
+
+    async def post(self, url: str, *args, **kwargs):
+        method = url.rsplit('/', 1)[-1]
+        started = time.perf_counter()
+        try:
+            return await super().post(url, *args, **kwargs)
+        except Exception as e:
+            TELEGRAM_API_ERRORS.labels(method, type(e).__name__).inc()
+            raise
+        finally:
+            TELEGRAM_API_SECONDS.labels(method).observe(time.perf_counter() - started)
@@ -0,0 +1,170 @@
+"""Параллельная обработка обновлений с сохранением порядка внутри чата.
+
+Обновления разных чатов обрабатываются одновременно (до BOT_CONCURRENCY
+штук), а обновления одного чата — строго по очереди, в порядке
+поступления: пошаговое оформление заявки (context.user_data['step'])
+не ломается, если клиент быстро присылает несколько сообщений подряд.
+
+Для каждого обновления измеряется ожидание в очереди — от получения до
+начала обработки — и время обработки, по типу обновления и обработчику
+(гистограммы bot_queue_wait_seconds и bot_handler_seconds).
+"""
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+from app.utils.metrics import histogram
+
+logger = logging.getLogger(__name__)
+
+# Ожидание в очереди дольше этого порога пишется в лог (сек)
+BOT_QUEUE_WAIT_WARN = float(os.getenv("BOT_QUEUE_WAIT_WARN", "2"))
+# Сколько обновлений может быть принято (ждать очереди чата или выполняться)
+BOT_MAX_PENDING_UPDATES = int(os.getenv("BOT_MAX_PENDING_UPDATES", "1000"))
+# Предел ключей (тип, обработчик) в stats
+MAX_WAIT_STATS = 256
+
+BOT_HANDLER_SECONDS = histogram(
+    'bot_handler_seconds', 'Update handling time by update kind and handler', ['kind', 'handler']
+)
+BOT_QUEUE_WAIT_SECONDS = histogram(
+    'bot_queue_wait_seconds', 'Time from receiving an update to starting its handler', ['kind', 'handler']
+)
+
+
+def update_kind(update: object) -> str:
+    """Тип обновления для метрик: message, callback_query, ..."""
+    if isinstance(update, Update):
+        for kind in ('callback_query', 'message', 'edited_message'):
+            if getattr(update, kind) is not None:
+                return kind
+    return 'other'
+
+
+class PerChatUpdateProcessor(BaseUpdateProcessor):
+    """Обработчик обновлений: параллельно между чатами, по порядку внутри чата.
+
+    Общий семафор базового класса лишь ограничивает число принятых
+    обновлений (max_pending). Одновременно выполняется не больше
+    concurrency обработчиков — этот лимит берётся уже после очереди чата:
+    обновления, ждущие свой чат, не занимают слоты остальных чатов.
+    """
+
+    def __init__(self, concurrency: int, wait_warn: float = BOT_QUEUE_WAIT_WARN,
+                 handler_label: Optional[Callable[[object], str]] = None,
+                 max_pending: int = BOT_MAX_PENDING_UPDATES):
+        super().__init__(max(max_pending, concurrency))
+        self.concurrency = concurrency
+        self._slots = asyncio.BoundedSemaphore(concurrency)
+        self.wait_warn = wait_warn
+        # Метка обработчика для метрик: команда, маршрут кнопки...
+        self.handler_label = handler_label
+        self._chat_locks: Dict[int, asyncio.Lock] = {}
+        self._chat_waiters: Dict[int, int] = {}
+        self.in_flight = 0
+        # Принятые, но ещё не обработанные обновления (включая in_flight)
+        self.pending = 0
+        # (тип обновления, обработчик) -> ожидание в очереди; не больше
+        # MAX_WAIT_STATS ключей, остальное копится под (тип, 'overflow')
+        self.stats: Dict[Tuple[str, str], Dict[str, float]] = {}
+
+    @staticmethod
+    def chat_key(update: object) -> Optional[int]:
+        if isinstance(update, Update):
+            if update.effective_chat is not None:
+                return update.effective_chat.id
+            if update.effective_user is not None:
+                return update.effective_user.id
+        return None
+
+    async def do_process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        self.pending += 1
+        try:
+            await self._process_in_order(update, coroutine)
+        except asyncio.CancelledError:
+            # Отменено при остановке, пока ждало очереди: корутину закрываем,
+            # чтобы не было предупреждения «never awaited»
+            if hasattr(coroutine, 'close'):
+                coroutine.close()
+            raise
+        finally:
+            self.pending -= 1
+
+    async def _process_in_order(self, update: object, coroutine: Awaitable[Any]):
+        received = time.perf_counter()
+        key = self.chat_key(update)
+        if key is None:
+            async with self._slots:
+                await self._run(update, coroutine, received)
+            return
+
+        lock = self._chat_locks.get(key)
+        if lock is None:
+            lock = self._chat_locks[key] = asyncio.Lock()
+        self._chat_waiters[key] = self._chat_waiters.get(key, 0) + 1
+        try:
+            async with lock:
+                async with self._slots:
+                    await self._run(update, coroutine, received)
+        finally:
+            self._chat_waiters[key] -= 1
+            if not self._chat_waiters[key]:
+                del self._chat_waiters[key]
+                del self._chat_locks[key]
+
+    async def _run(self, update: object, coroutine: Awaitable[Any], received: float):
+        labels = self._labels(update)
+        self._record_wait(update, labels, time.perf_counter() - received)
+        self.in_flight += 1
+        started = time.perf_counter()
+        try:
+            await coroutine
+        finally:
+            self.in_flight -= 1
+            BOT_HANDLER_SECONDS.labels(*labels).observe(time.perf_counter() - started)
+
+    def _labels(self, update: object) -> Tuple[str, str]:
+        label = self.handler_label(update) if self.handler_label is not None else 'all'
+        return update_kind(update), label
+
+    def _record_wait(self, update: object, labels: Tuple[str, str], wait: float):
+        BOT_QUEUE_WAIT_SECONDS.labels(*labels).observe(wait)
+        stats = self.stats.get(labels)
+        if stats is None and len(self.stats) >= MAX_WAIT_STATS:
+            labels = (labels[0], 'overflow')
+            stats = self.stats.get(labels)
+        if stats is None:
+            stats = self.stats[labels] = {'processed': 0, 'wait_total': 0.0, 'wait_max': 0.0}
+        stats['processed'] += 1
+        stats['wait_total'] += wait
+        stats['wait_max'] = max(stats['wait_max'], wait)
+        if wait > self.wait_warn:
+            kind, label = labels
+            logger.warning(f"⏳ {kind} {label} ждал обработки {wait:.2f} с (чат {self.chat_key(update)})")
+
+    def metrics(self) -> Dict:
+        """Текущая загрузка и ожидание в очереди: снимок[тип][обработчик]."""
+        snapshot = {
+            'in_flight': self.in_flight,
+            'waiting': self.pending - self.in_flight,
+            'waiting_chats': len(self._chat_waiters),
+            'concurrency': self.concurrency,
+            'max_pending': self.max_concurrent_updates,
+        }
+        for (kind, label), stats in list(self.stats.items()):
+            processed = stats['processed']
+            snapshot.setdefault(kind, {})[label] = dict(
+                stats, wait_avg=stats['wait_total'] / processed if processed else 0.0
+            )
+        return snapshot
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
@@ -12,6 +12,23 @@ PORT = int(os.getenv("PORT", "5000"))
 FLASK_SECRET_KEY = os.getenv("FLASK_SECRET_KEY", "dev-key-change-in-production")
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///botdata.db")
 
+# Bot transport: long polling or webhook served from this process
+BOT_MODE = os.getenv("BOT_MODE", "polling").strip().lower()
+BOT_CONCURRENCY = int(os.getenv("BOT_CONCURRENCY", "8"))
+TELEGRAM_API_BASE_URL = os.getenv("TELEGRAM_API_BASE_URL", "").rstrip("/")
+WEBHOOK_URL = os.getenv("WEBHOOK_URL", "").rstrip("/")
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/telegram/webhook")
+WEBHOOK_LISTEN = os.getenv("WEBHOOK_LISTEN", "0.0.0.0")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8443"))
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")
+WEBHOOK_MAX_CONNECTIONS = int(os.getenv("WEBHOOK_MAX_CONNECTIONS", "40"))
+
+# Local bot API for web workers running in other processes (gunicorn)
+BOT_INTERNAL_TOKEN = os.getenv("BOT_INTERNAL_TOKEN", "")
+BOT_INTERNAL_LISTEN = os.getenv("BOT_INTERNAL_LISTEN", "127.0.0.1")
+BOT_INTERNAL_PORT = int(os.getenv("BOT_INTERNAL_PORT", "8444"))
+BOT_INTERNAL_URL = os.getenv("BOT_INTERNAL_URL", f"http://127.0.0.1:{BOT_INTERNAL_PORT}").rstrip("/")
+
 # Company info
 COMPANY_NAME = os.getenv("COMPANY_NAME", "КаналТехСервис")
 COMPANY_PHONE = os.getenv("COMPANY_PHONE", "+7 (904) 363-36-36")
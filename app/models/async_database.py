@@ -0,0 +1,71 @@
+"""Async facade over Database for code running on the bot's event loop.
+
+SQLite calls block: a slow disk, or the write lock held by the web panel,
+would freeze every chat if queries ran on the event loop thread.
+AsyncDatabase runs reads on a small thread pool and all writes on a single
+writer thread, so the bot's own writes never compete for the SQLite write
+lock. Every public Database method is available as a coroutine::
+
+    adb = AsyncDatabase(db)
+    order_id = await adb.create_order(user_id, 'septic', address, phone)
+"""
+import asyncio
+import functools
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Coroutine
+
+from .database import Database
+
+logger = logging.getLogger(__name__)
+
+DB_READ_WORKERS = int(os.getenv("DB_READ_WORKERS", "4"))
+
+# Database methods that modify data; they run one at a time on the writer thread
+WRITE_METHODS = frozenset({
+    'init_db',
+    'add_user',
+    'create_order',
+    'update_order_status',
+    'delete_order',
+    'create_broadcast',
+    'update_broadcast',
+    'set_state',
+    'delete_state',
+    'mark_notifications_sent',
+    'fail_notifications',
+    'reschedule_notifications',
+})
+
+
+class AsyncDatabase:
+    """Database methods as awaitables, executed off the event loop"""
+
+    def __init__(self, db: Database, read_workers: int = DB_READ_WORKERS):
+        self.db = db
+        self._readers = ThreadPoolExecutor(max_workers=read_workers, thread_name_prefix="db-read")
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-write")
+
+    def __getattr__(self, name: str) -> Callable[..., Coroutine[Any, Any, Any]]:
+        if name.startswith('_') or name == 'db':
+            raise AttributeError(name)
+        method = getattr(self.db, name)
+        if not callable(method):
+            raise AttributeError(name)
+        executor = self._writer if name in WRITE_METHODS else self._readers
+
+        async def call(*args, **kwargs):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(executor, functools.partial(method, *args, **kwargs))
+
+        call.__name__ = name
+        call.__doc__ = method.__doc__
+        # Cache the wrapper: __getattr__ is only consulted for missing attributes
+        self.__dict__[name] = call
+        return call
+
+    def close(self):
+        """Finish queued writes and stop the worker threads (the Database stays open)"""
+        self._writer.shutdown(wait=True)
+        self._readers.shutdown(wait=True)
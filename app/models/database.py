@@ -1,206 +1,695 @@
 """Database models and operations for KanalTexService Bot"""
+import os
 import sqlite3
 import json
+from contextlib import contextmanager
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import Iterator, List, Dict, Optional, Tuple
 import logging
+import threading
+import time
+
+from .pool import ConnectionPool
+from app.utils.events import order_events
+from app.utils.metrics import METRICS_ENABLED, histogram
 
 logger = logging.getLogger(__name__)
 
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "8"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000"))
+DB_JOURNAL_MODE = os.getenv("DB_JOURNAL_MODE", "WAL")
+DB_SYNCHRONOUS = os.getenv("DB_SYNCHRONOUS", "NORMAL")
+DB_CACHE_SIZE_KB = int(os.getenv("DB_CACHE_SIZE_KB", "8192"))
+DB_MMAP_SIZE = int(os.getenv("DB_MMAP_SIZE", str(64 * 1024 * 1024)))
+
+# The counters only see this process's writes, so they are off when the
+# gunicorn workers and the bot write from separate processes
+DB_STATS_CACHE = (os.getenv("DB_STATS_CACHE", "1") == "1"
+                  and os.getenv("WEB_SERVER", "dev").lower() != "gunicorn")
+DB_STATS_RECONCILE_SECONDS = float(os.getenv("DB_STATS_RECONCILE_SECONDS", "60"))
+
+# How many order_changes rows to retain, and how often to prune them
+ORDER_CHANGES_KEEP = 10000
+ORDER_CHANGES_PRUNE_EVERY = 1000
+
+
+def _migrate_initial_schema(conn: sqlite3.Connection):
+    """v1: users, orders and reviews tables"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            user_id INTEGER PRIMARY KEY,
+            username TEXT,
+            first_name TEXT,
+            last_name TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS orders (
+            order_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            service_type TEXT,
+            address TEXT,
+            phone TEXT,
+            comment TEXT DEFAULT '',
+            status TEXT DEFAULT 'new',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(user_id)
+        )
+    ''')
+    
+    # Databases created before the comment field existed
+    columns = {row[1] for row in conn.execute('PRAGMA table_info(orders)')}
+    if 'comment' not in columns:
+        conn.execute('ALTER TABLE orders ADD COLUMN comment TEXT DEFAULT ""')
+    
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS reviews (
+            review_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            rating INTEGER,
+            comment TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(user_id)
+        )
+    ''')
+
+
+def _migrate_order_indexes(conn: sqlite3.Connection):
+    """v2: indexes for the status, per-user and recency order listings"""
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_orders_status_created ON orders(status, created_at)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_orders_user_created ON orders(user_id, created_at)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_orders_created ON orders(created_at)')
+    conn.execute('ANALYZE orders')
+
+
+def _migrate_order_keyset_index(conn: sqlite3.Connection):
+    """v3: (status, order_id) index for keyset pagination by status"""
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_orders_status_id ON orders(status, order_id)')
+
+
+def _migrate_order_changes(conn: sqlite3.Connection):
+    """v4: change log for incremental order sync"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS order_changes (
+            version INTEGER PRIMARY KEY AUTOINCREMENT,
+            order_id INTEGER NOT NULL,
+            op TEXT NOT NULL
+        )
+    ''')
+
+
+def _migrate_broadcasts(conn: sqlite3.Connection):
+    """v5: resumable broadcast jobs"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS broadcasts (
+            broadcast_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            admin_chat_id INTEGER NOT NULL,
+            text TEXT NOT NULL,
+            status TEXT DEFAULT 'running',
+            cursor_user_id INTEGER DEFAULT 0,
+            sent INTEGER DEFAULT 0,
+            failed INTEGER DEFAULT 0,
+            total INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_broadcasts_status ON broadcasts(status)')
+
+
+def _migrate_bot_state(conn: sqlite3.Connection):
+    """v6: small key/value store for bot state (cached Telegram file_ids)"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS bot_state (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+
+def _migrate_notification_outbox(conn: sqlite3.Connection):
+    """v7: outbox of client notifications, drained by the bot process"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS notification_outbox (
+            outbox_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            order_id INTEGER NOT NULL,
+            status TEXT NOT NULL,
+            state TEXT DEFAULT 'pending',
+            attempts INTEGER DEFAULT 0,
+            next_attempt_at REAL DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.execute(
+        'CREATE INDEX IF NOT EXISTS idx_outbox_state_next ON notification_outbox(state, next_attempt_at)'
+    )
+
+
+def _migrate_data_versions(conn: sqlite3.Connection):
+    """v8: change counters for data without a change log (users)"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS data_versions (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    conn.execute("INSERT OR IGNORE INTO data_versions (name, version) VALUES ('users', 0)")
+
+
+# Ordered schema migrations: (version, description, callable).
+# Append new entries; never edit an applied one.
+MIGRATIONS = [
+    (1, "initial schema", _migrate_initial_schema),
+    (2, "order indexes", _migrate_order_indexes),
+    (3, "order keyset index", _migrate_order_keyset_index),
+    (4, "order change log", _migrate_order_changes),
+    (5, "broadcast jobs", _migrate_broadcasts),
+    (6, "bot state", _migrate_bot_state),
+    (7, "notification outbox", _migrate_notification_outbox),
+    (8, "data versions", _migrate_data_versions),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+STATS_QUERY = '''
+    SELECT status, COUNT(*) AS cnt FROM orders GROUP BY status
+    UNION ALL
+    SELECT '__users__', COUNT(*) FROM users
+'''
+
+
+def _empty_stats() -> Dict:
+    return {'new': 0, 'in_progress': 0, 'completed': 0, 'cancelled': 0, 'total': 0, 'users': 0}
+
+
+class StatsCache:
+    """Write-through order/user counters.
+    
+    Writers apply deltas after their transaction commits. `reconcile()`
+    replaces the counters with a fresh count, but discards the result if
+    any delta landed while it was counting, since that delta may or may
+    not be in the snapshot.
+    """
+    
+    def __init__(self, reconcile_interval: float = DB_STATS_RECONCILE_SECONDS):
+        self.reconcile_interval = reconcile_interval
+        self._lock = threading.Lock()
+        self._stats: Optional[Dict] = None
+        self._generation = 0
+        self._checked_at = 0.0
+    
+    @property
+    def generation(self) -> int:
+        return self._generation
+    
+    def is_stale(self) -> bool:
+        return self._stats is None or time.monotonic() - self._checked_at > self.reconcile_interval
+    
+    def snapshot(self) -> Optional[Dict]:
+        with self._lock:
+            return dict(self._stats) if self._stats is not None else None
+    
+    def apply(self, **deltas: int):
+        with self._lock:
+            self._generation += 1
+            if self._stats is None:
+                return
+            for key, delta in deltas.items():
+                self._stats[key] = self._stats.get(key, 0) + delta
+    
+    def move(self, old_status: str, new_status: str):
+        """Move one order between status counters"""
+        if old_status != new_status:
+            self.apply(**{old_status: -1, new_status: 1})
+    
+    def store(self, stats: Dict, generation: int) -> bool:
+        with self._lock:
+            self._checked_at = time.monotonic()
+            if generation != self._generation:
+                return False
+            if self._stats is not None and self._stats != stats:
+                logger.info(f"Stats cache reconciled: {self._stats} -> {stats}")
+            self._stats = dict(stats)
+            return True
+
+
 class Database:
     """Database handler for KanalTexService Bot"""
     
-    def __init__(self, db_path: str = "botdata.db"):
+    def __init__(self, db_path: str = "botdata.db", pool_size: int = DB_POOL_SIZE,
+                 stats_cache: bool = DB_STATS_CACHE):
         self.db_path = db_path
+        self.pool = ConnectionPool(
+            db_path,
+            max_size=pool_size,
+            timeout=DB_POOL_TIMEOUT,
+            on_connect=self._configure_connection
+        )
+        self.stats_cache = StatsCache() if stats_cache else None
+        # Publish order events in-process; OrderChangeRelay turns this off
+        # and publishes from the change log instead
+        self.publish_events = True
         self.init_db()
+        if self.stats_cache is not None:
+            self.reconcile_stats()
     
     def get_connection(self):
-        """Get database connection"""
-        conn = sqlite3.connect(self.db_path)
+        """Get a new, unpooled database connection (caller must close it)"""
+        conn = sqlite3.connect(self.db_path, timeout=DB_BUSY_TIMEOUT_MS / 1000)
         conn.row_factory = sqlite3.Row
+        self._configure_connection(conn)
         return conn
     
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a pooled connection; commits on success, rolls back on error"""
+        with self.pool.connection() as conn:
+            yield conn
+    
+    def close(self):
+        """Close pooled connections"""
+        self.pool.close()
+    
+    def _configure_connection(self, conn: sqlite3.Connection):
+        """Apply journaling and performance pragmas to a new connection"""
+        conn.execute(f'PRAGMA busy_timeout = {DB_BUSY_TIMEOUT_MS}')
+        conn.execute(f'PRAGMA journal_mode = {DB_JOURNAL_MODE}')
+        conn.execute(f'PRAGMA synchronous = {DB_SYNCHRONOUS}')
+        conn.execute(f'PRAGMA cache_size = {-DB_CACHE_SIZE_KB}')
+        conn.execute(f'PRAGMA mmap_size = {DB_MMAP_SIZE}')
+        conn.execute('PRAGMA temp_store = MEMORY')
+    
+    def ping(self):
+        """Borrow a connection and read the schema page; raises if the database is unusable"""
+        with self.connection() as conn:
+            conn.execute('SELECT 1 FROM sqlite_master LIMIT 1').fetchall()
+    
+    def get_schema_version(self) -> int:
+        """Get applied schema version (PRAGMA user_version)"""
+        with self.connection() as conn:
+            return conn.execute('PRAGMA user_version').fetchone()[0]
+    
     def init_db(self):
-        """Initialize database tables"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        """Initialize database tables by applying pending migrations"""
+        if self.get_schema_version() >= SCHEMA_VERSION:
+            logger.debug("Database schema is current (v%s)", SCHEMA_VERSION)
+            return
         
-        # Users table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                user_id INTEGER PRIMARY KEY,
-                username TEXT,
-                first_name TEXT,
-                last_name TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Orders table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS orders (
-                order_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                service_type TEXT,
-                address TEXT,
-                phone TEXT,
-                comment TEXT DEFAULT '',
-                status TEXT DEFAULT 'new',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users(user_id)
-            )
-        ''')
-        
-        # Add comment column if not exists (migration)
-        try:
-            cursor.execute('ALTER TABLE orders ADD COLUMN comment TEXT DEFAULT ""')
-        except sqlite3.OperationalError:
-            pass  # Column already exists
-        
-        # Reviews table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS reviews (
-                review_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                rating INTEGER,
-                comment TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users(user_id)
-            )
-        ''')
+        with self.connection() as conn:
+            # Take the write lock before re-reading the version so that
+            # concurrent processes don't apply the same migration twice
+            conn.execute('BEGIN IMMEDIATE')
+            current = conn.execute('PRAGMA user_version').fetchone()[0]
+            for version, description, migrate in MIGRATIONS:
+                if version <= current:
+                    continue
+                logger.info(f"🔄 Migration v{version}: {description}")
+                migrate(conn)
+                conn.execute(f'PRAGMA user_version = {version}')
         
-        conn.commit()
-        conn.close()
         logger.info("✅ Database initialized")
     
     def add_user(self, user_id: int, username: str = None, first_name: str = None, last_name: str = None):
         """Add or update user"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        with self.connection() as conn:
+            is_new = conn.execute('SELECT 1 FROM users WHERE user_id = ?', (user_id,)).fetchone() is None
+            conn.execute('''
+                INSERT OR REPLACE INTO users (user_id, username, first_name, last_name)
+                VALUES (?, ?, ?, ?)
+            ''', (user_id, username, first_name, last_name))
+            if is_new:
+                conn.execute("UPDATE data_versions SET version = version + 1 WHERE name = 'users'")
         
-        cursor.execute('''
-            INSERT OR REPLACE INTO users (user_id, username, first_name, last_name)
-            VALUES (?, ?, ?, ?)
-        ''', (user_id, username, first_name, last_name))
-        
-        conn.commit()
-        conn.close()
+        if is_new and self.stats_cache is not None:
+            self.stats_cache.apply(users=1)
     
     def get_user_orders(self, user_id: int) -> List[Dict]:
         """Get user's orders"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT * FROM orders WHERE user_id = ? ORDER BY created_at DESC
-        ''', (user_id,))
-        
-        orders = [dict(row) for row in cursor.fetchall()]
-        conn.close()
-        return orders
+        with self.connection() as conn:
+            cursor = conn.execute('''
+                SELECT * FROM orders WHERE user_id = ? ORDER BY created_at DESC
+            ''', (user_id,))
+            return [dict(row) for row in cursor.fetchall()]
+    
+    def _record_order_change(self, conn: sqlite3.Connection, order_id: int, op: str) -> int:
+        """Append to the order change log in the caller's transaction; returns the new version"""
+        version = conn.execute(
+            'INSERT INTO order_changes (order_id, op) VALUES (?, ?)', (order_id, op)
+        ).lastrowid
+        if version % ORDER_CHANGES_PRUNE_EVERY == 0:
+            conn.execute('DELETE FROM order_changes WHERE version <= ?', (version - ORDER_CHANGES_KEEP,))
+        return version
+    
+    def _fetch_order_for_event(self, conn: sqlite3.Connection, order_id: int) -> Optional[Dict]:
+        """Read the written row for event subscribers; skipped when nobody listens"""
+        if not self.publish_events or not order_events.has_subscribers:
+            return None
+        row = conn.execute('SELECT * FROM orders WHERE order_id = ?', (order_id,)).fetchone()
+        return dict(row) if row else None
     
     def create_order(self, user_id: int, service_type: str, address: str, phone: str, comment: str = '') -> int:
         """Create new order"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO orders (user_id, service_type, address, phone, comment, status)
-            VALUES (?, ?, ?, ?, ?, 'new')
-        ''', (user_id, service_type, address, phone, comment))
+        with self.connection() as conn:
+            cursor = conn.execute('''
+                INSERT INTO orders (user_id, service_type, address, phone, comment, status)
+                VALUES (?, ?, ?, ?, ?, 'new')
+            ''', (user_id, service_type, address, phone, comment))
+            order_id = cursor.lastrowid
+            version = self._record_order_change(conn, order_id, 'insert')
+            order = self._fetch_order_for_event(conn, order_id)
         
-        conn.commit()
-        order_id = cursor.lastrowid
-        conn.close()
+        if self.stats_cache is not None:
+            self.stats_cache.apply(new=1, total=1)
+        if order is not None:
+            order_events.publish('order_created', version=version, order_id=order_id, order=order)
         return order_id
     
-    def update_order_status(self, order_id: int, status: str):
-        """Update order status"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+    def update_order_status(self, order_id: int, status: str, notify: bool = False):
+        """Update order status
         
-        cursor.execute('''
-            UPDATE orders SET status = ?, updated_at = CURRENT_TIMESTAMP WHERE order_id = ?
-        ''', (status, order_id))
+        With notify=True a client notification is queued in the outbox in
+        the same transaction, so it is sent exactly when the update commits.
+        """
+        with self.connection() as conn:
+            row = conn.execute('SELECT status, user_id FROM orders WHERE order_id = ?', (order_id,)).fetchone()
+            if row is None:
+                return
+            conn.execute('''
+                UPDATE orders SET status = ?, updated_at = CURRENT_TIMESTAMP WHERE order_id = ?
+            ''', (status, order_id))
+            version = self._record_order_change(conn, order_id, 'update')
+            if notify and row['user_id']:
+                conn.execute(
+                    'INSERT INTO notification_outbox (user_id, order_id, status) VALUES (?, ?, ?)',
+                    (row['user_id'], order_id, status)
+                )
+            order = self._fetch_order_for_event(conn, order_id)
         
-        conn.commit()
-        conn.close()
+        if self.stats_cache is not None:
+            self.stats_cache.move(row['status'], status)
+        if order is not None:
+            order_events.publish('order_status_changed', version=version, order_id=order_id, order=order)
+    
+    def get_orders_version(self) -> int:
+        """Get the current order change version (0 if nothing changed yet)"""
+        with self.connection() as conn:
+            return conn.execute('SELECT COALESCE(MAX(version), 0) FROM order_changes').fetchone()[0]
+    
+    def get_order_changes(self, since: int, limit: int = 500) -> Dict:
+        """Get orders inserted, updated or deleted after version `since`
+        
+        Returns {"version", "inserted", "updated", "deleted", "reset"}.
+        `reset` is True when the change log no longer covers `since` or more
+        than `limit` orders changed; the caller should then reload from scratch.
+        """
+        result = {"version": since, "inserted": [], "updated": [], "deleted": [], "reset": False}
+        with self.connection() as conn:
+            current = conn.execute('SELECT COALESCE(MAX(version), 0) FROM order_changes').fetchone()[0]
+            result["version"] = current
+            if since >= current:
+                result["reset"] = since > current
+                return result
+            
+            oldest = conn.execute('SELECT MIN(version) FROM order_changes').fetchone()[0]
+            if since < oldest - 1:
+                result["reset"] = True
+                return result
+            
+            changes = conn.execute(
+                'SELECT version, order_id, op FROM order_changes WHERE version > ? ORDER BY version LIMIT ?',
+                (since, limit * 4 + 1)
+            ).fetchall()
+            inserted_ids = set()
+            changed_ids = {}
+            for row in changes:
+                changed_ids[row['order_id']] = row['version']
+                if row['op'] == 'insert':
+                    inserted_ids.add(row['order_id'])
+            if len(changes) > limit * 4 or len(changed_ids) > limit:
+                result["reset"] = True
+                return result
+            
+            placeholders = ','.join('?' * len(changed_ids))
+            cursor = conn.execute(
+                f'SELECT * FROM orders WHERE order_id IN ({placeholders})', list(changed_ids)
+            )
+            existing = {row['order_id']: dict(row) for row in cursor.fetchall()}
+        
+        for order_id in sorted(changed_ids, reverse=True):
+            order = existing.get(order_id)
+            if order is None:
+                result["deleted"].append(order_id)
+            elif order_id in inserted_ids:
+                result["inserted"].append(order)
+            else:
+                result["updated"].append(order)
+        return result
     
     def get_all_orders(self) -> List[Dict]:
         """Get all orders"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        cursor.execute('SELECT * FROM orders ORDER BY created_at DESC')
-        orders = [dict(row) for row in cursor.fetchall()]
-        conn.close()
-        return orders
+        with self.connection() as conn:
+            cursor = conn.execute('SELECT * FROM orders ORDER BY created_at DESC')
+            return [dict(row) for row in cursor.fetchall()]
     
     def get_orders_by_status(self, status: str) -> List[Dict]:
         """Get orders by status"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        cursor.execute('SELECT * FROM orders WHERE status = ? ORDER BY created_at DESC', (status,))
-        orders = [dict(row) for row in cursor.fetchall()]
-        conn.close()
-        return orders
+        with self.connection() as conn:
+            cursor = conn.execute('SELECT * FROM orders WHERE status = ? ORDER BY created_at DESC', (status,))
+            return [dict(row) for row in cursor.fetchall()]
     
-    def get_stats(self) -> Dict:
-        """Get order statistics"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+    def get_orders_page(self, status: Optional[str] = None, before_id: Optional[int] = None,
+                        limit: int = 50) -> List[Dict]:
+        """Get a page of orders, newest first, using keyset pagination on order_id"""
+        conditions = []
+        params = []
+        if status:
+            conditions.append('status = ?')
+            params.append(status)
+        if before_id is not None:
+            conditions.append('order_id < ?')
+            params.append(before_id)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        params.append(limit)
         
-        stats = {'new': 0, 'in_progress': 0, 'completed': 0, 'cancelled': 0, 'total': 0}
-        cursor.execute('SELECT status, COUNT(*) as cnt FROM orders GROUP BY status')
-        for row in cursor.fetchall():
-            stats[row['status']] = row['cnt']
-        
-        cursor.execute('SELECT COUNT(*) as total FROM orders')
-        stats['total'] = cursor.fetchone()['total']
-        
-        conn.close()
+        with self.connection() as conn:
+            cursor = conn.execute(f'SELECT * FROM orders {where} ORDER BY order_id DESC LIMIT ?', params)
+            return [dict(row) for row in cursor.fetchall()]
+    
+    def _count_stats(self) -> Dict:
+        """Count orders per status, total and users in one query"""
+        stats = _empty_stats()
+        with self.connection() as conn:
+            for row in conn.execute(STATS_QUERY).fetchall():
+                if row['status'] == '__users__':
+                    stats['users'] = row['cnt']
+                else:
+                    stats[row['status']] = row['cnt']
+                    stats['total'] += row['cnt']
         return stats
     
+    def reconcile_stats(self) -> Dict:
+        """Recount statistics and refresh the counter cache"""
+        if self.stats_cache is None:
+            return self._count_stats()
+        generation = self.stats_cache.generation
+        stats = self._count_stats()
+        self.stats_cache.store(stats, generation)
+        return stats
+    
+    def get_stats(self) -> Dict:
+        """Get order statistics (per status, total and users)"""
+        if self.stats_cache is None:
+            return self._count_stats()
+        if self.stats_cache.is_stale():
+            return self.reconcile_stats()
+        return self.stats_cache.snapshot()
+    
     def get_users_count(self) -> int:
         """Get total users count"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        cursor.execute('SELECT COUNT(*) as cnt FROM users')
-        count = cursor.fetchone()['cnt']
-        conn.close()
-        return count
+        if self.stats_cache is not None and not self.stats_cache.is_stale():
+            return self.stats_cache.snapshot()['users']
+        with self.connection() as conn:
+            return conn.execute('SELECT COUNT(*) as cnt FROM users').fetchone()['cnt']
+    
+    def get_users_version(self) -> int:
+        """Get a counter bumped whenever a new user is added (cheap cache key)"""
+        with self.connection() as conn:
+            row = conn.execute("SELECT version FROM data_versions WHERE name = 'users'").fetchone()
+        return row['version'] if row else 0
     
     def get_order_by_id(self, order_id: int) -> Optional[Dict]:
         """Get order by ID"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        cursor.execute('SELECT * FROM orders WHERE order_id = ?', (order_id,))
-        row = cursor.fetchone()
-        conn.close()
+        with self.connection() as conn:
+            row = conn.execute('SELECT * FROM orders WHERE order_id = ?', (order_id,)).fetchone()
         return dict(row) if row else None
     
     def get_all_users(self) -> List[Dict]:
         """Get all users"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        cursor.execute('SELECT * FROM users')
-        users = [dict(row) for row in cursor.fetchall()]
-        conn.close()
-        return users
+        with self.connection() as conn:
+            cursor = conn.execute('SELECT * FROM users')
+            return [dict(row) for row in cursor.fetchall()]
     
     def delete_order(self, order_id: int):
         """Delete order"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        cursor.execute('DELETE FROM orders WHERE order_id = ?', (order_id,))
-        conn.commit()
-        conn.close()
+        with self.connection() as conn:
+            row = conn.execute('SELECT status FROM orders WHERE order_id = ?', (order_id,)).fetchone()
+            if row is None:
+                return
+            conn.execute('DELETE FROM orders WHERE order_id = ?', (order_id,))
+            version = self._record_order_change(conn, order_id, 'delete')
+        
+        if self.stats_cache is not None:
+            self.stats_cache.apply(**{row['status']: -1, 'total': -1})
+        if self.publish_events:
+            order_events.publish('order_deleted', version=version, order_id=order_id)
+    
+    def get_user_ids_after(self, after_user_id: int = 0, limit: int = 200) -> List[int]:
+        """Get the next chunk of user IDs in ascending order (keyset pagination)"""
+        with self.connection() as conn:
+            cursor = conn.execute(
+                'SELECT user_id FROM users WHERE user_id > ? ORDER BY user_id LIMIT ?',
+                (after_user_id, limit)
+            )
+            return [row['user_id'] for row in cursor.fetchall()]
+    
+    def create_broadcast(self, admin_chat_id: int, text: str, total: int) -> int:
+        """Create a broadcast job"""
+        with self.connection() as conn:
+            cursor = conn.execute(
+                'INSERT INTO broadcasts (admin_chat_id, text, total) VALUES (?, ?, ?)',
+                (admin_chat_id, text, total)
+            )
+            return cursor.lastrowid
+    
+    def update_broadcast(self, broadcast_id: int, cursor_user_id: int, sent: int, failed: int,
+                         status: str = 'running'):
+        """Persist broadcast progress"""
+        with self.connection() as conn:
+            conn.execute('''
+                UPDATE broadcasts
+                SET cursor_user_id = ?, sent = ?, failed = ?, status = ?, updated_at = CURRENT_TIMESTAMP
+                WHERE broadcast_id = ?
+            ''', (cursor_user_id, sent, failed, status, broadcast_id))
+    
+    def get_broadcast(self, broadcast_id: int) -> Optional[Dict]:
+        """Get broadcast job by ID"""
+        with self.connection() as conn:
+            row = conn.execute('SELECT * FROM broadcasts WHERE broadcast_id = ?', (broadcast_id,)).fetchone()
+        return dict(row) if row else None
+    
+    def get_running_broadcasts(self) -> List[Dict]:
+        """Get broadcast jobs interrupted before completion"""
+        with self.connection() as conn:
+            cursor = conn.execute(
+                "SELECT * FROM broadcasts WHERE status = 'running' ORDER BY broadcast_id"
+            )
+            return [dict(row) for row in cursor.fetchall()]
+    
+    def get_state(self, key: str) -> Optional[str]:
+        """Get a bot state value"""
+        with self.connection() as conn:
+            row = conn.execute('SELECT value FROM bot_state WHERE key = ?', (key,)).fetchone()
+        return row['value'] if row else None
+    
+    def set_state(self, key: str, value: str):
+        """Store a bot state value"""
+        with self.connection() as conn:
+            conn.execute('''
+                INSERT INTO bot_state (key, value) VALUES (?, ?)
+                ON CONFLICT(key) DO UPDATE SET value = excluded.value, updated_at = CURRENT_TIMESTAMP
+            ''', (key, value))
+    
+    def delete_state(self, key: str):
+        """Remove a bot state value"""
+        with self.connection() as conn:
+            conn.execute('DELETE FROM bot_state WHERE key = ?', (key,))
+    
+    def get_due_notifications(self, limit: int = 50, now: Optional[float] = None) -> List[Dict]:
+        """Get pending outbox notifications whose next attempt is due, earliest due first"""
+        now = time.time() if now is None else now
+        with self.connection() as conn:
+            cursor = conn.execute('''
+                SELECT * FROM notification_outbox
+                WHERE state = 'pending' AND next_attempt_at <= ?
+                ORDER BY next_attempt_at, outbox_id LIMIT ?
+            ''', (now, limit))
+            return [dict(row) for row in cursor.fetchall()]
+    
+    def get_next_notification_at(self) -> Optional[float]:
+        """Get the earliest scheduled attempt among pending notifications"""
+        with self.connection() as conn:
+            return conn.execute(
+                "SELECT MIN(next_attempt_at) FROM notification_outbox WHERE state = 'pending'"
+            ).fetchone()[0]
+    
+    def mark_notifications_sent(self, outbox_ids: List[int]):
+        """Remove delivered notifications from the outbox"""
+        if not outbox_ids:
+            return
+        with self.connection() as conn:
+            conn.executemany(
+                'DELETE FROM notification_outbox WHERE outbox_id = ?', [(i,) for i in outbox_ids]
+            )
+    
+    def fail_notifications(self, outbox_ids: List[int]):
+        """Give up on notifications Telegram rejected for good (state 'failed')"""
+        if not outbox_ids:
+            return
+        with self.connection() as conn:
+            conn.executemany('''
+                UPDATE notification_outbox SET attempts = attempts + 1, state = 'failed'
+                WHERE outbox_id = ?
+            ''', [(i,) for i in outbox_ids])
+    
+    def reschedule_notifications(self, retries: List[Tuple[int, Optional[float]]]):
+        """Record a failed attempt for each (outbox_id, next_attempt_at)
+        
+        next_attempt_at=None gives up on the notification (state 'dead').
+        """
+        if not retries:
+            return
+        with self.connection() as conn:
+            conn.executemany('''
+                UPDATE notification_outbox
+                SET attempts = attempts + 1,
+                    state = CASE WHEN ? IS NULL THEN 'dead' ELSE 'pending' END,
+                    next_attempt_at = COALESCE(?, next_attempt_at)
+                WHERE outbox_id = ?
+            ''', [(next_at, next_at, outbox_id) for outbox_id, next_at in retries])
     
     def get_user_by_id(self, user_id: int) -> Optional[Dict]:
         """Get user by ID"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        cursor.execute('SELECT * FROM users WHERE user_id = ?', (user_id,))
-        row = cursor.fetchone()
-        conn.close()
+        with self.connection() as conn:
+            row = conn.execute('SELECT * FROM users WHERE user_id = ?', (user_id,)).fetchone()
         return dict(row) if row else None
+
+
+DB_QUERY_SECONDS = histogram('db_query_seconds', 'Database method latency', ['method'])
+
+# Plumbing, not queries: left unwrapped
+UNINSTRUMENTED_METHODS = {'get_connection', 'connection', 'close'}
+
+
+if METRICS_ENABLED:
+    for _name, _method in list(vars(Database).items()):
+        if not _name.startswith('_') and _name not in UNINSTRUMENTED_METHODS and callable(_method):
+            setattr(Database, _name, DB_QUERY_SECONDS.labels(_name).wrap(_method))
+
+
+_shared_db: Optional[Database] = None
+_shared_db_lock = threading.Lock()
+
+
+def get_database() -> Database:
+    """Get the process-wide Database, creating it (and running migrations) on first use"""
+    global _shared_db
+    if _shared_db is None:
+        with _shared_db_lock:
+            if _shared_db is None:
+                _shared_db = Database()
+    return _shared_db
@@ -0,0 +1,169 @@
+"""In-process publish/subscribe bus for order events.
+
+Both the asyncio bot loop and Flask request threads publish here; ``publish``
+never blocks, so it is safe to call from a coroutine. Every subscriber gets
+its own bounded queue: when a slow consumer falls behind, new events are
+dropped for it and the subscription is flagged ``overflowed`` so it can
+resynchronise instead of growing memory.
+
+With several processes writing (gunicorn workers and the bot), in-process
+events only cover the local process: ``OrderChangeRelay`` then feeds the bus
+from the database change log instead, so every worker sees every change.
+"""
+import logging
+import os
+import queue
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
+
+if TYPE_CHECKING:
+    from app.models.database import Database
+
+logger = logging.getLogger(__name__)
+
+# How often the relay checks the order change log (seconds)
+ORDER_RELAY_POLL_SECONDS = float(os.getenv("ORDER_RELAY_POLL_SECONDS", "1"))
+
+
+class TooManySubscribersError(RuntimeError):
+    """Raised when the bus already has the maximum number of subscribers"""
+
+
+class Subscription:
+    """Bounded event queue of a single subscriber."""
+
+    def __init__(self, bus: 'EventBus', maxsize: int):
+        self._bus = bus
+        self._queue: 'queue.Queue[Dict[str, Any]]' = queue.Queue(maxsize)
+        self.overflowed = False
+        self.dropped = 0
+
+    def put(self, event: Dict[str, Any]):
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self.overflowed = True
+            self.dropped += 1
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Wait for the next event; returns None on timeout"""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def reset_overflow(self):
+        """Drop queued events after the consumer has resynchronised"""
+        self.overflowed = False
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+
+    def close(self):
+        self._bus.unsubscribe(self)
+
+    def __enter__(self) -> 'Subscription':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class EventBus:
+    """Fan-out of events to bounded per-subscriber queues."""
+
+    def __init__(self, queue_size: int = 100, max_subscribers: Optional[int] = None):
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self._lock = threading.Lock()
+        # Copy-on-write tuple: publishers iterate it without taking the lock
+        self._subscribers: Tuple[Subscription, ...] = ()
+
+    @property
+    def has_subscribers(self) -> bool:
+        return bool(self._subscribers)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self) -> Subscription:
+        subscription = Subscription(self, self.queue_size)
+        with self._lock:
+            if self.max_subscribers is not None and len(self._subscribers) >= self.max_subscribers:
+                raise TooManySubscribersError(f"Subscriber limit {self.max_subscribers} reached")
+            self._subscribers = self._subscribers + (subscription,)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            self._subscribers = tuple(s for s in self._subscribers if s is not subscription)
+
+    def publish(self, event_type: str, **data: Any):
+        subscribers = self._subscribers
+        if not subscribers:
+            return
+        event = {"type": event_type, "ts": time.time(), **data}
+        for subscription in subscribers:
+            subscription.put(event)
+
+
+# Order created / status changed / deleted events, published by Database
+order_events = EventBus()
+
+
+class OrderChangeRelay(threading.Thread):
+    """Publishes order changes from the database change log to a bus
+    
+    Once started it replaces the in-process publishing of ``db``, including
+    changes made by this process, so events are not delivered twice. The log
+    is only read while the bus has subscribers; the version check alone is a
+    primary-key lookup.
+    """
+    
+    def __init__(self, db: 'Database', bus: EventBus = order_events,
+                 interval: float = ORDER_RELAY_POLL_SECONDS):
+        super().__init__(name="order-change-relay", daemon=True)
+        self.db = db
+        self.bus = bus
+        self.interval = interval
+        self._stop_event = threading.Event()
+    
+    def start(self):
+        self.db.publish_events = False
+        super().start()
+    
+    def run(self):
+        version = None
+        while not self._stop_event.wait(self.interval):
+            try:
+                version = self.relay(version)
+            except Exception as e:
+                logger.warning(f"Order change relay failed: {e}")
+    
+    def relay(self, version: Optional[int]) -> int:
+        """Publish changes after ``version``; returns the version relayed up to"""
+        # Read the version before looking for subscribers: a stream that
+        # subscribes afterwards replays from the database past this version
+        current = self.db.get_orders_version()
+        if version is None or current == version or not self.bus.has_subscribers:
+            return current
+        
+        changes = self.db.get_order_changes(version)
+        current = changes["version"]
+        if changes["reset"]:
+            self.bus.publish('resync', version=current)
+            return current
+        for order in changes["inserted"]:
+            self.bus.publish('order_created', version=current, order_id=order['order_id'], order=order)
+        for order in changes["updated"]:
+            self.bus.publish('order_status_changed', version=current, order_id=order['order_id'], order=order)
+        for order_id in changes["deleted"]:
+            self.bus.publish('order_deleted', version=current, order_id=order_id)
+        return current
+    
+    def stop(self):
+        self._stop_event.set()
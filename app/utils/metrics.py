@@ -0,0 +1,296 @@
+"""Счётчики и гистограммы в текстовом формате Prometheus (GET /metrics).
+
+Без внешних зависимостей. Дочерняя метрика (набор значений меток)
+создаётся один раз; каждый поток пишет в свою копию её значений без
+блокировок, общий реестр на горячем пути не трогается. Дочерние метрики
+удобно получить заранее и держать в переменной::
+
+    QUERY_SECONDS = histogram('db_query_seconds', 'Время запроса', ['method'])
+    child = QUERY_SECONDS.labels('get_order_by_id')
+    child.observe(0.002)
+
+METRICS_ENABLED=0 отключает инструментирование там, где оно ставится
+обёртками (методы Database, запросы к Telegram).
+"""
+import functools
+import os
+import threading
+import time
+import weakref
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Семейство метрик: {"name", "type", "help", "samples": [(имя, {метки}, значение)]}
+Family = Dict
+
+
+class _Sharded:
+    """Значения по потокам: каждый поток пишет только в свой список, поэтому
+    горячий путь обходится без блокировок; при сборе списки суммируются.
+    Список завершившегося потока прибавляется к общему итогу и удаляется —
+    сервер, создающий поток на запрос, не копит их без конца."""
+
+    __slots__ = ('_local', '_shards', '_lock', '_size', '_retired')
+
+    def __init__(self, size: int):
+        self._local = threading.local()
+        self._shards: List[list] = []
+        self._lock = threading.Lock()
+        self._size = size
+        # Сумма списков завершившихся потоков
+        self._retired = [0] * size
+
+    def _shard(self) -> list:
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = [0] * self._size
+            # Данные threading.local удаляются с завершением потока, вместе
+            # с ними и этот маркер — тогда финализатор переносит список в итог
+            owner = self._local.owner = _ShardOwner()
+            with self._lock:
+                self._shards.append(shard)
+            weakref.finalize(owner, self._retire, shard)
+            return shard
+
+    def _retire(self, shard: list):
+        with self._lock:
+            for i, value in enumerate(shard):
+                self._retired[i] += value
+            self._shards = [s for s in self._shards if s is not shard]
+
+    def _total(self) -> list:
+        with self._lock:
+            total = list(self._retired)
+            for shard in self._shards:
+                for i, value in enumerate(shard):
+                    total[i] += value
+        return total
+
+
+class _ShardOwner:
+    """Маркер, живущий столько же, сколько поток-владелец списка."""
+
+    __slots__ = ('__weakref__',)
+
+
+class _CounterChild(_Sharded):
+    __slots__ = ()
+
+    def __init__(self):
+        super().__init__(1)
+
+    def inc(self, amount: float = 1.0):
+        self._shard()[0] += amount
+
+    @property
+    def value(self) -> float:
+        return self._total()[0]
+
+
+class _HistogramChild(_Sharded):
+    __slots__ = ('bounds',)
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        # Ячейки по границам, ячейка +Inf и в конце сумма значений
+        super().__init__(len(bounds) + 2)
+        self.bounds = bounds
+
+    def observe(self, value: float):
+        try:
+            shard = self._local.shard
+        except AttributeError:
+            shard = self._shard()
+        shard[bisect_left(self.bounds, value)] += 1
+        shard[-1] += value
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+    def wrap(self, func: Callable) -> Callable:
+        """Обёртка, замеряющая каждый вызов func (observe встроен — без лишнего вызова)."""
+        local = self._local
+        bounds = self.bounds
+        get_shard = self._shard
+        perf_counter = time.perf_counter
+
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            started = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = perf_counter() - started
+                try:
+                    shard = local.shard
+                except AttributeError:
+                    shard = get_shard()
+                shard[bisect_left(bounds, elapsed)] += 1
+                shard[-1] += elapsed
+        return timed
+
+    def snapshot(self) -> Tuple[List[int], float]:
+        total = self._total()
+        return total[:-1], total[-1]
+
+
+class _Metric:
+    type = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._by_values: Dict[tuple, object] = {}
+        self._lock = threading.Lock()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values):
+        # Поиск по исходным значениям: без приведения к str на горячем пути
+        child = self._by_values.get(values)
+        if child is None:
+            key = tuple(str(value) for value in values)
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {key}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+                self._by_values[values] = child
+        return child
+
+    def _label_dict(self, key: Tuple[str, ...]) -> Dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+    def collect(self) -> Family:
+        return {"name": self.name, "type": self.type, "help": self.documentation,
+                "samples": self._samples()}
+
+    def _samples(self) -> List[Tuple[str, Dict[str, str], float]]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    type = 'counter'
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0):
+        self.labels().inc(amount)
+
+    def _samples(self):
+        return [(f"{self.name}_total", self._label_dict(key), child.value)
+                for key, child in list(self._children.items())]
+
+
+class Histogram(_Metric):
+    type = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        self.labels().observe(value)
+
+    def _samples(self):
+        samples = []
+        for key, child in list(self._children.items()):
+            labels = self._label_dict(key)
+            counts, total = child.snapshot()
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                samples.append((f"{self.name}_bucket", dict(labels, le=_format_value(bound)), cumulative))
+            samples.append((f"{self.name}_sum", labels, total))
+            samples.append((f"{self.name}_count", labels, cumulative))
+        return samples
+
+
+class Registry:
+    """Набор метрик процесса."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"Metric {metric.name} is already registered differently")
+                return existing
+            self._metrics[metric.name] = metric
+        return metric
+
+    def collect(self) -> List[Family]:
+        return [metric.collect() for metric in list(self._metrics.values())]
+
+
+REGISTRY = Registry()
+
+
+def counter(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+    return REGISTRY.register(Counter(name, documentation, labelnames))
+
+
+def histogram(name: str, documentation: str, labelnames: Sequence[str] = (),
+              buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+    return REGISTRY.register(Histogram(name, documentation, labelnames, buckets))
+
+
+def merge_families(groups: Sequence[Tuple[List[Family], Optional[Dict[str, str]]]]) -> List[Family]:
+    """Объединить метрики нескольких процессов; extra-метки отличают процесс."""
+    merged: Dict[str, Family] = {}
+    for families, extra in groups:
+        for family in families:
+            target = merged.setdefault(family["name"], dict(family, samples=[]))
+            for name, labels, value in family["samples"]:
+                target["samples"].append((name, dict(labels, **extra) if extra else labels, value))
+    return list(merged.values())
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, int):
+        return str(value)
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return f"{value:.1f}"
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def render(families: Optional[List[Family]] = None) -> str:
+    """Текстовый формат Prometheus 0.0.4."""
+    lines = []
+    for family in REGISTRY.collect() if families is None else families:
+        lines.append(f"# HELP {family['name']} {_escape(family['help'])}")
+        lines.append(f"# TYPE {family['name']} {family['type']}")
+        for name, labels, value in family["samples"]:
+            if labels:
+                label_text = ','.join(f'{key}="{_escape(str(val))}"' for key, val in labels.items())
+                lines.append(f"{name}{{{label_text}}} {_format_value(value)}")
+            else:
+                lines.append(f"{name} {_format_value(value)}")
+    return '\n'.join(lines) + '\n'
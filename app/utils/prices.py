@@ -1,6 +1,23 @@
 """Price utilities for KanalTexService Bot"""
+import json
+import os
+from functools import lru_cache
 
-def load_prices_from_json():
-    """Load prices from JSON file"""
-    # Prices are embedded in the bot_handler.py for now
-    pass
+CATALOG_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'config', 'catalog.json')
+
+CATALOG_SECTIONS = ('services', 'prices', 'price_note', 'faq', 'statuses')
+
+
+@lru_cache(maxsize=None)
+def load_prices_from_json(path: str = CATALOG_PATH) -> dict:
+    """Load the service/price/FAQ catalog from JSON (read once per path)."""
+    with open(path, encoding='utf-8') as f:
+        catalog = json.load(f)
+
+    missing = [section for section in CATALOG_SECTIONS if section not in catalog]
+    if missing:
+        raise ValueError(f"Catalog {path} is missing sections: {', '.join(missing)}")
+    unknown = set(catalog['prices']) - set(catalog['services'])
+    if unknown:
+        raise ValueError(f"Prices reference unknown services: {', '.join(sorted(unknown))}")
+    return catalog
@@ -0,0 +1,108 @@
+"""Профиль запуска: время импортов и фаз (флаг --profile-startup).
+
+Импорты замеряются обёрткой над builtins.__import__: собственное время
+первой загрузки модуля (без вложенных импортов) суммируется по пакету
+верхнего уровня — видно, сколько стоят telegram, flask или app.
+"""
+import asyncio
+import builtins
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Tuple
+
+REPORT_TOP_IMPORTS = 15
+
+
+class StartupProfiler:
+    """Замер фаз запуска и импортов; выключенный ничего не делает."""
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.started = time.perf_counter()
+        self.phases: List[Tuple[str, float, float]] = []
+        self.imports: Dict[str, float] = {}
+        # Стек вложенных импортов — свой у каждого потока
+        self._local = threading.local()
+        self._original_import = None
+        if enabled:
+            self._install_import_hook()
+
+    def _install_import_hook(self):
+        original = self._original_import = builtins.__import__
+        local = self._local
+        imports = self.imports
+
+        def timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+            if level or name in sys.modules:
+                return original(name, globals, locals, fromlist, level)
+            stack = local.__dict__.setdefault('stack', [])
+            # Время вложенных импортов вычитается из родительского
+            stack.append(0.0)
+            started = time.perf_counter()
+            try:
+                return original(name, globals, locals, fromlist, level)
+            finally:
+                elapsed = time.perf_counter() - started
+                nested = stack.pop()
+                if stack:
+                    stack[-1] += elapsed
+                top = name.partition('.')[0]
+                imports[top] = imports.get(top, 0.0) + elapsed - nested
+
+        builtins.__import__ = timed_import
+
+    def uninstall(self):
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Замерить фазу запуска."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            if self.enabled:
+                self.phases.append((name, started - self.started, time.perf_counter() - started))
+
+    def mark(self, name: str):
+        """Отметить момент (например, готовность бота) от начала запуска."""
+        if self.enabled:
+            self.phases.append((name, time.perf_counter() - self.started, 0.0))
+
+    def report(self) -> str:
+        lines = ["⏱️ Профиль запуска", "  Фазы (начало, длительность):"]
+        for name, offset, duration in self.phases:
+            lines.append(f"    {offset * 1000:8.1f} мс  {duration * 1000:8.1f} мс  {name}")
+        lines.append(f"  Импорты (первые {REPORT_TOP_IMPORTS} по времени):")
+        ranked = sorted(self.imports.items(), key=lambda item: item[1], reverse=True)
+        for name, seconds in ranked[:REPORT_TOP_IMPORTS]:
+            lines.append(f"    {seconds * 1000:8.1f} мс  {name}")
+        lines.append(f"  Всего: {(time.perf_counter() - self.started) * 1000:.1f} мс")
+        return "\n".join(lines)
+
+    def print_report(self):
+        """Вывести отчёт в stderr и снять обёртку импортов."""
+        if not self.enabled:
+            return
+        self.uninstall()
+        print(self.report(), file=sys.stderr, flush=True)
+
+
+async def run_bot(bot, web, profiler: StartupProfiler):
+    """Работа бота; по готовности бота (и веб-панели web) — отчёт профиля."""
+    task = asyncio.create_task(bot.run())
+    ready = asyncio.create_task(bot.started.wait())
+    await asyncio.wait({task, ready}, return_when=asyncio.FIRST_COMPLETED)
+    if bot.started.is_set():
+        profiler.mark("бот принимает обновления")
+        if profiler.enabled and web is not None:
+            if await asyncio.get_running_loop().run_in_executor(None, web.ready.wait, 10):
+                profiler.mark("веб-панель слушает порт")
+        profiler.print_report()
+    else:
+        ready.cancel()
+    await task
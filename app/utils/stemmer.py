@@ -0,0 +1,114 @@
+"""Стеммер русского языка (алгоритм Snowball/Портера, без внешних зависимостей)."""
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+VOWELS = "аеиоуыэюя"
+
+# (окончание, должно идти после «а»/«я»); внутри группы — от длинных к коротким
+Endings = List[Tuple[str, bool]]
+
+
+def _endings(after_a: str = "", plain: str = "") -> Endings:
+    endings = [(suffix, True) for suffix in after_a.split()]
+    endings += [(suffix, False) for suffix in plain.split()]
+    return sorted(endings, key=lambda item: len(item[0]), reverse=True)
+
+
+PERFECTIVE_GERUND = _endings("в вши вшись", "ив ивши ившись ыв ывши ывшись")
+REFLEXIVE = _endings(plain="ся сь")
+ADJECTIVE = _endings(plain=(
+    "ее ие ые ое ими ыми ей ий ый ой ем им ым ом его ого ему ому их ых ую юю ая яя ою ею"
+))
+PARTICIPLE = _endings("ем нн вш ющ щ", "ивш ывш ующ")
+VERB = _endings(
+    "ла на ете йте ли й л ем н ло но ет ют ны ть ешь нно",
+    "ила ыла ена ейте уйте ите или ыли ей уй ил ыл им ым ен ило ыло ено ят ует уют ит ыт ены "
+    "ить ыть ишь ую ю"
+)
+NOUN = _endings(plain=(
+    "а ев ов ие ье е иями ями ами еи ии и ией ей ой ий й иям ям ием ем ам ом о у ах иях ях "
+    "ы ь ию ью ю ия ья я"
+))
+SUPERLATIVE = _endings(plain="ейш ейше")
+DERIVATIONAL = _endings(plain="ост ость")
+
+
+def _regions(word: str) -> Tuple[int, int]:
+    """Начала областей RV и R2 (индексы в слове)."""
+    rv = len(word)
+    for i, char in enumerate(word):
+        if char in VOWELS:
+            rv = i + 1
+            break
+
+    def next_region(start: int) -> int:
+        for i in range(start + 1, len(word)):
+            if word[i - 1] in VOWELS and word[i] not in VOWELS:
+                return i + 1
+        return len(word)
+
+    r1 = next_region(0)
+    return rv, next_region(r1)
+
+
+def _strip(word: str, start: int, endings: Endings) -> Optional[str]:
+    """Отрезать самое длинное окончание группы, лежащее в области от start.
+
+    None — если окончания нет. Как и в Snowball, если самое длинное
+    окончание не проходит условие «после а/я», более короткие не проверяются.
+    """
+    for suffix, after_a in endings:
+        if not word.endswith(suffix):
+            continue
+        cut = len(word) - len(suffix)
+        if cut < start:
+            return None
+        if after_a and not (cut - 1 >= start and word[cut - 1] in "ая"):
+            return None
+        return word[:cut]
+    return None
+
+
+@lru_cache(maxsize=10000)
+def stem(word: str) -> str:
+    """Основа слова: «прочистка» → «прочистк», «септиков» → «септик»."""
+    word = word.lower().replace("ё", "е")
+    rv, r2 = _regions(word)
+    if rv >= len(word):
+        return word
+
+    # Шаг 1: деепричастие, иначе возвратность + прилагательное/глагол/существительное
+    result = _strip(word, rv, PERFECTIVE_GERUND)
+    if result is None:
+        result = _strip(word, rv, REFLEXIVE)
+        if result is None:
+            result = word
+        adjective = _strip(result, rv, ADJECTIVE)
+        if adjective is not None:
+            participle = _strip(adjective, rv, PARTICIPLE)
+            result = participle if participle is not None else adjective
+        else:
+            for group in (VERB, NOUN):
+                stripped = _strip(result, rv, group)
+                if stripped is not None:
+                    result = stripped
+                    break
+
+    # Шаг 2: конечное «и»
+    if result.endswith("и") and len(result) - 1 >= rv:
+        result = result[:-1]
+
+    # Шаг 3: словообразовательное «ост(ь)» в R2
+    derivational = _strip(result, r2, DERIVATIONAL)
+    if derivational is not None:
+        result = derivational
+
+    # Шаг 4: превосходная степень, двойное «н», мягкий знак
+    superlative = _strip(result, rv, SUPERLATIVE)
+    if superlative is not None:
+        result = superlative
+    if result.endswith("нн") and len(result) - 1 >= rv:
+        result = result[:-1]
+    elif superlative is None and result.endswith("ь") and len(result) - 1 >= rv:
+        result = result[:-1]
+    return result
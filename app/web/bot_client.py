@@ -0,0 +1,66 @@
+"""Client for the bot's internal API, used when the web panel runs in
+separate processes (gunicorn workers) and cannot reach the bot's event loop.
+
+Notifications themselves travel through the notification_outbox table; the
+API only wakes the bot's dispatcher so they go out without waiting for the
+next poll. A lost wake-up delays a notification, it never drops it.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+INTERNAL_TOKEN_HEADER = "X-Bot-Internal-Token"
+
+
+class BotClient:
+    """Wakes the bot's outbox dispatcher over local HTTP"""
+
+    def __init__(self, url: str, token: str, timeout: float = 3.0, workers: int = 2):
+        self.url = url.rstrip('/')
+        self.token = token
+        self.timeout = timeout
+        self._session = requests.Session()
+        self._session.headers[INTERNAL_TOKEN_HEADER] = token
+        # Requests are sent in the background so the admin's HTTP response
+        # does not wait on the bot
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bot-client")
+
+    def wake_outbox(self) -> bool:
+        """Ask the bot to drain the outbox now; returns immediately"""
+        self._executor.submit(self._post_wake)
+        return True
+
+    def _post_wake(self):
+        try:
+            response = self._session.post(f"{self.url}/internal/outbox/wake", timeout=self.timeout)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            logger.warning(f"Bot outbox wake-up failed, it will be picked up on the next poll: {e}")
+
+    def health(self, timeout: float = 1.0) -> Dict:
+        """Bot state for the readiness probe (see TelegramBot.health)"""
+        response = self._session.get(f"{self.url}/internal/health", timeout=timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def metrics(self, timeout: float = 2.0) -> List[Dict]:
+        """The bot process's metric families (see app.utils.metrics)"""
+        response = self._session.get(f"{self.url}/internal/metrics", timeout=timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        self._session.close()
+
+
+def bot_client_from_env() -> Optional[BotClient]:
+    """BotClient for BOT_INTERNAL_URL, or None when BOT_INTERNAL_TOKEN is not set"""
+    from app.config import BOT_INTERNAL_TOKEN, BOT_INTERNAL_URL
+    if not BOT_INTERNAL_TOKEN:
+        return None
+    return BotClient(BOT_INTERNAL_URL, BOT_INTERNAL_TOKEN)
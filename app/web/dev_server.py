@@ -0,0 +1,46 @@
+"""Werkzeug development server for the admin panel, run in a background thread
+
+Used when WEB_SERVER=dev. Flask is imported and the socket is bound inside
+the thread, so the bot starts in parallel; ``ready`` is set once the port
+is listening (or binding failed, see ``error``).
+"""
+import logging
+import threading
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from app.models.database import Database
+
+logger = logging.getLogger(__name__)
+
+
+class DevServerThread(threading.Thread):
+    """Serves create_app(db, bot) with the threaded Werkzeug server"""
+
+    def __init__(self, db: 'Database', bot=None, host: str = "0.0.0.0", port: int = 5000):
+        super().__init__(name="web-dev-server", daemon=True)
+        self.db = db
+        self.bot = bot
+        self.host = host
+        self.port = port
+        self.ready = threading.Event()
+        self.error: Optional[Exception] = None
+        self._server = None
+
+    def run(self):
+        try:
+            from werkzeug.serving import make_server
+            from app.web.routes import create_app
+            self._server = make_server(self.host, self.port, create_app(self.db, self.bot), threaded=True)
+        except Exception as e:
+            self.error = e
+            logger.error(f"❌ Ошибка при запуске Flask: {e}")
+            self.ready.set()
+            return
+        logger.info(f"🌐 Flask слушает {self.host}:{self.port}")
+        self.ready.set()
+        self._server.serve_forever()
+
+    def shutdown(self):
+        if self._server is not None:
+            self._server.shutdown()
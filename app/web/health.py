@@ -0,0 +1,118 @@
+"""Readiness checks for /health/ready
+
+Each dependency check is cached for a few seconds, and only one request at
+a time refreshes an expired result while the rest reuse the previous one,
+so the probe can be polled every second without adding database load.
+"""
+import logging
+import os
+import threading
+import time
+from typing import TYPE_CHECKING, Callable, Dict, Optional, Union
+
+if TYPE_CHECKING:
+    from app.models.database import Database
+    from app.bot.bot_handler import TelegramBot
+    from app.web.bot_client import BotClient
+
+logger = logging.getLogger(__name__)
+
+HEALTH_CACHE_SECONDS = float(os.getenv("HEALTH_CACHE_SECONDS", "5"))
+HEALTH_MAX_HEARTBEAT_AGE = float(os.getenv("HEALTH_MAX_HEARTBEAT_AGE", "5"))
+HEALTH_MAX_LOOP_LAG = float(os.getenv("HEALTH_MAX_LOOP_LAG", "1"))
+HEALTH_MAX_UPDATE_QUEUE = int(os.getenv("HEALTH_MAX_UPDATE_QUEUE", "500"))
+# A refresh running longer than this is reported as a failure (e.g. a locked database)
+HEALTH_CHECK_TIMEOUT = float(os.getenv("HEALTH_CHECK_TIMEOUT", "2"))
+
+
+class CachedCheck:
+    """A check result reused for ``ttl`` seconds, refreshed by one caller at a time"""
+
+    def __init__(self, check: Callable[[], Dict], ttl: float = HEALTH_CACHE_SECONDS):
+        self.check = check
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._result: Optional[Dict] = None
+        self._checked_at = 0.0
+
+    def get(self) -> Dict:
+        result = self._result
+        if result is not None and time.monotonic() - self._checked_at < self.ttl:
+            return dict(result, cached=True, age_ms=self._age_ms())
+        # Someone else is refreshing: answer with the previous result,
+        # unless the refresh itself is hanging
+        if not self._lock.acquire(blocking=result is None):
+            age_ms = self._age_ms()
+            if age_ms > (self.ttl + HEALTH_CHECK_TIMEOUT) * 1000:
+                return {"ok": False, "error": "check is not responding", "cached": True, "age_ms": age_ms}
+            return dict(result, cached=True, age_ms=age_ms)
+        try:
+            started = time.perf_counter()
+            try:
+                result = self.check()
+            except Exception as e:
+                result = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+            result["latency_ms"] = round((time.perf_counter() - started) * 1000, 2)
+            self._result = result
+            self._checked_at = time.monotonic()
+        finally:
+            self._lock.release()
+        return dict(result, cached=False, age_ms=0.0)
+
+    def _age_ms(self) -> float:
+        return round((time.monotonic() - self._checked_at) * 1000, 2)
+
+
+class ReadinessProbe:
+    """Database ping, bot event-loop heartbeat and update-queue depth"""
+
+    def __init__(self, db: Optional['Database'], bot: Optional[Union['TelegramBot', 'BotClient']] = None,
+                 cache_seconds: float = HEALTH_CACHE_SECONDS):
+        self.db = db
+        self.bot = bot
+        self.checks: Dict[str, CachedCheck] = {
+            "database": CachedCheck(self._check_database, cache_seconds),
+        }
+        if bot is not None:
+            # The in-process bot is read from memory; a BotClient costs a local HTTP call
+            from app.web.bot_client import BotClient
+            bot_ttl = cache_seconds if isinstance(bot, BotClient) else 0.0
+            self.checks["bot"] = CachedCheck(self._check_bot, bot_ttl)
+
+    def _check_database(self) -> Dict:
+        if self.db is None:
+            return {"ok": False, "error": "Database not available"}
+        self.db.ping()
+        return {"ok": True, "pool_size": self.db.pool.size, "pool_idle": self.db.pool.idle}
+
+    def _check_bot(self) -> Dict:
+        state = self.bot.health()
+        problems = []
+        age = state.get('heartbeat_age')
+        if not state.get('running') or age is None:
+            problems.append("bot is not running")
+        elif age > HEALTH_MAX_HEARTBEAT_AGE:
+            problems.append(f"no event loop tick for {age:.1f}s")
+        lag = state.get('loop_lag_recent_max', state.get('loop_lag', 0.0))
+        if lag > HEALTH_MAX_LOOP_LAG:
+            problems.append(f"event loop lag {lag:.2f}s")
+        queue = state.get('update_queue', {})
+        depth = queue.get('received', 0) + queue.get('waiting', 0)
+        if depth > HEALTH_MAX_UPDATE_QUEUE:
+            problems.append(f"{depth} updates queued")
+        result = dict(state, ok=not problems, update_queue_depth=depth)
+        if problems:
+            result["error"] = "; ".join(problems)
+        return result
+
+    def check(self) -> Dict:
+        """Run (or reuse) every check; ``ready`` is True when all pass"""
+        started = time.perf_counter()
+        checks = {name: check.get() for name, check in self.checks.items()}
+        ready = all(result["ok"] for result in checks.values())
+        return {
+            "status": "ready" if ready else "not_ready",
+            "ready": ready,
+            "checks": checks,
+            "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+        }
@@ -1,22 +1,72 @@
 """Flask routes for admin panel"""
-from flask import Flask, render_template, jsonify, request, session, redirect, url_for
+from flask import Flask, Response, g, render_template, jsonify, request, session, redirect, url_for, stream_with_context
 from functools import wraps
-from typing import Optional, TYPE_CHECKING
+from typing import Optional, TYPE_CHECKING, Union
+import hmac
+import json
 import os
 import logging
+import time
+
+from app.utils import metrics
+from app.utils.events import order_events, TooManySubscribersError
+from app.web.health import ReadinessProbe
 
 if TYPE_CHECKING:
     from app.models.database import Database
     from app.bot.bot_handler import TelegramBot
+    from app.web.bot_client import BotClient
 
 logger = logging.getLogger(__name__)
 
-def create_app(db: 'Database', bot: Optional['TelegramBot'] = None) -> Flask:
-    """Create Flask application"""
+ORDER_STATUSES = ('new', 'in_progress', 'completed', 'cancelled')
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+SSE_HEARTBEAT_SECONDS = 15
+
+WEB_REQUEST_SECONDS = metrics.histogram(
+    'web_request_seconds', 'Admin panel request latency', ['endpoint', 'method', 'status']
+)
+
+# Cache-Control per endpoint. Revalidated endpoints carry an ETag, so
+# browsers get a cheap 304 instead of the full payload.
+NO_STORE = 'no-store, max-age=0'
+CACHE_POLICIES = {
+    'get_orders': 'private, no-cache',
+    'health': 'no-cache',
+    'health_live': 'no-cache',
+    'stream_orders': 'no-cache',
+    'static': 'public, max-age=3600',
+}
+
+
+def _sse(event_type: str, data: dict, event_id: Optional[int] = None) -> str:
+    """Format one Server-Sent Events message"""
+    message = f"event: {event_type}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+    if event_id is not None:
+        message = f"id: {event_id}\n" + message
+    return message
+
+def create_app(db: 'Database', bot: Optional[Union['TelegramBot', 'BotClient']] = None) -> Flask:
+    """Create Flask application
+
+    Status notifications are queued in the database outbox. ``bot`` only
+    wakes the dispatcher: the in-process TelegramBot, or a BotClient talking
+    to the bot process when served by gunicorn.
+    """
     app = Flask(__name__, template_folder='../../templates')
     app.config['SECRET_KEY'] = os.getenv('FLASK_SECRET_KEY', 'dev-key-change-in-production')
     
     ADMIN_PASSWORD = os.getenv('ADMIN_PASSWORD', 'admin123')
+    order_events.max_subscribers = int(os.getenv('SSE_MAX_SUBSCRIBERS', '500'))
+    readiness = ReadinessProbe(db, bot)
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+    # Under gunicorn the bot is another process with its own metrics
+    remote_bot = None
+    if bot is not None:
+        from app.web.bot_client import BotClient
+        if isinstance(bot, BotClient):
+            remote_bot = bot
     
     def login_required(f):
         @wraps(f)
@@ -34,12 +84,27 @@ def create_app(db: 'Database', bot: Optional['TelegramBot'] = None) -> Flask:
             return f(*args, **kwargs)
         return decorated_function
     
+    @app.before_request
+    def start_timer():
+        g.request_started = time.perf_counter()
+    
+    @app.after_request
+    def record_latency(response):
+        started = g.get('request_started')
+        if started is not None:
+            WEB_REQUEST_SECONDS.labels(
+                request.endpoint or 'unmatched', request.method, response.status_code
+            ).observe(time.perf_counter() - started)
+        return response
+    
     @app.after_request
     def add_header(response):
-        """Add headers to prevent caching"""
-        response.headers['Cache-Control'] = 'no-store, no-cache, must-revalidate, max-age=0'
-        response.headers['Pragma'] = 'no-cache'
-        response.headers['Expires'] = '0'
+        """Apply the endpoint's cache policy (no-store unless listed in CACHE_POLICIES)"""
+        policy = CACHE_POLICIES.get(request.endpoint, NO_STORE)
+        response.headers['Cache-Control'] = policy
+        if policy == NO_STORE:
+            response.headers['Pragma'] = 'no-cache'
+            response.headers['Expires'] = '0'
         return response
     
     @app.route('/login', methods=['GET', 'POST'])
@@ -70,23 +135,174 @@ def create_app(db: 'Database', bot: Optional['TelegramBot'] = None) -> Flask:
     @app.route('/health')
     def health():
         """Health check"""
-        return jsonify({"status": "healthy"})
+        response = jsonify({"status": "healthy"})
+        response.add_etag()
+        return response.make_conditional(request)
+    
+    @app.route('/health/live')
+    def health_live():
+        """Liveness: the web process answers requests"""
+        response = jsonify({"status": "alive"})
+        response.add_etag()
+        return response.make_conditional(request)
+    
+    @app.route('/health/ready')
+    def health_ready():
+        """Readiness: database, bot event loop and update queue (see ReadinessProbe)"""
+        result = readiness.check()
+        return jsonify(result), 200 if result["ready"] else 503
+    
+    @app.route('/metrics')
+    def prometheus_metrics():
+        """Prometheus metrics; the bot's own are merged in when it runs in another process
+        
+        Disabled (404) until METRICS_TOKEN is set; scrapers send it as a Bearer token.
+        """
+        if not METRICS_TOKEN:
+            return jsonify({"error": "Not found"}), 404
+        if not hmac.compare_digest(
+                request.headers.get('Authorization', ''), f'Bearer {METRICS_TOKEN}'):
+            return jsonify({"error": "Unauthorized"}), 401
+        families = metrics.REGISTRY.collect()
+        if remote_bot is not None:
+            try:
+                families = metrics.merge_families([(families, {"process": "web"}),
+                                                   (remote_bot.metrics(), {"process": "bot"})])
+            except Exception as e:
+                logger.warning(f"Bot metrics unavailable: {e}")
+        return Response(metrics.render(families), mimetype='text/plain; version=0.0.4')
     
     @app.route('/api/orders')
     @api_auth_required
     def get_orders():
-        """Get all orders with stats"""
+        """Get a page of orders (newest first) with stats
+        
+        Query params: status (optional filter), before_id (keyset cursor
+        from the previous page's next_before_id), limit (1..MAX_PAGE_SIZE).
+        Stats are only included on the first page.
+        """
         if db is None:
-            return jsonify({"orders": [], "stats": {}})
+            return jsonify({"orders": [], "stats": {}, "next_before_id": None})
+        
+        status = request.args.get('status') or None
+        if status == 'all':
+            status = None
+        if status is not None and status not in ORDER_STATUSES:
+            return jsonify({"error": "Invalid status"}), 400
         
-        orders = db.get_all_orders()
-        stats = db.get_stats()
-        stats['users'] = db.get_users_count()
+        # A present but malformed cursor is an error, not a request for page 1
+        try:
+            before_id = int(request.args['before_id']) if 'before_id' in request.args else None
+            limit = int(request.args.get('limit', DEFAULT_PAGE_SIZE))
+        except (TypeError, ValueError):
+            return jsonify({"error": "Invalid pagination parameters"}), 400
+        if before_id is not None and before_id < 0:
+            return jsonify({"error": "Invalid pagination parameters"}), 400
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
         
-        return jsonify({
+        # Read the version first so changes racing with this page are replayed
+        version = db.get_orders_version()
+        
+        # The payload is fully determined by the order version, the users
+        # version (the user count is shown in stats) and the query, so a
+        # matching ETag is answered with two primary-key lookups
+        etag = f"orders-{version}-{db.get_users_version()}-{status or 'all'}-{before_id or 0}-{limit}"
+        if request.if_none_match.contains(etag):
+            response = app.response_class(status=304)
+            response.set_etag(etag)
+            return response
+        
+        # One extra row tells whether another page exists
+        orders = db.get_orders_page(status=status, before_id=before_id, limit=limit + 1)
+        has_more = len(orders) > limit
+        orders = orders[:limit]
+        
+        payload = {
             "orders": orders,
-            "stats": stats
-        })
+            "next_before_id": orders[-1]['order_id'] if has_more else None,
+            "version": version
+        }
+        if before_id is None:
+            payload["stats"] = db.get_stats()
+        
+        response = jsonify(payload)
+        response.set_etag(etag)
+        return response
+    
+    @app.route('/api/orders/changes')
+    @api_auth_required
+    def get_order_changes():
+        """Get orders inserted, updated or deleted since a change version
+        
+        Stats are included only when something changed.
+        """
+        if db is None:
+            return jsonify({"version": 0, "inserted": [], "updated": [], "deleted": [], "reset": False})
+        
+        since = request.args.get('since', type=int)
+        if since is None or since < 0:
+            return jsonify({"error": "Invalid since"}), 400
+        
+        changes = db.get_order_changes(since)
+        if changes["reset"] or changes["inserted"] or changes["updated"] or changes["deleted"]:
+            changes["stats"] = db.get_stats()
+        
+        return jsonify(changes)
+    
+    @app.route('/api/orders/stream')
+    @api_auth_required
+    def stream_orders():
+        """Server-Sent Events stream of order_created / order_status_changed / order_deleted
+        
+        Event ids are order change versions; a reconnect with Last-Event-ID
+        (or ?since=) replays missed changes. A `resync` event tells the
+        client to reload when replay is impossible or its queue overflowed.
+        """
+        since = request.headers.get('Last-Event-ID', type=int)
+        if since is None:
+            since = request.args.get('since', type=int)
+        
+        try:
+            subscription = order_events.subscribe()
+        except TooManySubscribersError:
+            return jsonify({"error": "Too many subscribers"}), 503
+        
+        def replay(version):
+            changes = db.get_order_changes(version)
+            if changes["reset"]:
+                yield _sse('resync', {"version": changes["version"]}, changes["version"])
+                return
+            for order in changes["inserted"]:
+                yield _sse('order_created', {"order_id": order['order_id'], "order": order}, changes["version"])
+            for order in changes["updated"]:
+                yield _sse('order_status_changed', {"order_id": order['order_id'], "order": order}, changes["version"])
+            for order_id in changes["deleted"]:
+                yield _sse('order_deleted', {"order_id": order_id}, changes["version"])
+        
+        def generate():
+            # Subscribed before the replay, so nothing falls in between;
+            # duplicates are harmless because clients apply events idempotently
+            with subscription:
+                yield "retry: 5000\n\n"
+                if since is not None and db is not None:
+                    yield from replay(since)
+                while True:
+                    event = subscription.get(timeout=SSE_HEARTBEAT_SECONDS)
+                    if subscription.overflowed:
+                        subscription.reset_overflow()
+                        yield _sse('resync', {})
+                        continue
+                    if event is None:
+                        yield ": ping\n\n"
+                        continue
+                    data = {key: value for key, value in event.items() if key not in ('type', 'version')}
+                    yield _sse(event['type'], data, event.get('version'))
+        
+        return Response(
+            stream_with_context(generate()),
+            mimetype='text/event-stream',
+            headers={'X-Accel-Buffering': 'no'}
+        )
     
     @app.route('/api/orders/<int:order_id>/status', methods=['POST'])
     @api_auth_required
@@ -102,30 +318,19 @@ def create_app(db: 'Database', bot: Optional['TelegramBot'] = None) -> Flask:
         data = request.get_json()
         new_status = data.get('status')
         
-        if new_status not in ['new', 'in_progress', 'completed', 'cancelled']:
+        if new_status not in ORDER_STATUSES:
             return jsonify({"error": "Invalid status"}), 400
         
-        db.update_order_status(order_id, new_status)
+        # The client notification is queued in the outbox in the same
+        # transaction; the bot process delivers it, whichever worker we are
+        db.update_order_status(order_id, new_status, notify=True)
         
-        # Отправляем уведомление клиенту в Telegram, если есть бот и user_id
         if bot and order.get('user_id'):
             try:
-                import asyncio
-                # Запускаем асинхронную задачу в event loop бота
-                if bot.loop and bot.loop.is_running():
-                    asyncio.run_coroutine_threadsafe(
-                        bot.send_status_notification(
-                            user_id=order['user_id'],
-                            order_id=order_id,
-                            new_status=new_status
-                        ),
-                        bot.loop
-                    )
-                    logger.info(f"Уведомление отправлено клиенту {order['user_id']} о заявке {order_id}")
-                else:
-                    logger.warning("Event loop бота не запущен, уведомление не отправлено")
+                if not bot.wake_outbox():
+                    logger.info(f"Бот не запущен, уведомление по заявке {order_id} ждёт в outbox")
             except Exception as e:
-                logger.error(f"Ошибка отправки уведомления: {e}")
+                logger.error(f"Ошибка сигнала боту: {e}")
         
         return jsonify({"success": True})
     
@@ -0,0 +1,116 @@
+"""
+Нагрузочная проверка AI-модели Аквы: локальный HTTP-сервис-заглушка,
+одновременные вопросы вне базы знаний, микро-пакеты и бюджет задержки.
+
+Заглушка отвечает за base + per_prompt * размер пакета секунд — как модель,
+у которой пакетная обработка дешевле поштучной. Параллельно измеряется
+задержка event loop: она не должна расти, пока модель считает.
+
+Запуск:
+    python benchmarks/bench_ai_backend.py [--questions 64] [--base-ms 150] [--per-prompt-ms 10]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.bot import ai_helper  # noqa: E402
+from app.bot.ai_backends import HTTPBackend, MicroBatcher  # noqa: E402
+from app.bot.ai_helper import DEFAULT_RESPONSE, get_ai_response_async, rank_intents  # noqa: E402
+
+
+def start_stand_in(base: float, per_prompt: float) -> ThreadingHTTPServer:
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+            prompts = body["prompts"]
+            time.sleep(base + per_prompt * len(prompts))
+            payload = json.dumps({"responses": [f"Ответ модели #{i}" for i in range(len(prompts))]})
+            data = payload.encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+async def loop_lag(stop: asyncio.Event, interval: float = 0.005) -> float:
+    """Максимальное опоздание таймера event loop за время теста, в мс."""
+    worst = 0.0
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - started - interval)
+    return worst * 1000
+
+
+async def scenario(name: str, questions, budget: float, batcher: MicroBatcher):
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(loop_lag(stop))
+    batches_before, prompts_before = batcher.batches, batcher.prompts
+
+    async def ask(question):
+        started = time.perf_counter()
+        answer = await get_ai_response_async(question, budget=budget)
+        return time.perf_counter() - started, answer != DEFAULT_RESPONSE
+
+    results = await asyncio.gather(*(ask(q) for q in questions))
+    stop.set()
+    lag = await lag_task
+
+    latencies = sorted(latency * 1000 for latency, _ in results)
+    answered = sum(ok for _, ok in results)
+    batches = batcher.batches - batches_before
+    prompts = batcher.prompts - prompts_before
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"\n{name} (бюджет {budget * 1000:.0f} мс)")
+    print(f"  ответила модель:  {answered}/{len(questions)}")
+    print(f"  пакетов:          {batches}, в среднем {prompts / batches if batches else 0:.1f} вопросов")
+    print(f"  задержка p50/p95: {statistics.median(latencies):.0f} / {p95:.0f} мс")
+    print(f"  лаг event loop:   {lag:.1f} мс (макс.)")
+
+
+async def run(args):
+    server = start_stand_in(args.base_ms / 1000, args.per_prompt_ms / 1000)
+    url = f"http://127.0.0.1:{server.server_address[1]}/generate"
+    ai_helper.set_ai_backend(HTTPBackend(url))
+    batcher = ai_helper._batcher
+
+    questions = [f"Расскажите про погоду на завтра, вопрос {i}" for i in range(args.questions)]
+    assert not rank_intents(questions[0]), "вопросы не должны попадать в базу знаний"
+
+    one = (args.base_ms + args.per_prompt_ms) / 1000
+    await scenario("Модель успевает", questions, budget=ai_helper.AI_LATENCY_BUDGET, batcher=batcher)
+    await scenario("Модель не успевает", questions, budget=one / 3, batcher=batcher)
+
+    ai_helper.set_ai_backend(None)
+    server.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--questions', type=int, default=64)
+    parser.add_argument('--base-ms', type=float, default=150)
+    parser.add_argument('--per-prompt-ms', type=float, default=10)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    main()
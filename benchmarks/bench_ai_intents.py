@@ -0,0 +1,135 @@
+"""
+Бенчмарк подбора ответа Аквы на размеченном корпусе вопросов клиентов:
+точность и время на сообщение для прежнего поиска «первое совпавшее
+ключевое слово» и для ранжирования по основам с весами TF-IDF.
+
+Запуск:
+    python benchmarks/bench_ai_intents.py [--rounds 2000] [--show-errors]
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.bot.ai_helper import KNOWLEDGE_BASE, rank_intents  # noqa: E402
+
+# (сообщение, ожидаемая категория; None — ответ по умолчанию)
+CORPUS = [
+    ("Сколько стоит откачка септика?", "prices_septic"),
+    ("какая цена откачать выгребную яму 5 кубов", "prices_septic"),
+    ("Прайс на откачку есть?", "prices_septic"),
+    ("сколько стоит прочистка канализации", "prices_cleaning"),
+    ("Сколько будет стоить устранить засор в ванной?", "prices_cleaning"),
+    ("у меня вода не уходит в раковине", "prices_cleaning"),
+    ("Забилась труба на кухне, что делать", "prices_cleaning"),
+    ("Сколько стоит видеодиагностика трубы?", "prices_diagnostics"),
+    ("Нужно осмотреть канализацию камерой", "prices_diagnostics"),
+    ("Делаете гидропромывку труб?", "canal_wash"),
+    ("надо промыть канализацию от жира", "canal_wash"),
+    ("Сколько стоит каналопромывка", "canal_wash"),
+    ("Нужен илосос для пруда", "sludge_suction"),
+    ("Много ила в колодце, откачаете?", "sludge_suction"),
+    ("Срочно! Прорвало канализацию, всё затопило", "timing_urgent"),
+    ("Авария, нужен выезд немедленно", "timing_urgent"),
+    ("Когда сможете приехать?", "timing_regular"),
+    ("Как долго ждать мастера?", "timing_regular"),
+    ("Работаете в Ярцево?", "area_yartsevo"),
+    ("Выезжаете в деревни Смоленской области?", "area_region"),
+    ("Можно оплатить наличными?", "payment_cash"),
+    ("Принимаете перевод на карту Сбербанка?", "payment_card"),
+    ("Нужен чек и акт выполненных работ", "payment_receipt"),
+    ("Какие услуги вы оказываете?", "services_all"),
+    ("Что вы предлагаете кроме откачки?", "services_all"),
+    ("Какой объём у вашей машины в кубах?", "septic_volume"),
+    ("сколько вмещает ассенизатор", "septic_volume"),
+    ("Как часто нужно откачивать септик?", "septic_frequency"),
+    ("Воняет из септика, что делать?", "septic_smell"),
+    ("Во дворе неприятный запах от выгребной ямы", "septic_smell"),
+    ("Почему засоры повторяются?", "blockage_causes"),
+    ("Из-за чего бывают засоры в трубах", "blockage_causes"),
+    ("Как избежать засоров в будущем?", "blockage_prevention"),
+    ("Есть гарантия на работу?", "guarantee"),
+    ("Какое у вас оборудование?", "equipment"),
+    ("Как заказать откачку?", "order_how"),
+    ("Хочу оформить заявку", "order_how"),
+    ("Дайте номер телефона для связи", "contact"),
+    ("Работаете в выходные и праздники?", "working_hours"),
+    ("Сколько лет вы работаете?", "experience"),
+    ("У вас большой опыт?", "experience"),
+    ("Обслуживаете дачи и коттеджи?", "private_house"),
+    ("Работаете с юрлицами по договору?", "business"),
+    ("Откачиваете зимой в мороз?", "winter"),
+    ("Труба замёрзла, поможете?", "winter"),
+    ("Есть скидки пенсионерам?", "discount"),
+    ("Где почитать отзывы о вас?", "review"),
+    ("Хочу оставить жалобу", "complaint"),
+    ("Здравствуйте", "hello"),
+    ("Добрый день!", "hello"),
+    ("Спасибо большое", "thanks"),
+    ("Благодарю за помощь", "thanks"),
+    ("Подскажите, пожалуйста", None),
+    ("Мой сосед говорил про вас", None),
+]
+
+
+def legacy_category(user_message: str):
+    """Прежний выбор категории: первое ключевое слово по порядку словаря."""
+    message_lower = user_message.lower()
+    for category, data in KNOWLEDGE_BASE.items():
+        for keyword in data["keywords"]:
+            if keyword in message_lower:
+                return category
+    return None
+
+
+def ranked_categories(user_message: str):
+    return [intent.category for intent in rank_intents(user_message, k=3)]
+
+
+def evaluate(show_errors: bool):
+    legacy_hits = top1_hits = top3_hits = 0
+    for text, expected in CORPUS:
+        legacy = legacy_category(text)
+        ranked = ranked_categories(text)
+        top1 = ranked[0] if ranked else None
+        legacy_hits += legacy == expected
+        top1_hits += top1 == expected
+        top3_hits += expected in ranked if expected else top1 is None
+        if show_errors and top1 != expected:
+            print(f"  ✗ {text!r}: ожидалось {expected}, получено {ranked or None}")
+    return legacy_hits, top1_hits, top3_hits
+
+
+def measure(fn, rounds: int) -> float:
+    """Среднее время на сообщение корпуса в микросекундах."""
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for text, _ in CORPUS:
+            fn(text)
+    return (time.perf_counter() - started) / (rounds * len(CORPUS)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rounds', type=int, default=2000)
+    parser.add_argument('--show-errors', action='store_true')
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+
+    total = len(CORPUS)
+    legacy_hits, top1_hits, top3_hits = evaluate(args.show_errors)
+    print(f"Корпус: {total} сообщений, категорий: {len(KNOWLEDGE_BASE)}\n")
+    print(f"{'метод':<28} {'точность':>10} {'мкс/сообщ.':>12}")
+    print(f"{'первое совпадение':<28} {legacy_hits / total:>10.0%} "
+          f"{measure(legacy_category, args.rounds):>12.1f}")
+    print(f"{'TF-IDF, top-1':<28} {top1_hits / total:>10.0%} "
+          f"{measure(ranked_categories, args.rounds):>12.1f}")
+    print(f"{'TF-IDF, top-3':<28} {top3_hits / total:>10.0%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""
+Задержка event loop при одновременном оформлении заявок: синхронные
+вызовы Database прямо в корутинах против AsyncDatabase.
+
+Клиенты приходят с интервалом --arrival-ms, и каждый делает то же, что
+бот при оформлении заявки: add_user, create_order, get_order_by_id,
+get_user_orders. Параллельно отдельный
+поток периодически держит блокировку записи SQLite (как веб-панель
+или медленный диск). Таймер с шагом 5 мс измеряет, насколько event loop
+опаздывает: синхронный вызов, ждущий блокировку, замораживает весь бот.
+
+Запуск:
+    python benchmarks/bench_async_db.py [--clients 1000] [--arrival-ms 1] [--lock-ms 50] [--lock-every-ms 150]
+"""
+import argparse
+import asyncio
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.async_database import AsyncDatabase  # noqa: E402
+from app.models.database import Database  # noqa: E402
+
+
+def hold_write_lock(db_path: str, hold: float, every: float, stop: threading.Event):
+    """Сторонний писатель: держит блокировку записи hold секунд раз в every секунд."""
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    while not stop.wait(every):
+        conn.execute('BEGIN IMMEDIATE')
+        time.sleep(hold)
+        conn.execute('COMMIT')
+    conn.close()
+
+
+async def measure_lag(stop: asyncio.Event, interval: float = 0.005):
+    lags = []
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append((time.perf_counter() - started - interval) * 1000)
+    return lags
+
+
+async def place_order_sync(db: Database, user_id: int):
+    db.add_user(user_id, f"user{user_id}", "Клиент")
+    order_id = db.create_order(user_id, 'septic', 'ул. Ленина, 1', '+79000000000', '')
+    db.get_order_by_id(order_id)
+    db.get_user_orders(user_id)
+    await asyncio.sleep(0)
+
+
+async def place_order_async(db: AsyncDatabase, user_id: int):
+    await db.add_user(user_id, f"user{user_id}", "Клиент")
+    order_id = await db.create_order(user_id, 'septic', 'ул. Ленина, 1', '+79000000000', '')
+    await db.get_order_by_id(order_id)
+    await db.get_user_orders(user_id)
+
+
+async def scenario(name: str, place_order, db, clients: int, arrival: float, first_user: int):
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(measure_lag(stop))
+    await asyncio.sleep(0.02)
+    started = time.perf_counter()
+    tasks = []
+    for i in range(clients):
+        tasks.append(asyncio.create_task(place_order(db, first_user + i)))
+        await asyncio.sleep(arrival)
+    await asyncio.gather(*tasks)
+    total = time.perf_counter() - started
+    stop.set()
+    lags = sorted(await lag_task)
+    p99 = lags[max(0, int(len(lags) * 0.99) - 1)]
+    print(f"{name:<22} {total:>8.2f} {clients / total:>10.0f} "
+          f"{statistics.median(lags):>9.1f} {p99:>9.1f} {lags[-1]:>9.1f}")
+
+
+async def run(args):
+    workdir = tempfile.mkdtemp(prefix='bench_async_db_')
+    db_path = os.path.join(workdir, 'bench.db')
+    db = Database(db_path)
+    adb = AsyncDatabase(db)
+
+    stop = threading.Event()
+    locker = threading.Thread(
+        target=hold_write_lock, args=(db_path, args.lock_ms / 1000, args.lock_every_ms / 1000, stop),
+        daemon=True
+    )
+    locker.start()
+
+    print(f"{args.clients} заявок, новая каждые {args.arrival_ms} мс; сторонняя блокировка записи "
+          f"{args.lock_ms:.0f} мс каждые {args.lock_every_ms:.0f} мс")
+    print(f"{'вариант':<22} {'всего, с':>8} {'заявок/с':>10} "
+          f"{'лаг p50':>9} {'лаг p99':>9} {'лаг max':>9}  (мс)")
+    try:
+        arrival = args.arrival_ms / 1000
+        await scenario("Database (синхронно)", place_order_sync, db, args.clients, arrival, 1)
+        await scenario("AsyncDatabase", place_order_async, adb, args.clients, arrival, 100000)
+    finally:
+        stop.set()
+        locker.join()
+        adb.close()
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--clients', type=int, default=1000)
+    parser.add_argument('--arrival-ms', type=float, default=1)
+    parser.add_argument('--lock-ms', type=float, default=50)
+    parser.add_argument('--lock-every-ms', type=float, default=150)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""
+Бенчмарк маршрутизации callback-запросов: прежняя цепочка if/elif
+со startswith против CallbackRouter (с кэшем разбора и без него).
+
+Измеряется только выбор обработчика и разбор аргументов — сами
+обработчики не вызываются.
+
+Запуск:
+    python benchmarks/bench_callback_router.py [--rounds 200000]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.bot.bot_handler import callbacks  # noqa: E402
+
+SAMPLES = [
+    "back_menu",
+    "new_order",
+    "faq_prices",
+    "service_canal_wash",
+    "confirm_order",
+    "price_septic",
+    "set_status_1542_in_progress",
+    "executor_take_1542",
+    "client_history_1542",
+    "broadcast_cancel_12",
+    "admin_orders_new",
+]
+
+
+def legacy_route(data: str):
+    """Прежний порядок проверок из handle_callback_query."""
+    if data == "back_menu":
+        return "back_menu", ()
+    elif data == "services":
+        return "services", ()
+    elif data == "new_order":
+        return "new_order", ()
+    elif data == "check_status":
+        return "check_status", ()
+    elif data == "faq":
+        return "faq", ()
+    elif data == "contacts" or data == "show_phone":
+        return "contacts", ()
+    elif data.startswith("service_"):
+        return "service", (data.replace("service_", ""),)
+    elif data == "skip_comment":
+        return "skip_comment", ()
+    elif data == "cancel_order":
+        return "cancel_order", ()
+    elif data == "confirm_order":
+        return "confirm_order", ()
+    elif data == "edit_order":
+        return "edit_order", ()
+    elif data.startswith("price_"):
+        return "price", (data.replace("price_", ""),)
+    elif data.startswith("faq_"):
+        return "faq", (data.replace("faq_", ""),)
+    elif data.startswith("set_status_"):
+        parts = data.replace("set_status_", "").split("_", 1)
+        return "set_status", (int(parts[0]), parts[1])
+    elif data.startswith("forward_order_"):
+        return "forward_order", (int(data.replace("forward_order_", "")),)
+    elif data.startswith("call_client_"):
+        return "call_client", (int(data.replace("call_client_", "")),)
+    elif data.startswith("executor_take_"):
+        return "executor_take", (int(data.replace("executor_take_", "")),)
+    elif data.startswith("delete_order_"):
+        return "delete_order", (int(data.replace("delete_order_", "")),)
+    elif data == "settings_executors":
+        return "settings_executors", ()
+    elif data == "settings_prices":
+        return "settings_prices", ()
+    elif data == "settings_back":
+        return "settings_back", ()
+    elif data.startswith("client_history_"):
+        return "client_history", (int(data.replace("client_history_", "")),)
+    elif data.startswith("broadcast_cancel_"):
+        return "broadcast_cancel", (int(data.replace("broadcast_cancel_", "")),)
+    elif data.startswith("admin_") or data.startswith("status_"):
+        return "admin", (data,)
+    return None
+
+
+def measure(fn, data: str, rounds: int) -> float:
+    """Среднее время одного вызова в наносекундах."""
+    started = time.perf_counter()
+    for _ in range(rounds):
+        fn(data)
+    return (time.perf_counter() - started) / rounds * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rounds', type=int, default=200000)
+    args = parser.parse_args()
+
+    # Прогрев кэша разбора — как у работающего бота после первых нажатий
+    for data in SAMPLES:
+        assert callbacks.parse(data) is not None, data
+
+    print(f"{'callback_data':<30} {'if/elif':>10} {'trie':>10} {'cached':>10}   ns/op")
+    totals = [0.0, 0.0, 0.0]
+    for data in SAMPLES:
+        row = (
+            measure(legacy_route, data, args.rounds),
+            measure(callbacks._parse, data, args.rounds),
+            measure(callbacks.parse, data, args.rounds),
+        )
+        totals = [total + value for total, value in zip(totals, row)]
+        print(f"{data:<30} {row[0]:>10.0f} {row[1]:>10.0f} {row[2]:>10.0f}")
+
+    count = len(SAMPLES)
+    print(f"{'среднее':<30} {totals[0] / count:>10.0f} {totals[1] / count:>10.0f} {totals[2] / count:>10.0f}")
+
+
+if __name__ == '__main__':
+    main()
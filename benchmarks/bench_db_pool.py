@@ -0,0 +1,89 @@
+"""
+Бенчмарк пула соединений SQLite: connect-per-call против ConnectionPool.
+
+Запуск:
+    python benchmarks/bench_db_pool.py [--ops 5000] [--threads 8]
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.database import Database  # noqa: E402
+
+
+def legacy_get_order_by_id(db_path: str, order_id: int):
+    """Прежний путь: новое соединение на каждый вызов."""
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    cursor = conn.cursor()
+    cursor.execute('SELECT * FROM orders WHERE order_id = ?', (order_id,))
+    row = cursor.fetchone()
+    conn.close()
+    return dict(row) if row else None
+
+
+def legacy_create_order(db_path: str, user_id: int):
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute('''
+        INSERT INTO orders (user_id, service_type, address, phone, comment, status)
+        VALUES (?, ?, ?, ?, ?, 'new')
+    ''', (user_id, 'septic', 'ул. Ленина, 1', '+79000000000', ''))
+    conn.commit()
+    order_id = cursor.lastrowid
+    conn.close()
+    return order_id
+
+
+def run(label: str, fn, ops: int, threads: int):
+    started = time.perf_counter()
+    if threads == 1:
+        for i in range(ops):
+            fn(i)
+    else:
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            list(executor.map(fn, range(ops)))
+    elapsed = time.perf_counter() - started
+    print(f"{label:<40} {ops / elapsed:>10.0f} ops/s   {elapsed * 1e6 / ops:>8.1f} µs/op")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--ops', type=int, default=5000)
+    parser.add_argument('--threads', type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.db')
+        db = Database(db_path)
+        for i in range(1000):
+            db.create_order(i, 'septic', 'ул. Ленина, 1', '+79000000000')
+
+        for threads in (1, args.threads):
+            print(f"\n--- потоков: {threads} ---")
+            base = run("connect-per-call get_order_by_id",
+                       lambda i: legacy_get_order_by_id(db_path, i % 1000 + 1), args.ops, threads)
+            pooled = run("pool get_order_by_id",
+                         lambda i: db.get_order_by_id(i % 1000 + 1), args.ops, threads)
+            print(f"ускорение чтения: x{base / pooled:.2f}")
+
+            base = run("connect-per-call create_order",
+                       lambda i: legacy_create_order(db_path, i), args.ops // 5, threads)
+            pooled = run("pool create_order",
+                         lambda i: db.create_order(i, 'septic', 'ул. Ленина, 1', '+79000000000'),
+                         args.ops // 5, threads)
+            print(f"ускорение записи: x{base / pooled:.2f}")
+
+        print(f"\nсоединений в пуле: {db.pool.size}")
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""
+Цена инструментирования метрик (app.utils.metrics).
+
+Методы Database вызываются через обёртку с гистограммой db_query_seconds
+и напрямую (исходная функция, __wrapped__) — в одном и нескольких потоках.
+Отдельно меряется сам observe() и путь обработчика бота: labels() + observe().
+Цель — меньше 2% потери пропускной способности на реальных запросах.
+
+Запуск:
+    python benchmarks/bench_metrics.py [--ops 20000] [--threads 4] [--repeats 5]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.database import Database  # noqa: E402
+from app.utils.metrics import Histogram, METRICS_ENABLED  # noqa: E402
+
+
+def throughput(fn, ops: int, threads: int) -> float:
+    started = time.perf_counter()
+    if threads == 1:
+        for i in range(ops):
+            fn(i)
+    else:
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            list(executor.map(fn, range(ops), chunksize=256))
+    return ops / (time.perf_counter() - started)
+
+
+def compare(label: str, db: Database, name: str, args_for, ops: int, threads: int, repeats: int) -> float:
+    wrapped = getattr(Database, name)
+    raw = getattr(wrapped, '__wrapped__', wrapped)
+    # Чередуем варианты, чтобы прогрев и шум делились поровну
+    plain = timed = 0.0
+    for _ in range(repeats):
+        plain = max(plain, throughput(lambda i: raw(db, *args_for(i)), ops, threads))
+        timed = max(timed, throughput(lambda i: wrapped(db, *args_for(i)), ops, threads))
+    overhead = (plain - timed) / plain * 100
+    print(f"{label:<34} {plain:>10.0f} {timed:>10.0f} ops/s   {overhead:>+6.2f}%")
+    return overhead
+
+
+def bench_observe(rounds: int):
+    histogram = Histogram('bench_seconds', 'bench', ['kind', 'handler'])
+    child = histogram.labels('message', '/start')
+    started = time.perf_counter()
+    for _ in range(rounds):
+        child.observe(0.003)
+    observe_ns = (time.perf_counter() - started) / rounds * 1e9
+
+    started = time.perf_counter()
+    for _ in range(rounds):
+        histogram.labels('callback_query', 'set_status').observe(0.003)
+    labeled_ns = (time.perf_counter() - started) / rounds * 1e9
+    print(f"observe(): {observe_ns:.0f} нс, labels()+observe() (путь обработчика бота): {labeled_ns:.0f} нс")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--ops', type=int, default=20000)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+
+    if not METRICS_ENABLED:
+        print("METRICS_ENABLED=0: методы Database не обёрнуты, сравнивать нечего")
+        return
+
+    bench_observe(args.ops * 10)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, 'bench.db'))
+        for i in range(2000):
+            db.add_user(1000 + i % 500, f"user{i}")
+            db.create_order(1000 + i % 500, 'septic', f"ул. Ленина, {i}", '+79000000000')
+
+        worst = 0.0
+        for threads in (1, args.threads):
+            print(f"\n--- потоков: {threads} ---")
+            print(f"{'метод':<34} {'без':>10} {'с метрикой':>10}")
+            worst = max(worst, compare("get_order_by_id", db, 'get_order_by_id',
+                                       lambda i: (i % 2000 + 1,), args.ops, threads, args.repeats))
+            worst = max(worst, compare("get_orders_page (50)", db, 'get_orders_page',
+                                       lambda i: ('new', None, 50), args.ops // 10, threads, args.repeats))
+            worst = max(worst, compare("update_order_status", db, 'update_order_status',
+                                       lambda i: (i % 2000 + 1, 'in_progress' if i % 2 else 'new'),
+                                       args.ops // 10, threads, args.repeats))
+            # Ответ из кэша счётчиков — без SQLite, худший случай для обёртки
+            compare("get_stats (кэш, без запроса)", db, 'get_stats', lambda i: (), args.ops, threads, args.repeats)
+        db.close()
+
+    print(f"\nнаибольшая потеря на запросах к SQLite: {worst:.2f}%")
+
+
+if __name__ == '__main__':
+    main()
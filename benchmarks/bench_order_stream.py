@@ -0,0 +1,152 @@
+"""
+Нагрузочный тест SSE-потока /api/orders/stream.
+
+Поднимает админку на временной базе, открывает сотни одновременных
+SSE-подписок, создаёт и меняет заявки из asyncio-цикла (как бот) и из
+потоков (как веб-админка) и измеряет задержку доставки событий. Отдельно
+проверяет, что медленный подписчик не раздувает очередь.
+
+Запуск:
+    python benchmarks/bench_order_stream.py [--subscribers 300] [--events 200]
+"""
+import argparse
+import asyncio
+import http.client
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from werkzeug.serving import make_server  # noqa: E402
+
+from app.models.database import Database  # noqa: E402
+from app.utils.events import order_events  # noqa: E402
+from app.web.routes import create_app  # noqa: E402
+
+
+def login(port: int, password: str) -> str:
+    conn = http.client.HTTPConnection('127.0.0.1', port)
+    conn.request('POST', '/login', body=f'password={password}',
+                  headers={'Content-Type': 'application/x-www-form-urlencoded'})
+    response = conn.getresponse()
+    response.read()
+    cookie = response.getheader('Set-Cookie').split(';', 1)[0]
+    conn.close()
+    return cookie
+
+
+class StreamClient(threading.Thread):
+    """Одна SSE-подписка, записывающая задержку каждого события."""
+
+    def __init__(self, port: int, cookie: str, expected: int, ready: threading.Barrier):
+        super().__init__(daemon=True)
+        self.port = port
+        self.cookie = cookie
+        self.expected = expected
+        self.ready = ready
+        self.latencies = []
+        self.done = threading.Event()
+
+    def run(self):
+        conn = http.client.HTTPConnection('127.0.0.1', self.port, timeout=60)
+        conn.request('GET', '/api/orders/stream', headers={'Cookie': self.cookie})
+        response = conn.getresponse()
+        response.fp.readline()  # retry:
+        self.ready.wait()
+        while len(self.latencies) < self.expected:
+            line = response.fp.readline()
+            if not line:
+                break
+            if line.startswith(b'data: '):
+                event = json.loads(line[6:])
+                if 'ts' in event:
+                    self.latencies.append(time.time() - event['ts'])
+        self.done.set()
+        conn.close()
+
+
+def check_slow_subscriber():
+    subscription = order_events.subscribe()
+    for i in range(order_events.queue_size * 10):
+        order_events.publish('order_status_changed', version=i, order_id=i)
+    size = subscription._queue.qsize()
+    print(f"медленный подписчик: в очереди {size} (лимит {order_events.queue_size}), "
+          f"отброшено {subscription.dropped}, overflowed={subscription.overflowed}")
+    subscription.close()
+    return size <= order_events.queue_size and subscription.overflowed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--subscribers', type=int, default=300)
+    parser.add_argument('--events', type=int, default=200)
+    args = parser.parse_args()
+
+    password = 'bench'
+    os.environ['ADMIN_PASSWORD'] = password
+    os.environ['SSE_MAX_SUBSCRIBERS'] = str(args.subscribers + 10)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, 'stream.db'))
+        app = create_app(db)
+        server = make_server('127.0.0.1', 0, app, threaded=True)
+        port = server.server_port
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        cookie = login(port, password)
+
+        ready = threading.Barrier(args.subscribers + 1)
+        clients = [StreamClient(port, cookie, args.events, ready) for _ in range(args.subscribers)]
+        for client in clients:
+            client.start()
+        ready.wait()
+        while order_events.subscriber_count < args.subscribers:
+            time.sleep(0.01)
+        print(f"подписчиков: {order_events.subscriber_count}")
+
+        # Половина событий — из asyncio-цикла (бот), половина — из потока (веб)
+        async def bot_writes(count):
+            for i in range(count):
+                db.create_order(i, 'septic', 'ул. Ленина, 1', '+79000000000')
+                await asyncio.sleep(0.005)
+
+        def web_writes(count):
+            for i in range(count):
+                db.update_order_status(i + 1, 'in_progress')
+                time.sleep(0.005)
+
+        started = time.perf_counter()
+        half = args.events // 2
+        web = threading.Thread(target=web_writes, args=(args.events - half,))
+        loop_thread = threading.Thread(target=lambda: asyncio.run(bot_writes(half)))
+        loop_thread.start()
+        loop_thread.join()
+        web.start()
+        web.join()
+
+        for client in clients:
+            client.done.wait(30)
+        elapsed = time.perf_counter() - started
+
+        latencies = sorted(latency for client in clients for latency in client.latencies)
+        received = len(latencies)
+        expected = args.subscribers * args.events
+        print(f"доставлено: {received}/{expected} за {elapsed:.2f}s ({received / elapsed:.0f} событий/s)")
+        if latencies:
+            print(f"задержка: p50={statistics.median(latencies) * 1000:.1f}ms "
+                  f"p95={latencies[int(received * 0.95) - 1] * 1000:.1f}ms "
+                  f"max={latencies[-1] * 1000:.1f}ms")
+
+        slow_ok = check_slow_subscriber()
+        server.shutdown()
+        db.close()
+
+    sys.exit(0 if received == expected and slow_ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""
+Обработка обновлений: последовательно, параллельно без порядка и
+PerChatUpdateProcessor (параллельно между чатами, по порядку внутри чата).
+
+Обновления подаются так же, как это делает Application._update_fetcher:
+по задаче на обновление в порядке поступления. Один «медленный» чат
+(обработчик долго ждёт, как длинный список заявок у админа) присылает
+пачку сообщений вместе с остальными клиентами. Измеряется общее время,
+ожидание в очереди у остальных чатов (все обновления приходят разом) и
+нарушения порядка: обработчик чата начал работу, пока предыдущий
+обработчик того же чата ещё не закончил.
+
+Запуск:
+    python benchmarks/bench_update_processor.py [--chats 50] [--per-chat 5] [--concurrency 8]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from telegram import Chat, Message, Update, User  # noqa: E402
+from telegram.ext import SimpleUpdateProcessor  # noqa: E402
+
+from app.bot.update_processor import PerChatUpdateProcessor  # noqa: E402
+
+SLOW_CHAT = 1
+
+
+def make_updates(chats: int, per_chat: int):
+    updates = []
+    update_id = 0
+    for seq in range(per_chat):
+        for chat_id in range(1, chats + 1):
+            update_id += 1
+            user = User(chat_id, f"Клиент {chat_id}", False)
+            message = Message(update_id, datetime.now(), Chat(chat_id, Chat.PRIVATE),
+                              from_user=user, text=str(seq))
+            updates.append(Update(update_id, message=message))
+    return updates
+
+
+async def run_processor(processor, updates, fast: float, slow: float):
+    finished = {}
+    active = set()
+    waits = []
+    violations = 0
+
+    async def handle(update: Update):
+        nonlocal violations
+        chat_id = update.effective_chat.id
+        if chat_id != SLOW_CHAT:
+            waits.append(time.perf_counter() - started)
+        seq = int(update.message.text)
+        if chat_id in active or finished.get(chat_id, -1) != seq - 1:
+            violations += 1
+        active.add(chat_id)
+        await asyncio.sleep(slow if chat_id == SLOW_CHAT else fast)
+        active.discard(chat_id)
+        finished[chat_id] = seq
+
+    started = time.perf_counter()
+    async with processor:
+        tasks = []
+        for update in updates:
+            if processor.max_concurrent_updates > 1:
+                tasks.append(asyncio.create_task(processor.process_update(update, handle(update))))
+            else:
+                await processor.process_update(update, handle(update))
+        await asyncio.gather(*tasks)
+    total = time.perf_counter() - started
+    waits.sort()
+    return total, waits, violations
+
+
+async def run(args):
+    updates = make_updates(args.chats, args.per_chat)
+    fast, slow = args.fast_ms / 1000, args.slow_ms / 1000
+    print(f"{len(updates)} обновлений от {args.chats} чатов, обработчик {args.fast_ms:.0f} мс, "
+          f"медленный чат {args.slow_ms:.0f} мс")
+    print(f"{'вариант':<32} {'всего, с':>9} {'ожидание p50/p95, мс':>22} {'нарушений порядка':>18}")
+    variants = [
+        ("последовательно", SimpleUpdateProcessor(1)),
+        (f"параллельно ({args.concurrency}), без порядка", SimpleUpdateProcessor(args.concurrency)),
+        (f"PerChatUpdateProcessor ({args.concurrency})", PerChatUpdateProcessor(args.concurrency)),
+    ]
+    for name, processor in variants:
+        total, waits, violations = await run_processor(processor, updates, fast, slow)
+        p50 = statistics.median(waits) * 1000
+        p95 = waits[int(len(waits) * 0.95) - 1] * 1000
+        print(f"{name:<32} {total:>9.2f} {p50:>10.0f} / {p95:<9.0f} {violations:>18}")
+        if isinstance(processor, PerChatUpdateProcessor):
+            assert violations == 0, "порядок внутри чата нарушен"
+            print(f"  метрики: {processor.metrics()['message']['all']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--chats', type=int, default=50)
+    parser.add_argument('--per-chat', type=int, default=5)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--fast-ms', type=float, default=10)
+    parser.add_argument('--slow-ms', type=float, default=300)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,164 @@
+"""
+Проверка планов запросов Database через EXPLAIN QUERY PLAN.
+
+Вызывает каждый публичный метод Database на временной базе, собирает
+выполненные SQL-запросы и завершается с кодом 1, если какой-либо из них
+читает таблицу полным сканированием без индекса или сортирует через
+временное B-дерево.
+
+Запуск:
+    python benchmarks/check_query_plans.py
+
+Та же проверка входит в тесты: python -m pytest tests/test_query_plans.py
+"""
+import os
+import re
+import sys
+import tempfile
+from typing import List, NamedTuple, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.database import Database  # noqa: E402
+
+# Метод -> аргументы для вызова на тестовых данных
+CALLS = {
+    'add_user': (100, 'user', 'Иван', 'Иванов'),
+    'get_user_orders': (1,),
+    'create_order': (1, 'septic', 'ул. Ленина, 1', '+79000000000', ''),
+    'update_order_status': (1, 'in_progress'),
+    'get_all_orders': (),
+    'get_orders_by_status': ('new',),
+    'get_orders_page': ('new', 400, 50),
+    'get_orders_version': (),
+    'get_order_changes': (490,),
+    'get_stats': (),
+    'reconcile_stats': (),
+    'get_users_count': (),
+    'get_users_version': (),
+    'get_order_by_id': (1,),
+    'get_all_users': (),
+    'delete_order': (2,),
+    'get_user_by_id': (1,),
+    'get_user_ids_after': (10, 20),
+    'create_broadcast': (1, 'Текст', 50),
+    'update_broadcast': (1, 20, 19, 1),
+    'get_broadcast': (1,),
+    'get_running_broadcasts': (),
+    'set_state': ('logo', '{}'),
+    'get_state': ('logo',),
+    'delete_state': ('logo',),
+    'get_due_notifications': (50,),
+    'get_next_notification_at': (),
+    'mark_notifications_sent': ([1],),
+    'fail_notifications': ([3],),
+    'reschedule_notifications': ([(2, None)],),
+}
+
+# Полные проходы, нужные по смыслу: метод -> (таблица, причина)
+FULL_SCAN_ALLOWED = {
+    'get_all_users': ('users', 'выгрузка всех пользователей'),
+    'get_users_count': ('users', 'COUNT(*) по таблице без вторичных индексов'),
+    'get_stats': ('users', 'COUNT(*) пользователей в общем запросе статистики'),
+    'reconcile_stats': ('users', 'COUNT(*) пользователей в общем запросе статистики'),
+}
+
+# Методы, не выполняющие прикладных запросов (ping — проверка готовности)
+NOT_QUERIES = {'get_connection', 'connection', 'close', 'init_db', 'get_schema_version', 'ping'}
+
+BAD_PLAN = re.compile(r'^SCAN \w+$|USE TEMP B-TREE')
+
+
+class TracingDatabase(Database):
+    """Database, записывающая каждый выполненный SQL-запрос."""
+
+    def __init__(self, *args, **kwargs):
+        self.statements = []
+        super().__init__(*args, **kwargs)
+
+    def _configure_connection(self, conn):
+        super()._configure_connection(conn)
+        conn.set_trace_callback(self.statements.append)
+
+
+def seed(db: Database):
+    for user_id in range(1, 51):
+        db.add_user(user_id, f'user{user_id}')
+    for i in range(500):
+        db.create_order(i % 50 + 1, 'septic', 'ул. Ленина, 1', '+79000000000')
+    with db.connection() as conn:
+        conn.execute('ANALYZE')
+
+
+class PlanResult(NamedTuple):
+    method: str
+    sql: str
+    plan: List[str]
+    ok: bool
+    # Причина, по которой полный проход разрешён (FULL_SCAN_ALLOWED)
+    allowed_reason: Optional[str] = None
+
+
+def find_unchecked_methods() -> List[str]:
+    """Публичные методы Database, для которых нет сценария в CALLS."""
+    public = {
+        name for name in dir(Database)
+        if not name.startswith('_') and callable(getattr(Database, name))
+    } - NOT_QUERIES
+    return sorted(public - CALLS.keys())
+
+
+def check_plans() -> List[PlanResult]:
+    """Выполнить CALLS на тестовой базе и разобрать план каждого запроса."""
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        db = TracingDatabase(os.path.join(tmp, 'plans.db'), stats_cache=False)
+        seed(db)
+
+        for method, args in CALLS.items():
+            db.statements.clear()
+            getattr(db, method)(*args)
+            queries = [
+                sql for sql in db.statements
+                if re.match(r'\s*(SELECT|UPDATE|DELETE|INSERT)', sql, re.IGNORECASE)
+            ]
+            with db.connection() as conn:
+                for sql in queries:
+                    plan = [row['detail'] for row in conn.execute(f'EXPLAIN QUERY PLAN {sql}')]
+                    bad = [detail for detail in plan if BAD_PLAN.search(detail)]
+                    allowed_table, reason = FULL_SCAN_ALLOWED.get(method, (None, None))
+                    allowed = [detail for detail in bad if detail == f'SCAN {allowed_table}']
+                    results.append(PlanResult(
+                        method, ' '.join(sql.split()), plan, len(bad) == len(allowed),
+                        reason if allowed else None
+                    ))
+        db.close()
+    return results
+
+
+def main() -> int:
+    missing = find_unchecked_methods()
+    if missing:
+        print(f"❌ Нет сценария проверки для методов: {', '.join(missing)}")
+        return 1
+
+    failures = 0
+    for result in check_plans():
+        if not result.ok:
+            failures += 1
+            print(f"❌ {result.method}: {result.sql}")
+            for detail in result.plan:
+                print(f"     {detail}")
+        else:
+            note = f" (разрешено: {result.allowed_reason})" if result.allowed_reason else ""
+            print(f"✅ {result.method}: {'; '.join(result.plan) or 'без чтения таблиц'}{note}")
+
+    if failures:
+        print(f"\n❌ Запросов с полным сканированием: {failures}")
+        return 1
+    print("\n✅ Все запросы используют индексы")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
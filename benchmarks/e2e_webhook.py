@@ -0,0 +1,216 @@
+"""
+Сквозная проверка webhook-режима на локальной заглушке Telegram Bot API.
+
+Поднимает заглушку Bot API (getMe, setWebhook, sendMessage и т.д.),
+запускает TelegramBot с BOT_MODE=webhook и TELEGRAM_API_BASE_URL,
+направленным на заглушку, и присылает на webhook пачку /start от разных
+пользователей. Проверяется:
+  * запрос с неверным секретом получает 403 и не обрабатывается;
+  * webhook зарегистрирован с секретом и max_connections;
+  * каждый /start получил ответы бота;
+  * время подтверждения webhook и полное время до ответа бота.
+
+Заглушка отвечает с задержкой --api-latency-ms, как настоящий Bot API,
+поэтому видно, как BOT_CONCURRENCY сокращает общее время.
+
+Запуск:
+    python benchmarks/e2e_webhook.py [--updates 50] [--concurrency 8] [--api-latency-ms 30]
+"""
+import argparse
+import asyncio
+import itertools
+import logging
+import os
+import socket
+import statistics
+import sys
+import tempfile
+import time
+
+from aiohttp import ClientSession, web
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+TOKEN = "123456:E2E-TEST-TOKEN"
+SECRET = "e2e-webhook-secret"
+BOT_USER = {"id": 123456, "is_bot": True, "first_name": "KanalTex", "username": "kanaltex_e2e_bot"}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class FakeBotAPI:
+    """Заглушка Bot API: записывает вызовы и отвечает как Telegram."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.calls = []
+        self.webhook = None
+        self.webhook_set = asyncio.Event()
+        self.replies = {}
+        self._message_ids = itertools.count(1)
+
+    async def handle(self, request: web.Request) -> web.Response:
+        method = request.match_info['method']
+        data = dict(await request.post())
+        self.calls.append((method, data))
+        await asyncio.sleep(self.latency)
+
+        if method == 'getMe':
+            result = BOT_USER
+        elif method == 'setWebhook':
+            self.webhook = data
+            self.webhook_set.set()
+            result = True
+        elif method in ('sendMessage', 'sendPhoto', 'editMessageText'):
+            chat_id = int(data['chat_id'])
+            self.replies.setdefault(chat_id, []).append((method, time.perf_counter()))
+            result = {
+                "message_id": next(self._message_ids),
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private"},
+                "from": BOT_USER,
+                "text": data.get('text', ''),
+            }
+            if method == 'sendPhoto':
+                result["photo"] = [{"file_id": "logo-file-id", "file_unique_id": "logo", "width": 1, "height": 1}]
+        else:
+            result = True
+        return web.json_response({"ok": True, "result": result})
+
+    async def start(self) -> web.AppRunner:
+        app = web.Application()
+        app.router.add_post('/bot{token}/{method}', self.handle)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, '127.0.0.1', 0).start()
+        return runner
+
+
+def start_update(update_id: int, user_id: int) -> dict:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": user_id, "type": "private"},
+            "from": {"id": user_id, "is_bot": False, "first_name": f"Клиент {user_id}"},
+            "text": "/start",
+            "entities": [{"type": "bot_command", "offset": 0, "length": 6}],
+        },
+    }
+
+
+async def wait_for(condition, timeout: float):
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        if time.perf_counter() > deadline:
+            return False
+        await asyncio.sleep(0.01)
+    return True
+
+
+async def run(args) -> bool:
+    api = FakeBotAPI(args.api_latency_ms / 1000)
+    api_runner = await api.start()
+    api_url = f"http://127.0.0.1:{api_runner.addresses[0][1]}"
+    webhook_port = free_port()
+
+    # Настройки читаются модулями при импорте — задаём до импорта бота
+    os.environ.update({
+        'BOT_TOKEN': TOKEN,
+        'ADMIN_IDS': '',
+        'BOT_MODE': 'webhook',
+        'BOT_CONCURRENCY': str(args.concurrency),
+        'TELEGRAM_API_BASE_URL': api_url,
+        'WEBHOOK_URL': f"http://127.0.0.1:{webhook_port}",
+        'WEBHOOK_LISTEN': '127.0.0.1',
+        'WEBHOOK_PORT': str(webhook_port),
+        'WEBHOOK_SECRET': SECRET,
+        'WEBHOOK_MAX_CONNECTIONS': '20',
+        'AI_BACKEND': '',
+        'LOGO_WARMUP_CHAT_ID': '',
+    })
+    from app.bot.bot_handler import TelegramBot
+    from app.config import WEBHOOK_PATH
+    from app.models.database import Database
+
+    workdir = tempfile.mkdtemp(prefix='e2e_webhook_')
+    db = Database(os.path.join(workdir, 'bot.db'))
+    db.init_db()
+    bot = TelegramBot(db)
+    bot_task = asyncio.create_task(bot.run())
+
+    ok = True
+    try:
+        await asyncio.wait_for(api.webhook_set.wait(), timeout=10)
+        url = f"http://127.0.0.1:{webhook_port}{WEBHOOK_PATH}"
+        print(f"webhook: {api.webhook.get('url')}  max_connections={api.webhook.get('max_connections')}")
+        if api.webhook.get('url') != url or api.webhook.get('secret_token') != SECRET:
+            print("❌ webhook зарегистрирован с неверными параметрами")
+            ok = False
+
+        async with ClientSession() as session:
+            async with session.post(url, json=start_update(1, 999), headers={
+                'X-Telegram-Bot-Api-Secret-Token': 'wrong'
+            }) as response:
+                if response.status != 403:
+                    print(f"❌ неверный секрет: ожидался 403, получен {response.status}")
+                    ok = False
+                else:
+                    print("✅ неверный секрет отклонён (403)")
+
+            async def post(i: int, user_id: int):
+                started = time.perf_counter()
+                async with session.post(url, json=start_update(i, user_id), headers={
+                    'X-Telegram-Bot-Api-Secret-Token': SECRET
+                }) as response:
+                    return user_id, response.status, started, time.perf_counter() - started
+
+            users = [1000 + i for i in range(args.updates)]
+            started_all = time.perf_counter()
+            results = await asyncio.gather(*(post(i + 10, uid) for i, uid in enumerate(users)))
+
+        # /start обычному пользователю: приветствие + меню
+        done = await wait_for(lambda: all(len(api.replies.get(uid, [])) >= 2 for uid in users), timeout=60)
+        total = time.perf_counter() - started_all
+        if not done or any(status != 200 for _, status, _, _ in results) or 999 in api.replies:
+            print("❌ не все обновления обработаны или обработан запрос с неверным секретом")
+            ok = False
+
+        acks = sorted(ack * 1000 for _, _, _, ack in results)
+        e2e = sorted(
+            (api.replies[uid][-1][1] - started) * 1000
+            for uid, _, started, _ in results if len(api.replies.get(uid, [])) >= 2
+        )
+        print(f"обновлений: {args.updates}, BOT_CONCURRENCY={args.concurrency}, "
+              f"задержка API {args.api_latency_ms:.0f} мс")
+        print(f"  подтверждение webhook p50/max: {statistics.median(acks):.1f} / {acks[-1]:.1f} мс")
+        if e2e:
+            print(f"  до ответа бота p50/max:        {statistics.median(e2e):.0f} / {e2e[-1]:.0f} мс")
+        print(f"  всего: {total:.2f} с, обработано {len(e2e)}/{args.updates}")
+    finally:
+        bot.stop()
+        await bot_task
+        db.close()
+        await api_runner.cleanup()
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--updates', type=int, default=50)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--api-latency-ms', type=float, default=30)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    ok = asyncio.run(run(args))
+    print("\n✅ Webhook работает" if ok else "\n❌ Проверка не пройдена")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,155 @@
+"""
+Нагрузочный тест веб-панели: /health и /api/orders под несколькими
+клиентами одновременно, dev-сервер Flask против gunicorn.
+
+Сервер запускается отдельным процессом во временном каталоге со своей
+базой (botdata.db), засеянной --orders заявками. Каждый клиент входит
+через /login (ADMIN_PASSWORD) и в keep-alive сессии по кругу запрашивает
+/health и первую страницу /api/orders в течение --duration секунд.
+
+Запуск:
+    python benchmarks/load_web.py [--server gunicorn|dev|both] [--clients 32] [--duration 10] [--orders 5000]
+"""
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app.models.database import Database  # noqa: E402
+
+PASSWORD = 'bench-password'
+SERVICES = ['septic', 'cesspool', 'drainage', 'toilet', 'grease_trap', 'other']
+
+DEV_SERVER = """
+import os
+from wsgi import app
+app.run(host='127.0.0.1', port=int(os.environ['PORT']), threaded=True, use_reloader=False)
+"""
+
+
+def seed(db_path: str, orders: int):
+    db = Database(db_path)
+    db.init_db()
+    for i in range(orders):
+        user_id = 1000 + i % 500
+        if i < 500:
+            db.add_user(user_id, f"user{user_id}", "Клиент")
+        db.create_order(user_id, SERVICES[i % len(SERVICES)], f"ул. Ленина, {i}", '+79000000000', '')
+    db.close()
+
+
+def start_server(kind: str, workdir: str, port: int) -> subprocess.Popen:
+    env = dict(os.environ, PORT=str(port), ADMIN_PASSWORD=PASSWORD, PYTHONPATH=ROOT,
+               BOT_INTERNAL_TOKEN='', WEB_BIND='127.0.0.1', LOG_LEVEL='warning')
+    if kind == 'gunicorn':
+        cmd = [sys.executable, '-m', 'gunicorn', '-c', os.path.join(ROOT, 'gunicorn.conf.py'), 'wsgi:app']
+    else:
+        cmd = [sys.executable, '-c', DEV_SERVER]
+    return subprocess.Popen(cmd, cwd=workdir, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def wait_ready(base_url: str, timeout: float = 20):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(f"{base_url}/health", timeout=1).ok:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError(f"сервер {base_url} не поднялся за {timeout} с")
+
+
+def client(base_url: str, deadline: float, results: dict, lock: threading.Lock):
+    session = requests.Session()
+    session.post(f"{base_url}/login", data={'password': PASSWORD}, allow_redirects=False, timeout=10)
+    local = {'/health': [], '/api/orders': []}
+    errors = 0
+    paths = list(local)
+    i = 0
+    while time.monotonic() < deadline:
+        path = paths[i % 2]
+        i += 1
+        started = time.perf_counter()
+        try:
+            response = session.get(f"{base_url}{path}", timeout=10)
+            if response.status_code != 200:
+                errors += 1
+                continue
+        except requests.RequestException:
+            errors += 1
+            continue
+        local[path].append((time.perf_counter() - started) * 1000)
+    session.close()
+    with lock:
+        for path, samples in local.items():
+            results[path].extend(samples)
+        results['errors'] += errors
+
+
+def percentile(samples, q):
+    return samples[min(len(samples) - 1, int(len(samples) * q))]
+
+
+def run_load(kind: str, args):
+    workdir = tempfile.mkdtemp(prefix='load_web_')
+    try:
+        seed(os.path.join(workdir, 'botdata.db'), args.orders)
+        process = start_server(kind, workdir, args.port)
+        base_url = f"http://127.0.0.1:{args.port}"
+        try:
+            wait_ready(base_url)
+            results = {'/health': [], '/api/orders': [], 'errors': 0}
+            lock = threading.Lock()
+            deadline = time.monotonic() + args.duration
+            threads = [threading.Thread(target=client, args=(base_url, deadline, results, lock))
+                       for _ in range(args.clients)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        finally:
+            process.terminate()
+            process.wait(timeout=15)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    for path in ('/health', '/api/orders'):
+        samples = sorted(results[path])
+        if not samples:
+            print(f"{kind:<9} {path:<12} нет успешных ответов")
+            continue
+        print(f"{kind:<9} {path:<12} {len(samples) / args.duration:>8.0f} "
+              f"{statistics.median(samples):>8.1f} {percentile(samples, 0.95):>8.1f} "
+              f"{percentile(samples, 0.99):>8.1f}")
+    print(f"{kind:<9} ошибок: {results['errors']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--server', choices=['gunicorn', 'dev', 'both'], default='both')
+    parser.add_argument('--clients', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--orders', type=int, default=5000)
+    parser.add_argument('--port', type=int, default=5077)
+    args = parser.parse_args()
+
+    print(f"{args.clients} клиентов, {args.duration:.0f} с, {args.orders} заявок в базе")
+    print(f"{'сервер':<9} {'путь':<12} {'зап/с':>8} {'p50':>8} {'p95':>8} {'p99':>8}  (мс)")
+    for kind in (['dev', 'gunicorn'] if args.server == 'both' else [args.server]):
+        run_load(kind, args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+"""Gunicorn configuration for the admin panel (production serving mode)
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Thread workers (gthread): each worker process serves up to WEB_THREADS
+requests at once over keep-alive connections; connections beyond
+WEB_MAX_CONNECTIONS per worker and the WEB_BACKLOG listen queue are
+refused instead of piling up threads. SSE streams (/api/orders/stream)
+hold a thread each, so they are capped below WEB_THREADS per worker: extra
+dashboards get 503 and fall back to polling instead of starving API requests.
+"""
+import os
+
+bind = f"{os.getenv('WEB_BIND', '0.0.0.0')}:{os.getenv('PORT', '5000')}"
+
+worker_class = "gthread"
+workers = int(os.getenv("WEB_WORKERS", "2"))
+threads = int(os.getenv("WEB_THREADS", "8"))
+worker_connections = int(os.getenv("WEB_MAX_CONNECTIONS", "100"))
+backlog = int(os.getenv("WEB_BACKLOG", "64"))
+
+# Half the threads by default, and always at least one left for API requests
+sse_max_subscribers = min(int(os.getenv("SSE_MAX_SUBSCRIBERS", threads // 2)), threads - 1)
+# Set in the workers' environment; WEB_SERVER also turns off the per-process
+# stats cache when gunicorn is started directly
+raw_env = [
+    "WEB_SERVER=gunicorn",
+    f"SSE_MAX_SUBSCRIBERS={max(sse_max_subscribers, 0)}",
+]
+keepalive = int(os.getenv("WEB_KEEPALIVE", "5"))
+
+timeout = int(os.getenv("WEB_TIMEOUT", "60"))
+graceful_timeout = 10
+# Recycle workers periodically to bound memory growth
+max_requests = int(os.getenv("WEB_MAX_REQUESTS", "5000"))
+max_requests_jitter = 500
+
+# Each worker opens its own SQLite connection pool after fork
+preload_app = False
+
+accesslog = os.getenv("WEB_ACCESS_LOG") or None
+errorlog = "-"
+loglevel = os.getenv("LOG_LEVEL", "info").lower()
@@ -3,174 +3,188 @@
 Main entry point for KanalTexService Telegram Bot
 Адаптировано из ShveinyiHUB для ассенизаторских услуг
 Компания: КаналТехСервис, г. Ярцево
+
+Тяжёлые модули (telegram, flask) импортируются только там, где нужны:
+веб-панель поднимается в своём потоке параллельно с ботом.
+Флаг --profile-startup выводит время импортов и фаз запуска.
 """
-import os
-import sys
-import time
+import argparse
 import asyncio
-import threading
 import logging
-from pathlib import Path
-from dotenv import load_dotenv
+import os
+import secrets
+import subprocess
+import sys
+
+from app.utils.startup import StartupProfiler, run_bot
+
+logger = logging.getLogger(__name__)
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
 
 # --- АВТОЗАПУСК ДЛЯ BOTHOST ---
-def force_load_env():
-    """Принудительная загрузка .env для работы на любом хостинге"""
-    possible_paths = [
-        os.path.join(os.path.dirname(os.path.abspath(__file__)), '.env'),
-        os.path.join(os.getcwd(), '.env'),
-        '.env'
-    ]
-    for path in possible_paths:
+def load_env() -> bool:
+    """Загрузка .env (рядом с main.py или в текущем каталоге) поверх окружения"""
+    from dotenv import load_dotenv
+    for path in (os.path.join(ROOT, '.env'), os.path.join(os.getcwd(), '.env')):
         if os.path.exists(path):
-            load_dotenv(path, override=True)
-            try:
-                with open(path, 'r', encoding='utf-8') as f:
-                    for line in f:
-                        if '=' in line and not line.startswith('#'):
-                            k, v = line.split('=', 1)
-                            key = k.strip()
-                            value = v.strip().strip('"').strip("'")
-                            os.environ[key] = value
-            except:
-                pass
-            return True
+            return load_dotenv(path, override=True)
     return False
 
-# Принудительно загружаем переменные окружения
-force_load_env()
 
-# Настройка логирования
-logging.basicConfig(
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    level=logging.INFO
-)
-logger = logging.getLogger(__name__)
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="КаналТехСервис: Telegram-бот и веб-панель")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="вывести время импортов и фаз запуска")
+    return parser.parse_args()
 
-# Проверка токена
-BOT_TOKEN = os.getenv("BOT_TOKEN")
-BOT_ENABLED = bool(BOT_TOKEN)
-
-if not BOT_TOKEN:
-    logger.warning(
-        "\n" + "="*60 + "\n"
-        "⚠️ WARNING: BOT_TOKEN not found!\n\n"
-        "The Telegram bot will be disabled.\n"
-        "Only the web admin panel will be available.\n"
-        "Set BOT_TOKEN in Secrets to enable the bot.\n"
-        "="*60
-    )
 
-# --- ИМПОРТ ВЕБ-АДМИНКИ (Flask) ---
-try:
-    from app.web.routes import create_app
-    flask_app = None
-except ImportError as e:
-    logger.warning(f"⚠️ Web admin panel import failed: {e}")
-    flask_app = None
+def start_gunicorn() -> subprocess.Popen:
+    """Запуск веб-панели под gunicorn отдельным процессом"""
+    logger.info(f"🌐 gunicorn starting on port {os.getenv('PORT', '5000')}...")
+    return subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", os.path.join(ROOT, "gunicorn.conf.py"), "wsgi:app"],
+        cwd=ROOT
+    )
 
 
-def run_flask_app():
-    """Запуск Flask в отдельном потоке"""
-    global flask_app
-    if os.getenv("SKIP_FLASK", "0") == "1":
-        logger.info("⏭️ Flask отключен (SKIP_FLASK=1)")
-        return
-    
-    try:
-        from app.models.database import Database
-        db = Database()
-        
-        # Здесь будет bot_instance, но пока None
-        from app.web.routes import create_app
-        flask_app = create_app(db, None)
-        
-        port = int(os.getenv("PORT", "5000"))
-        logger.info(f"🌐 Flask starting on port {port}...")
-        flask_app.run(host="0.0.0.0", port=port, use_reloader=False, threaded=True)
-    except Exception as e:
-        logger.error(f"❌ Ошибка при запуске Flask: {e}")
+def stop_gunicorn(process: subprocess.Popen):
+    if process.poll() is None:
+        process.terminate()
+        try:
+            process.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            process.kill()
 
 
 def main():
     """Главная функция запуска бота"""
+    args = parse_args()
+    profiler = StartupProfiler(enabled=args.profile_startup)
+
+    with profiler.phase("загрузка .env"):
+        # Принудительно загружаем переменные окружения
+        load_env()
+
+    # Настройка логирования
+    logging.basicConfig(
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+        level=logging.INFO
+    )
+
+    # Проверка токена
+    bot_enabled = bool(os.getenv("BOT_TOKEN"))
+
+    # Веб-панель: "dev" — встроенный сервер Flask в потоке бота,
+    # "gunicorn" — отдельные процессы gunicorn (см. gunicorn.conf.py)
+    web_server = os.getenv("WEB_SERVER", "dev").lower()
+    skip_web = os.getenv("SKIP_FLASK", "0") == "1"
+    port = int(os.getenv("PORT", "5000"))
+
+    if web_server == "gunicorn" and bot_enabled and not os.getenv("BOT_INTERNAL_TOKEN"):
+        # Воркеры gunicorn — другие процессы: через внутренний API бота они будят
+        # разбор outbox уведомлений. Токен наследуется дочерним процессом.
+        os.environ["BOT_INTERNAL_TOKEN"] = secrets.token_hex(32)
+
+    if not bot_enabled:
+        logger.warning(
+            "\n" + "="*60 + "\n"
+            "⚠️ WARNING: BOT_TOKEN not found!\n\n"
+            "The Telegram bot will be disabled.\n"
+            "Only the web admin panel will be available.\n"
+            "Set BOT_TOKEN in Secrets to enable the bot.\n"
+            "="*60
+        )
+
     logger.info("="*60)
     logger.info("КаналТехСервис - Telegram Bot & Admin Panel")
     logger.info("г. Ярцево, Смоленская область")
     logger.info("Адаптировано из ShveinyiHUB")
     logger.info("="*60)
-    
-    # Инициализация базы данных
+
+    # Инициализация базы данных: один экземпляр на процесс
     logger.info("\n[1/3] Инициализация базы данных...")
-    from app.models.database import Database
-    db = Database()
-    db.init_db()
+    with profiler.phase("база данных"):
+        from app.models.database import get_database
+        db = get_database()
     logger.info("База данных инициализирована")
-    
-    # Загрузка цен из JSON
+
+    web = None
+    web_process = None
+    if skip_web:
+        logger.info("⏭️ Flask отключен (SKIP_FLASK=1)")
+    elif web_server == "gunicorn":
+        web_process = start_gunicorn()
+
     try:
-        from app.utils.prices import load_prices_from_json
-        load_prices_from_json()
-        logger.info("Цены загружены")
-    except Exception as e:
-        logger.warning(f"Не удалось загрузить цены: {e}")
-    
-    if BOT_ENABLED:
-        # Сброс webhook для Telegram бота
-        try:
-            import requests
-            requests.get(
-                f"https://api.telegram.org/bot{BOT_TOKEN}/deleteWebhook?drop_pending_updates=true",
-                timeout=10
-            )
-            logger.info("Webhook сброшен")
-        except Exception as e:
-            logger.warning(f"Не удалось сбросить webhook: {e}")
-        
-        # Запуск Flask в отдельном потоке
-        if not os.getenv("SKIP_FLASK"):
-            flask_thread = threading.Thread(target=run_flask_app, daemon=True)
-            flask_thread.start()
-            logger.info("Flask запущен в фоновом режиме")
-            time.sleep(2)
-        
-        # Инициализация Telegram бота
-        logger.info("\n[2/3] Инициализация Telegram бота...")
-        from app.bot.bot_handler import TelegramBot
-        bot = TelegramBot(db)
-        logger.info("Telegram бот инициализирован")
-        
-        # Запуск бота
-        logger.info("\n[3/3] Запуск бота...")
-        logger.info("\n" + "="*60)
-        logger.info("Бот запущен и готов к работе!")
-        logger.info("Контакты: +7 (910) 555-84-14")
-        logger.info("(Нажмите Ctrl+C для остановки)")
-        logger.info("="*60 + "\n")
-        
-        # Асинхронный запуск
-        try:
-            asyncio.run(bot.run())
-        except KeyboardInterrupt:
+        if bot_enabled:
+            # Инициализация Telegram бота (каталог цен и FAQ рендерится здесь)
+            logger.info("\n[2/3] Инициализация Telegram бота...")
+            with profiler.phase("импорт и создание бота"):
+                from app.bot.bot_handler import TelegramBot
+                bot = TelegramBot(db)
+            logger.info("Telegram бот инициализирован")
+
+            if not skip_web and web_server != "gunicorn":
+                # Flask импортируется и слушает порт в своём потоке, пока бот подключается
+                from app.web.dev_server import DevServerThread
+                web = DevServerThread(db, bot, port=port)
+                web.start()
+
+            # Запуск бота
+            logger.info("\n[3/3] Запуск бота...")
             logger.info("\n" + "="*60)
-            logger.info("Бот остановлен пользователем")
-            logger.info("="*60)
-        except Exception as e:
-            logger.error("\n" + "="*60)
-            logger.error(f"Критическая ошибка: {type(e).__name__}: {e}", exc_info=True)
-            logger.error("="*60)
-            sys.exit(1)
-    else:
-        # Режим только веб-панели (без бота)
-        logger.info("\n[2/3] Telegram бот отключен (нет BOT_TOKEN)")
-        logger.info("\n[3/3] Запуск только веб-панели...")
-        logger.info("\n" + "="*60)
-        logger.info("Веб-панель запущена!")
-        logger.info("Добавьте BOT_TOKEN в Secrets для активации бота")
-        logger.info("="*60 + "\n")
-        
-        # Запуск Flask в основном потоке
-        run_flask_app()
+            logger.info("Бот запускается!")
+            logger.info("Контакты: +7 (910) 555-84-14")
+            logger.info("(Нажмите Ctrl+C для остановки)")
+            logger.info("="*60 + "\n")
+
+            # Асинхронный запуск
+            try:
+                asyncio.run(run_bot(bot, web, profiler))
+            except KeyboardInterrupt:
+                logger.info("\n" + "="*60)
+                logger.info("Бот остановлен пользователем")
+                logger.info("="*60)
+            except Exception as e:
+                logger.error("\n" + "="*60)
+                logger.error(f"Критическая ошибка: {type(e).__name__}: {e}", exc_info=True)
+                logger.error("="*60)
+                sys.exit(1)
+        else:
+            # Режим только веб-панели (без бота)
+            logger.info("\n[2/3] Telegram бот отключен (нет BOT_TOKEN)")
+            logger.info("\n[3/3] Запуск только веб-панели...")
+            logger.info("\n" + "="*60)
+            logger.info("Веб-панель запущена!")
+            logger.info("Добавьте BOT_TOKEN в Secrets для активации бота")
+            logger.info("="*60 + "\n")
+
+            if web_process is not None:
+                profiler.print_report()
+                try:
+                    web_process.wait()
+                except KeyboardInterrupt:
+                    pass
+            elif not skip_web:
+                # Процесс обслуживает только веб-панель: ждём её потока
+                from app.web.dev_server import DevServerThread
+                web = DevServerThread(db, port=port)
+                web.start()
+                web.ready.wait()
+                profiler.mark("веб-панель слушает порт")
+                profiler.print_report()
+                try:
+                    web.join()
+                except KeyboardInterrupt:
+                    pass
+    finally:
+        if web_process is not None:
+            stop_gunicorn(web_process)
+        if web is not None:
+            web.shutdown()
+        db.close()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,21 @@
+"""Планы запросов Database: без полных проходов и временных B-деревьев.
+
+Сценарии и правила — в benchmarks/check_query_plans.py; новый публичный
+метод Database без сценария в CALLS роняет тест.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.check_query_plans import check_plans, find_unchecked_methods  # noqa: E402
+
+
+def test_every_public_method_has_a_plan_scenario():
+    assert find_unchecked_methods() == []
+
+
+def test_queries_use_indexes():
+    bad = [f"{result.method}: {result.sql} -> {'; '.join(result.plan)}"
+           for result in check_plans() if not result.ok]
+    assert not bad, "Полное сканирование или временное B-дерево:\n" + "\n".join(bad)
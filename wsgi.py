@@ -1,11 +1,22 @@
-"""WSGI entry point for production deployment"""
-from app.models.database import Database
-from app.web.routes import create_app
+"""WSGI entry point for production deployment
+
+    gunicorn -c gunicorn.conf.py wsgi:app
 
-db = Database()
-db.init_db()
+Status notifications are queued in the database outbox and delivered by the
+bot process. With BOT_INTERNAL_TOKEN set, workers also wake the bot through
+its internal API (BOT_INTERNAL_URL) so delivery does not wait for the next poll.
+
+Orders also change in the bot and in other workers, so each worker feeds its
+SSE streams from the database change log (OrderChangeRelay).
+"""
+from app.models.database import get_database
+from app.utils.events import OrderChangeRelay
+from app.web.bot_client import bot_client_from_env
+from app.web.routes import create_app
 
-app = create_app(db, None)
+db = get_database()
+app = create_app(db, bot_client_from_env())
+OrderChangeRelay(db).start()
 
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=5000)